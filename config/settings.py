@@ -82,12 +82,146 @@ MONGODB_SETTINGS = {
         ],
         'database': 'imdb_replica'
     },
+    # Client partagé et son pool (movies/services/mongo_pool.py)
+    'client': {
+        'maxPoolSize': 50,
+        'minPoolSize': 0,
+        'serverSelectionTimeoutMS': 5000,
+        'connectTimeoutMS': 3000,
+        'socketTimeoutMS': 10000,
+        'localThresholdMS': 15,     # Fenêtre de latence : membres à moins de 15 ms du plus rapide
+    },
+    # Préférence de lecture par route (mongo_pool.DEFAULT_READ_ROUTES)
+    'read_routing': {
+        'primary': {'mode': 'primary'},
+        'detail': {'mode': 'secondaryPreferred', 'max_staleness': 90},
+        'stats': {'mode': 'secondaryPreferred', 'max_staleness': 120},
+    },
     'flat': {
         'host': 'localhost:27017',
         'database': 'imdb_flat'
     }
 }
 
+# Caches Django : mémoire locale par défaut, 'files' partagé entre processus
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'cineexplorer',
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+    'files': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'data' / 'cache',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+}
+
+# Cache des réponses des pages (movies/services/response_cache.py)
+RESPONSE_CACHE = {
+    'enabled': True,
+    'cache_alias': 'default',   # 'files' pour partager les réponses entre workers
+    'ttl': {                    # Secondes par page (0 : pas de cache)
+        'home': 0,              # Films tirés au hasard à chaque visite
+        'movie_list': 600,
+        'search': 600,
+        'movie_detail': 600,
+        'stats': 1800,
+    },
+}
+
+# Cache à deux niveaux des fonctions de service (movies/services/service_cache.py)
+SERVICE_CACHE = {
+    'enabled': True,
+    'max_entries': 256,         # LRU en mémoire de chaque processus
+    'shared_alias': 'files',    # Niveau partagé entre workers (None : mémoire seule)
+    'lock_timeout': 30.0,       # Un seul recalcul par clé, au plus ce délai
+    'ttl': {},                  # Durées de fraîcheur par fonction, ex. {'home_stats': 30}
+}
+
+# Version des données, clé des caches (movies/services/data_version.py)
+DATA_VERSION = {
+    'sqlite_ttl': 5.0,          # Relecture de la table meta
+    'mongo_ttl': 10.0,          # Relecture du document meta de MongoDB
+    'mongo_timeout_ms': 300,
+}
+
+# ETag / Last-Modified des pages (movies/services/conditional_get.py)
+CONDITIONAL_GET = {
+    'enabled': True,
+    'max_age': 0,               # Les navigateurs revalident à chaque visite (304 si inchangé)
+}
+
+# Disjoncteur MongoDB (movies/services/mongo_breaker.py)
+MONGO_CIRCUIT = {
+    'failure_threshold': 1,     # Erreurs de connexion consécutives avant ouverture
+    'probe_interval': 5.0,      # Secondes entre deux sondes quand le circuit est ouvert
+    'probe_timeout_ms': 500,
+}
+
+# Collections et index MongoDB en cache (movies/services/mongo_schema.py)
+MONGO_METADATA = {
+    'ttl': 60.0,                # Secondes avant une nouvelle lecture des collections
+}
+
+# Pool de connexions SQLite en lecture seule (movies/services/sqlite_pool.py)
+SQLITE_POOL = {
+    'mmap_size': 256 * 1024 * 1024,   # 256 Mo mappés en mémoire
+    'cache_size_kib': 64 * 1024,      # 64 Mo de cache de pages par connexion
+    'cached_statements': 256,         # Requêtes préparées gardées par connexion
+}
+
+# Comptage des films filtrés de la liste (movies/services/count_service.py)
+MOVIE_COUNTS = {
+    'use_facets': True,         # Comptes exacts depuis les facettes précalculées
+    'exact_threshold': 10000,   # Sinon : comptage exact jusqu'à ce seuil...
+    'sample_size': 20000,       # ...puis estimation sur cet échantillon
+    'sample_windows': 8,        # réparti en fenêtres de rowid (lectures par plage)
+    'cache_size': 512,
+}
+
+# Recherche plein texte FTS5 (movies/services/search_index.py)
+SEARCH_INDEX = {
+    'candidates': 200,          # Films lus dans l'index avant classement
+    'votes_weight': 1.0,        # BM25 - votes_weight * log10(1 + numVotes)
+    'alt_title_factor': 0.8,    # Titres alternatifs légèrement moins pertinents
+}
+
+# Films similaires précalculés (movies/services/similarity.py)
+SIMILAR_MOVIES = {
+    'top_k': 20,                # Voisins enregistrés par film
+    'batch_cells': 4_000_000,   # Films du lot x films du catalogue (mémoire d'un lot)
+    'weights': {'genres': 1.0, 'directors': 2.0, 'writers': 1.0, 'cast': 1.5, 'quality': 0.2},
+}
+
+# Page détail : sources interrogées en parallèle (movies/services/detail_service.py)
+MOVIE_DETAIL = {
+    'max_workers': 8,       # Threads SQLite partagés (requêtes couvertes, films similaires)
+    'mongo_workers': 8,     # Threads MongoDB, pool séparé : un MongoDB lent ne bloque pas SQLite
+    'hedge_delay': 0.15,    # Secondes laissées à MongoDB avant de lancer aussi SQLite
+    'timeout': 10.0,        # Attente maximale d'une source
+    'similar_limit': 4,
+    'precomputed': True,    # movie_detail_doc d'abord (une lecture), MongoDB sinon
+}
+
+# Détail précalculé des films (movies/services/detail_docs.py)
+MOVIE_DETAIL_DOCS = {
+    'workers': None,        # Processus de build_movie_detail_docs (None : un par cœur)
+    'chunk_size': 500,
+    'compress_level': 6,
+}
+
+# Préchauffage des caches (movies/services/cache_warmer.py, python manage.py warm_caches)
+CACHE_WARMER = {
+    'top_n': 200,               # Films les plus votés
+    'recent_n': 200,            # Films récents du journal d'accès
+    'access_log': None,         # Ex. BASE_DIR / 'logs' / 'access.log'
+    'workers': 4,
+    'on_startup': False,        # True : préchauffage en arrière-plan au démarrage du serveur
+    'startup_delay': 5.0,       # Attente entre deux essais tant que SQLite n'est pas prêt
+    'startup_attempts': 6,
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -0,0 +1,18 @@
+from django.apps import AppConfig
+
+
+class MoviesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'movies'
+
+    def ready(self):
+        """Construit le registre du schéma SQLite dès le démarrage (et préchauffe les caches si demandé)"""
+        from .services import sqlite_schema, cache_warmer
+        try:
+            sqlite_schema.get_schema()
+        except Exception as e:
+            # Base absente ou illisible : le registre sera construit au premier appel
+            print(f"Registre du schéma SQLite non construit au démarrage: {e}")
+
+        if cache_warmer.get_warmer_settings()['on_startup'] and cache_warmer.is_server_process():
+            cache_warmer.start_background()
@@ -0,0 +1,23 @@
+"""
+Reconstruit les cartes de films dénormalisées (table movie_card)
+Usage : python manage.py build_movie_cards   (fait aussi par import_data.py)
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+
+from movies.services import movie_cards
+
+
+class Command(BaseCommand):
+    help = "Regroupe titre, année, type, note, votes et genres de chaque film dans movie_card"
+
+    def handle(self, *args, **options):
+        t0 = time.perf_counter()
+        try:
+            total = movie_cards.rebuild_movie_cards()
+        except Exception as e:
+            raise CommandError(f"Construction de movie_card impossible : {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ movie_card reconstruite en {time.perf_counter() - t0:.2f}s ({total:,} films)"
+        ))
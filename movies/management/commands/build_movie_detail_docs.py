@@ -0,0 +1,31 @@
+"""
+Précalcule le détail de chaque film (table movie_detail_doc)
+Usage : python manage.py build_movie_detail_docs [--workers N]   (après chaque import SQLite)
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+
+from movies.services import detail_docs
+
+
+class Command(BaseCommand):
+    help = "Sérialise et compresse le détail complet de chaque film (une lecture par page détail)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Processus de construction (défaut : settings.MOVIE_DETAIL_DOCS, un par cœur)")
+
+    def handle(self, *args, **options):
+        config = detail_docs.get_detail_doc_settings()
+        if options['workers']:
+            config['workers'] = options['workers']
+
+        t0 = time.perf_counter()
+        try:
+            total = detail_docs.rebuild_detail_docs(config)
+        except Exception as e:
+            raise CommandError(f"Construction de movie_detail_doc impossible : {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ movie_detail_doc reconstruite en {time.perf_counter() - t0:.2f}s ({total:,} films)"
+        ))
@@ -0,0 +1,23 @@
+"""
+Reconstruit le résumé des personnes (table person_summary)
+Usage : python manage.py build_person_summary   (après chaque import SQLite)
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+
+from movies.services import person_summary
+
+
+class Command(BaseCommand):
+    help = "Calcule catégorie principale, films, années et titres connus de chaque personne"
+
+    def handle(self, *args, **options):
+        t0 = time.perf_counter()
+        try:
+            total = person_summary.rebuild_person_summary()
+        except Exception as e:
+            raise CommandError(f"Construction de person_summary impossible : {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ person_summary reconstruit en {time.perf_counter() - t0:.2f}s ({total:,} personnes)"
+        ))
@@ -0,0 +1,31 @@
+"""
+Construit ou reconstruit l'index plein texte (tables FTS5 movies_fts, titles_fts, persons_fts)
+Usage : python manage.py build_search_index [--drop]   (après chaque import SQLite)
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+
+from movies.services import search_index
+
+
+class Command(BaseCommand):
+    help = "Construit l'index FTS5 des titres de films et des noms de personnes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--drop', action='store_true',
+            help="Supprime les tables FTS avant de les recréer (changement de tokeniseur ou de colonnes)"
+        )
+
+    def handle(self, *args, **options):
+        t0 = time.perf_counter()
+        try:
+            indexed = search_index.rebuild_search_index(drop=options['drop'])
+        except Exception as e:
+            raise CommandError(f"Construction de l'index plein texte impossible : {e}")
+
+        for table, rows in indexed.items():
+            self.stdout.write(f"  {table} : {rows:,} lignes indexées")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Index plein texte construit en {time.perf_counter() - t0:.2f}s"
+        ))
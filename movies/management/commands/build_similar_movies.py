@@ -0,0 +1,32 @@
+"""
+Précalcule les films similaires (table movie_neighbors)
+Usage : python manage.py build_similar_movies [--top-k N]   (après chaque import SQLite)
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+
+from movies.services import similarity
+
+
+class Command(BaseCommand):
+    help = "Calcule les k films les plus similaires de chaque film (genres, réalisateurs, scénaristes, acteurs)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=None,
+                            help="Voisins enregistrés par film (défaut : settings.SIMILAR_MOVIES)")
+
+    def handle(self, *args, **options):
+        config = similarity.get_similarity_settings()
+        if options['top_k']:
+            config['top_k'] = options['top_k']
+
+        t0 = time.perf_counter()
+        try:
+            total = similarity.rebuild_similar_movies(config)
+        except Exception as e:
+            raise CommandError(f"Construction de movie_neighbors impossible : {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ movie_neighbors reconstruite en {time.perf_counter() - t0:.2f}s "
+            f"({total:,} films, {config['top_k']} voisins max)"
+        ))
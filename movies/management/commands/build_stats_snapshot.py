@@ -0,0 +1,24 @@
+"""
+Reconstruit l'instantané des statistiques (table stats_snapshot)
+Usage : python manage.py build_stats_snapshot   (après chaque import SQLite)
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+
+from movies.services import stats_snapshot
+
+
+class Command(BaseCommand):
+    help = "Recalcule les statistiques globales et les stocke dans stats_snapshot"
+
+    def handle(self, *args, **options):
+        t0 = time.perf_counter()
+        try:
+            snapshot = stats_snapshot.rebuild_snapshot()
+        except Exception as e:
+            raise CommandError(f"Construction de stats_snapshot impossible : {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ stats_snapshot reconstruit en {time.perf_counter() - t0:.2f}s "
+            f"(version {snapshot['data_version']}, {snapshot['total_movies']:,} films)"
+        ))
@@ -0,0 +1,51 @@
+"""
+Préchauffe les caches (films les plus votés, films récents du journal d'accès, accueil, statistiques)
+Usage : python manage.py warm_caches [--top N] [--recent N] [--access-log FICHIER] [--workers N]
+"""
+import contextlib
+import io
+from django.core.management.base import BaseCommand, CommandError
+
+from movies.services import cache_warmer
+
+
+class Command(BaseCommand):
+    help = "Charge les pages des films populaires et récents pour remplir les caches avant les visiteurs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=None,
+                            help="Films les plus votés (défaut : settings.CACHE_WARMER)")
+        parser.add_argument('--recent', type=int, default=None,
+                            help="Films récents distincts pris dans le journal d'accès")
+        parser.add_argument('--access-log', default=None,
+                            help="Journal d'accès du serveur (lignes \"GET /movies/<id>/\")")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Threads du préchauffage")
+
+    def handle(self, *args, **options):
+        # Les vues affichent leur progression : silencieuses sauf avec -v 2
+        output = contextlib.nullcontext() if options['verbosity'] >= 2 else contextlib.redirect_stdout(io.StringIO())
+        try:
+            with output:
+                report = cache_warmer.warm(top_n=options['top'], recent_n=options['recent'],
+                                           access_log=options['access_log'], workers=options['workers'])
+        except Exception as e:
+            raise CommandError(f"Préchauffage des caches impossible : {e}")
+
+        movies, cold, warm = report['movies'], report['cold'], report['warm']
+        self.stdout.write(
+            f"🎯 {movies['total']:,} films ({movies['top']:,} plus votés, {movies['recent']:,} récents), "
+            f"{report['workers']} threads"
+        )
+        self.stdout.write(
+            f"   À froid  : {cold['ok']:,}/{cold['pages']:,} pages en {report['warm_seconds']:.2f}s "
+            f"(p50 {cold['p50_ms']} ms, {cold['not_found']} introuvables, {cold['errors']} erreurs)"
+        )
+        self.stdout.write(
+            f"   Contrôle : {warm['ok']:,}/{warm['pages']:,} pages en {report['check_seconds']:.2f}s "
+            f"(p50 {warm['p50_ms']} ms, succès cache de réponses {warm['response_cache_hit_ratio']})"
+        )
+        self.stdout.write(f"   Cache des services (passe de contrôle) : succès {report['service_cache']['hit_ratio']}")
+        if not report['sqlite_ready']:
+            self.stdout.write(self.style.WARNING("   SQLite pas prêt : accueil et statistiques non préchauffés"))
+        self.stdout.write(self.style.SUCCESS(f"✅ Caches préchauffés en {report['warm_seconds']:.2f}s"))
@@ -0,0 +1,234 @@
+"""
+Préchauffage des caches après un déploiement ou un redémarrage
+
+Les films les plus votés et ceux vus récemment (journal d'accès) sont
+chargés par les vues elles-mêmes, dans un pool de threads borné : document
+de détail, films similaires, cache de réponses, cache des services, pages
+SQLite et connexions MongoDB sont prêts avant les premiers visiteurs. La
+page d'accueil et les statistiques sont chargées aussi.
+Une seconde passe redemande les mêmes pages et mesure le taux de succès.
+Usage : python manage.py warm_caches, ou CACHE_WARMER['on_startup'].
+"""
+import os
+import re
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.http import Http404
+from django.test import RequestFactory
+
+from . import sqlite_pool, service_cache, stats_snapshot
+
+DEFAULT_WARMER_SETTINGS = {
+    'top_n': 200,               # Films les plus votés (numVotes)
+    'recent_n': 200,            # Films distincts les plus récents du journal d'accès
+    'access_log': None,         # Chemin du journal d'accès (None : pas de films récents)
+    'workers': 4,               # Threads du préchauffage
+    'on_startup': False,        # Préchauffer au démarrage du serveur (thread en arrière-plan)
+    'startup_delay': 5.0,       # Secondes d'attente avant le préchauffage au démarrage
+    'startup_attempts': 6,      # Essais (espacés de startup_delay) tant que SQLite n'est pas prêt
+}
+
+# "GET /movies/tt0111161/ HTTP/1.1" (runserver, gunicorn, nginx)
+ACCESS_LOG_PATTERN = re.compile(r'"GET /movies/(tt\d+)/')
+
+_started = False
+_lock = threading.Lock()
+_last_report = None
+
+
+def get_warmer_settings():
+    """Paramètres du préchauffage (défauts + settings.CACHE_WARMER)"""
+    config = dict(DEFAULT_WARMER_SETTINGS)
+    config.update(getattr(settings, 'CACHE_WARMER', {}))
+    return config
+
+
+def top_movie_ids(limit):
+    """Films les plus votés"""
+    if limit <= 0:
+        return []
+    conn = sqlite_pool.get_connection()
+    cursor = conn.execute("SELECT mid FROM ratings ORDER BY numVotes DESC LIMIT ?", (limit,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def recent_movie_ids(log_path, limit):
+    """Films distincts les plus récents du journal d'accès (le plus récent d'abord)"""
+    if not log_path or limit <= 0:
+        return []
+    try:
+        with open(log_path, encoding='utf-8', errors='replace') as log:
+            lines = log.readlines()
+    except OSError as e:
+        print(f"Journal d'accès illisible ({log_path}): {e}")
+        return []
+
+    ids = []
+    seen = set()
+    for line in reversed(lines):
+        match = ACCESS_LOG_PATTERN.search(line)
+        if match and match.group(1) not in seen:
+            seen.add(match.group(1))
+            ids.append(match.group(1))
+            if len(ids) >= limit:
+                break
+    return ids
+
+
+def sqlite_ready():
+    """Base et instantané des statistiques lisibles (sinon les pages serviraient des valeurs de secours)"""
+    try:
+        stats_snapshot.get_snapshot()
+        return True
+    except Exception as e:
+        print(f"SQLite pas encore prêt pour le préchauffage: {e}")
+        return False
+
+
+def _pages(movie_ids, with_summaries=True):
+    """(nom, chemin, vue, arguments) des pages à charger"""
+    from .. import views
+    pages = []
+    if with_summaries:
+        pages += [('home', '/', views.home_view_phase4, {}),
+                  ('stats', '/stats/', views.stats_view, {})]
+    pages += [('movie_detail', f'/movies/{mid}/', views.movie_detail_view, {'movie_id': mid})
+              for mid in movie_ids]
+    return pages
+
+
+def _load(factory, page):
+    """Appelle la vue : (nom, statut, cache de réponses, durée en ms)"""
+    name, path, view, kwargs = page
+    t0 = time.perf_counter()
+    try:
+        response = view(factory.get(path), **kwargs)
+        status, cache = response.status_code, response.get('X-Response-Cache')
+    except Http404:
+        status, cache = 404, None
+    except Exception as e:
+        print(f"Préchauffage de {path} impossible: {e}")
+        status, cache = 500, None
+    return name, status, cache, (time.perf_counter() - t0) * 1000
+
+
+def _run_pass(pages, workers):
+    factory = RequestFactory()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='cache-warmer') as executor:
+        return list(executor.map(lambda page: _load(factory, page), pages))
+
+
+def _summary(results):
+    durations = [ms for _, status, _, ms in results if status == 200]
+    cached = [cache for _, status, cache, _ in results if status == 200 and cache]
+    return {
+        'pages': len(results),
+        'ok': len(durations),
+        'not_found': sum(1 for _, status, _, _ in results if status == 404),
+        'errors': sum(1 for _, status, _, _ in results if status >= 500),
+        'p50_ms': round(statistics.median(durations), 1) if durations else None,
+        'response_cache_hit_ratio': round(cached.count('hit') / len(cached), 3) if cached else None,
+    }
+
+
+def _service_cache_delta(before, after):
+    """Compteurs du cache des services pendant une passe (différence de deux relevés)"""
+    delta = {key: after[key] - before[key] for key in ('l1_hits', 'l2_hits', 'misses', 'recomputes', 'stale_served')}
+    lookups = delta['l1_hits'] + delta['l2_hits'] + delta['misses'] + delta['recomputes']
+    delta['hit_ratio'] = round((delta['l1_hits'] + delta['l2_hits']) / lookups, 3) if lookups else None
+    return delta
+
+
+def warm(top_n=None, recent_n=None, access_log=None, workers=None):
+    """
+    Préchauffe les caches : films les plus votés + films récents du journal,
+    puis accueil et statistiques (seulement si SQLite est prêt : jamais de
+    valeurs de secours en cache). Retourne un rapport (durées, taux de succès).
+    """
+    global _last_report
+    config = get_warmer_settings()
+    top_n = config['top_n'] if top_n is None else top_n
+    recent_n = config['recent_n'] if recent_n is None else recent_n
+    access_log = access_log or config['access_log']
+    workers = max(1, int(workers or config['workers']))
+
+    # 1. Films à charger, sans doublon : récents d'abord (les plus demandés)
+    recent = recent_movie_ids(access_log, int(recent_n))
+    top = top_movie_ids(int(top_n))
+    movie_ids = list(dict.fromkeys(recent + top))
+    ready = sqlite_ready()
+    pages = _pages(movie_ids, with_summaries=ready)
+
+    # 2. Passe de préchauffage (à froid)
+    t0 = time.perf_counter()
+    cold = _run_pass(pages, workers)
+    warm_seconds = time.perf_counter() - t0
+
+    # 3. Passe de contrôle : les mêmes pages, servies par les caches
+    service_before = service_cache.get_service_cache_stats()
+    t0 = time.perf_counter()
+    check = _run_pass(pages, workers)
+    check_seconds = time.perf_counter() - t0
+    service_after = service_cache.get_service_cache_stats()
+
+    report = {
+        'movies': {'top': len(top), 'recent': len(recent), 'total': len(movie_ids)},
+        'workers': workers,
+        'warm_seconds': round(warm_seconds, 2),
+        'check_seconds': round(check_seconds, 2),
+        'cold': _summary(cold),
+        'warm': _summary(check),
+        'sqlite_ready': ready,
+        'service_cache': _service_cache_delta(service_before, service_after),
+        'pages_by_name': dict(Counter(name for name, _, _, _ in pages)),
+    }
+    _last_report = report
+    return report
+
+
+def get_last_report():
+    """Rapport du dernier préchauffage du processus (exposé par /api/test/)"""
+    return _last_report
+
+
+def is_server_process():
+    """Processus qui sert les requêtes : serveur WSGI, ou runserver (processus surveillé)"""
+    argv = [os.path.basename(arg) for arg in sys.argv[:2]]
+    if argv and argv[0] == 'manage.py':
+        if len(argv) < 2 or argv[1] != 'runserver':
+            return False
+        return os.environ.get('RUN_MAIN') == 'true' or '--noreload' in sys.argv
+    return True
+
+
+def start_background():
+    """Lance le préchauffage dans un thread (une fois par processus) après startup_delay"""
+    global _started
+    with _lock:
+        if _started:
+            return
+        _started = True
+
+    def run():
+        config = get_warmer_settings()
+        # Au démarrage la base peut être encore en cours d'import ou de copie
+        for _ in range(max(1, int(config['startup_attempts']))):
+            time.sleep(float(config['startup_delay']))
+            if sqlite_ready():
+                break
+        else:
+            print("Préchauffage des caches abandonné : SQLite indisponible")
+            return
+        try:
+            report = warm()
+            print(f"Caches préchauffés en {report['warm_seconds']}s "
+                  f"({report['movies']['total']} films, succès {report['warm']['response_cache_hit_ratio']})")
+        except Exception as e:
+            print(f"Préchauffage des caches impossible: {e}")
+
+    threading.Thread(target=run, name='cache-warmer', daemon=True).start()
@@ -0,0 +1,99 @@
+"""
+Requêtes conditionnelles (ETag / Last-Modified) sur les pages du site
+
+L'ETag d'une page ne dépend que de la version des données (data_version.py)
+et des paramètres qu'elle lit : il se calcule sans aucune requête SQLite ni
+MongoDB. Un navigateur ou un robot qui renvoie If-None-Match (ou
+If-Modified-Since) reçoit un 304 vide avant même l'appel de la vue.
+L'ETag est faible (W/) : deux rendus d'une même version peuvent différer de
+quelques octets (source du détail, MongoDB ou SQLite) sans changer le fond.
+Une réponse dégradée (degraded.py) n'a ni ETag ni Last-Modified : le client
+la redemandera en entier.
+"""
+import threading
+from functools import wraps
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from . import data_version, response_cache, degraded
+
+DEFAULT_CONDITIONAL_GET_SETTINGS = {
+    'enabled': True,
+    'max_age': 0,       # Cache-Control max-age : 0, le client revalide à chaque visite
+}
+
+_lock = threading.Lock()
+_stats = {}
+
+
+def get_conditional_get_settings():
+    """Paramètres des requêtes conditionnelles (défauts + settings.CONDITIONAL_GET)"""
+    config = dict(DEFAULT_CONDITIONAL_GET_SETTINGS)
+    config.update(getattr(settings, 'CONDITIONAL_GET', {}))
+    return config
+
+
+def make_etag(name, request, params, view_kwargs):
+    """ETag faible d'une page : page, version des données et empreinte de la requête"""
+    digest = response_cache.request_digest(request, params, view_kwargs)
+    return f'W/"{name}-{data_version.get_data_version()}-{digest[:16]}"'
+
+
+def _count(name, event):
+    with _lock:
+        counters = _stats.setdefault(name, {'not_modified': 0, 'served': 0, 'bypassed': 0})
+        counters[event] += 1
+
+
+def conditional_response(name, params=()):
+    """
+    Ajoute ETag et Last-Modified aux réponses 200 non dégradées d'une vue GET et répond 304
+    aux requêtes dont If-None-Match / If-Modified-Since correspondent encore.
+    params : paramètres GET lus par la vue (les mêmes que pour cache_response).
+    À placer au-dessus de cache_response : un 304 ne lit même pas le cache.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            config = get_conditional_get_settings()
+            if not config['enabled'] or request.method not in ('GET', 'HEAD'):
+                _count(name, 'bypassed')
+                return view(request, *args, **kwargs)
+
+            try:
+                etag = make_etag(name, request, params, kwargs)
+                last_modified = int(data_version.get_last_modified())
+            except Exception as e:
+                print(f"ETag indisponible pour {name}: {e}")
+                _count(name, 'bypassed')
+                return view(request, *args, **kwargs)
+
+            # 1. Le client a déjà cette version : 304 sans appeler la vue
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is not None:
+                _count(name, 'not_modified')
+                response['ETag'] = etag
+                patch_cache_control(response, max_age=int(config['max_age']))
+                return response
+
+            # 2. Sinon rendu normal, marqué pour la prochaine visite
+            _count(name, 'served')
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not degraded.is_degraded_response(response):
+                response['ETag'] = etag
+                response['Last-Modified'] = http_date(last_modified)
+                patch_cache_control(response, max_age=int(config['max_age']))
+            return response
+        return wrapper
+    return decorator
+
+
+def get_conditional_get_stats():
+    """Compteurs par page et part des requêtes conclues par un 304 (exposés par /api/test/)"""
+    with _lock:
+        stats = {name: dict(counters) for name, counters in _stats.items()}
+    for counters in stats.values():
+        handled = counters['not_modified'] + counters['served']
+        counters['not_modified_ratio'] = round(counters['not_modified'] / handled, 3) if handled else None
+    return stats
@@ -0,0 +1,213 @@
+"""
+Comptage des films filtrés (genre / années / note minimale) sans matérialiser la liste :
+réponse exacte depuis des comptes précalculés par facette, sinon comptage borné
+avec estimation « environ N » au-delà d'un seuil. Résultats mis en cache par filtres.
+"""
+import random
+import threading
+from collections import OrderedDict
+from django.conf import settings
+
+from . import sqlite_pool, sqlite_schema, movie_cards
+from .sqlite_service import build_movie_filters
+
+DEFAULT_COUNT_SETTINGS = {
+    'use_facets': True,         # Comptes précalculés (genre, année, note)
+    'exact_threshold': 10000,   # Au-delà, le comptage borné devient une estimation
+    'sample_size': 20000,       # Films échantillonnés pour l'estimation
+    'sample_windows': 8,        # Fenêtres de rowid (une par tranche du catalogue)
+    'cache_size': 512,          # Combinaisons de filtres gardées en cache
+}
+
+_lock = threading.Lock()
+_facets_lock = threading.Lock()
+_facets = None
+_cache = OrderedDict()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def get_count_settings():
+    """Paramètres du comptage (défauts + settings.MOVIE_COUNTS)"""
+    config = dict(DEFAULT_COUNT_SETTINGS)
+    config.update(getattr(settings, 'MOVIE_COUNTS', {}))
+    return config
+
+
+def normalize_filters(genre='', year_from='', year_to='', min_rating=''):
+    """Filtres tels que les applique build_movie_filters (valeurs invalides ignorées)"""
+    return (
+        genre or None,
+        int(year_from) if year_from and year_from.isdigit() else None,
+        int(year_to) if year_to and year_to.isdigit() else None,
+        float(min_rating) if min_rating and min_rating.replace('.', '', 1).isdigit() else None,
+    )
+
+
+def _sqlite_ge(value, bound):
+    """value >= bound selon SQLite (NULL faux, texte plus grand que tout nombre)"""
+    if value is None:
+        return False
+    if isinstance(value, str):
+        return True
+    return value >= bound
+
+
+def _sqlite_le(value, bound):
+    """value <= bound selon SQLite (NULL faux, texte plus grand que tout nombre)"""
+    if value is None:
+        return False
+    if isinstance(value, str):
+        return False
+    return value <= bound
+
+
+def build_facets(conn):
+    """
+    Comptes par (année, note) pour tous les films et par (genre, année, note),
+    en deux agrégations ; toute combinaison de filtres s'en déduit exactement
+    """
+    facets = {}
+    card_source = movie_cards.get_card_source()
+
+    cursor = conn.execute(f"""
+        SELECT c.year, c.rating, COUNT(*)
+        FROM {card_source} c
+        GROUP BY c.year, c.rating
+    """)
+    facets[None] = cursor.fetchall()
+
+    cursor = conn.execute(f"""
+        SELECT g.genre, c.year, c.rating, COUNT(*)
+        FROM genres g
+        JOIN {card_source} c ON c.mid = g.mid
+        GROUP BY g.genre, c.year, c.rating
+    """)
+    for genre, year, rating, count in cursor.fetchall():
+        facets.setdefault(genre, []).append((year, rating, count))
+
+    return facets
+
+
+def _get_facets(fingerprint):
+    """Comptes par facette de la version courante de la base (construits une fois)"""
+    global _facets
+    if _facets is not None and _facets[0] == fingerprint:
+        return _facets[1]
+
+    with _facets_lock:
+        if _facets is None or _facets[0] != fingerprint:
+            _facets = (fingerprint, build_facets(sqlite_pool.get_connection()))
+        return _facets[1]
+
+
+def count_from_facets(facets, genre, year_from, year_to, min_rating):
+    """Somme des comptes de facettes compatibles avec les filtres normalisés"""
+    total = 0
+    for year, rating, count in facets.get(genre, []):
+        if year_from is not None and not _sqlite_ge(year, year_from):
+            continue
+        if year_to is not None and not _sqlite_le(year, year_to):
+            continue
+        if min_rating is not None and not _sqlite_ge(rating, min_rating):
+            continue
+        total += count
+    return total
+
+
+def bounded_count(conn, genre, year_from, year_to, min_rating, config):
+    """Comptage exact jusqu'au seuil ; au-delà, estimation sur un échantillon de films"""
+    where_sql, params = build_movie_filters(genre, year_from, year_to, min_rating)
+    threshold = int(config['exact_threshold'])
+    card_source = movie_cards.get_card_source()
+
+    cursor = conn.execute(f"""
+        SELECT COUNT(*) FROM (
+            SELECT 1
+            FROM {card_source} c
+            WHERE 1=1{where_sql}
+            LIMIT ?
+        )
+    """, params + [threshold + 1])
+    count = cursor.fetchone()[0]
+    if count <= threshold:
+        return count, True
+
+    # Échantillon stratifié : une fenêtre de rowid tirée au hasard dans chaque
+    # tranche du catalogue. Chaque fenêtre se lit par plage sur la clé rowid
+    # de movies puis par clé primaire : le coût dépend de sample_size, pas
+    # de la taille du catalogue (MAX(rowid) est lu directement dans l'arbre)
+    max_rowid = conn.execute("SELECT MAX(rowid) FROM movies").fetchone()[0] or 0
+    windows = max(1, int(config['sample_windows']))
+    stratum = max(1, max_rowid // windows)
+    width = max(1, min(stratum, int(config['sample_size']) // windows))
+
+    matched = sampled = 0
+    for start in range(1, max_rowid + 1, stratum):
+        low = start + random.randint(0, max(0, min(stratum, max_rowid - start + 1) - width))
+        high = min(low + width - 1, max_rowid)
+        cursor = conn.execute(f"""
+            SELECT COUNT(*)
+            FROM {card_source} c
+            WHERE c.mid IN (SELECT mid FROM movies WHERE rowid BETWEEN ? AND ?){where_sql}
+        """, [low, high] + params)
+        matched += cursor.fetchone()[0]
+        sampled += high - low + 1
+    estimate = int(round(matched * max_rowid / max(sampled, 1), -2))
+
+    # L'estimation ne peut pas être inférieure à ce qui a déjà été compté
+    return max(estimate, count), False
+
+
+def format_count(count, exact):
+    """Libellé affichable : « 12 345 » ou « environ 12 300 »"""
+    label = f"{count:,}".replace(",", " ")
+    return label if exact else f"environ {label}"
+
+
+def get_movie_count(genre='', year_from='', year_to='', min_rating=''):
+    """
+    Nombre de films correspondant aux filtres de la liste :
+    {'count': int, 'exact': bool, 'display': str}
+    """
+    config = get_count_settings()
+    filters = normalize_filters(genre, year_from, year_to, min_rating)
+
+    try:
+        fingerprint = sqlite_schema.get_schema().fingerprint
+        key = (fingerprint, filters)
+
+        with _lock:
+            if key in _cache:
+                _cache.move_to_end(key)
+                _stats['hits'] += 1
+                return dict(_cache[key])
+            _stats['misses'] += 1
+
+        if config['use_facets']:
+            count = count_from_facets(_get_facets(fingerprint), *filters)
+            exact = True
+        else:
+            count, exact = bounded_count(sqlite_pool.get_connection(),
+                                         genre, year_from, year_to, min_rating, config)
+
+        result = {'count': count, 'exact': exact, 'display': format_count(count, exact)}
+
+        with _lock:
+            _cache[key] = result
+            while len(_cache) > int(config['cache_size']):
+                _cache.popitem(last=False)
+
+        return dict(result)
+
+    except Exception as e:
+        print(f"Erreur dans get_movie_count: {e}")
+        return {'count': 0, 'exact': False, 'display': '0', 'degraded': True}
+
+
+def get_count_stats():
+    """Compteurs du cache de comptage"""
+    with _lock:
+        stats = dict(_stats)
+        stats['cached_filters'] = len(_cache)
+        stats['facets_loaded'] = _facets is not None
+    return stats
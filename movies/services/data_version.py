@@ -0,0 +1,151 @@
+"""
+Version des données servies par le site
+
+Chaque import ou reconstruction (import SQLite, migrations MongoDB, import du
+replica set, tables dérivées) enregistre une nouvelle version : table meta de
+SQLite, document {_id: 'data_version'} de la collection meta de MongoDB. Les
+clés de cache et les ETag en dépendent, si bien qu'un cache peut garder ses
+entrées longtemps et rester juste dès la fin d'un import.
+
+La version vaut un horodatage en millisecondes (jamais inférieur à la
+précédente + 1) : elle reste croissante même si la base est recréée.
+"""
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+import pymongo
+from django.conf import settings
+
+from . import sqlite_pool, sqlite_schema, mongo_breaker, mongo_pool
+
+META_TABLE = 'meta'
+META_COLLECTION = 'meta'
+VERSION_KEY = 'data_version'
+
+DEFAULT_DATA_VERSION_SETTINGS = {
+    'sqlite_ttl': 5.0,          # Secondes avant de relire la table meta (fichier inchangé)
+    'mongo_ttl': 10.0,          # Secondes avant de relire le document meta de MongoDB
+    'mongo_timeout_ms': 300,    # Délai de la lecture MongoDB (le circuit s'ouvre au-delà)
+}
+
+_lock = threading.Lock()
+_mongo_lock = threading.Lock()
+_sqlite = {'fingerprint': None, 'read_at': 0.0, 'version': None, 'modified': None}
+_mongo = {'read_at': 0.0, 'version': None}
+
+
+def get_data_version_settings():
+    """Paramètres de lecture de la version (défauts + settings.DATA_VERSION)"""
+    config = dict(DEFAULT_DATA_VERSION_SETTINGS)
+    config.update(getattr(settings, 'DATA_VERSION', {}))
+    return config
+
+
+def _next_version(previous):
+    return max(int(previous or 0) + 1, int(time.time() * 1000))
+
+
+def bump_sqlite_version(conn, source):
+    """Enregistre une nouvelle version dans la table meta (à appeler en fin d'import)"""
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {META_TABLE} (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    row = conn.execute(f"SELECT value FROM {META_TABLE} WHERE key = ?", (VERSION_KEY,)).fetchone()
+    version = _next_version(row[0] if row else None)
+    conn.executemany(f"INSERT OR REPLACE INTO {META_TABLE} (key, value) VALUES (?, ?)", [
+        (VERSION_KEY, str(version)),
+        ('updated_at', datetime.now(timezone.utc).isoformat(timespec='seconds')),
+        ('updated_by', source),
+    ])
+    conn.commit()
+    _sqlite['fingerprint'] = None
+    return version
+
+
+def bump_mongo_version(db, source):
+    """Enregistre une nouvelle version dans la collection meta d'une base MongoDB"""
+    doc = db[META_COLLECTION].find_one({'_id': VERSION_KEY}) or {}
+    version = _next_version(doc.get('version'))
+    db[META_COLLECTION].update_one({'_id': VERSION_KEY}, {'$set': {
+        'version': version,
+        'updated_at': datetime.now(timezone.utc),
+        'updated_by': source,
+    }}, upsert=True)
+    _mongo['read_at'] = 0.0
+    return version
+
+
+def _read_sqlite_version(config):
+    """Version SQLite, relue quand le fichier change ou après sqlite_ttl secondes"""
+    fingerprint = sqlite_schema.get_schema().fingerprint
+    now = time.monotonic()
+    if fingerprint == _sqlite['fingerprint'] and now - _sqlite['read_at'] < float(config['sqlite_ttl']):
+        return _sqlite['version']
+
+    version = None
+    try:
+        row = sqlite_pool.get_connection().execute(
+            f"SELECT value FROM {META_TABLE} WHERE key = ?", (VERSION_KEY,)
+        ).fetchone()
+        version = row[0] if row else None
+    except sqlite3.OperationalError:
+        pass        # Pas encore de table meta
+    if version is None:
+        # Base importée sans version : l'empreinte du fichier en tient lieu
+        version = 'f' + '-'.join(str(part) for part in fingerprint)
+        modified = fingerprint[2] / 1e9     # st_mtime_ns
+    else:
+        modified = int(version) / 1000
+
+    with _lock:
+        _sqlite.update(fingerprint=fingerprint, read_at=now, version=version, modified=modified)
+    return version
+
+
+def _read_mongo_version(config):
+    """Version MongoDB, relue après mongo_ttl secondes ; la dernière connue si MongoDB ne répond pas"""
+    now = time.monotonic()
+    if now - _mongo['read_at'] < float(config['mongo_ttl']):
+        return _mongo['version']
+    # Une seule lecture à la fois : les autres gardent la valeur connue
+    if not _mongo_lock.acquire(blocking=False):
+        return _mongo['version']
+    try:
+        _mongo['read_at'] = now
+        if not mongo_breaker.allow_request():
+            return _mongo['version']
+        try:
+            with pymongo.timeout(float(config['mongo_timeout_ms']) / 1000):
+                doc = mongo_pool.get_database(route='primary')[META_COLLECTION].find_one({'_id': VERSION_KEY})
+            mongo_breaker.record_success()
+            _mongo['version'] = doc.get('version') if doc else None
+        except Exception as e:
+            mongo_breaker.record_error(e)
+        return _mongo['version']
+    finally:
+        _mongo_lock.release()
+
+
+def get_data_version():
+    """Version courante des données, ex. '1760700000000.1760700450000' (SQLite.MongoDB)"""
+    config = get_data_version_settings()
+    return f"{_read_sqlite_version(config)}.{_read_mongo_version(config) or 0}"
+
+
+def get_last_modified():
+    """Date (secondes depuis l'epoch) de la version courante, pour l'en-tête Last-Modified"""
+    config = get_data_version_settings()
+    _read_sqlite_version(config)
+    mongo = _read_mongo_version(config)
+    stamps = [_sqlite['modified']]
+    if isinstance(mongo, int):
+        stamps.append(mongo / 1000)
+    return max(stamp for stamp in stamps if stamp is not None)
+
+
+def get_data_version_info():
+    """Versions connues par source (exposées par /api/test/)"""
+    return {
+        'version': get_data_version(),
+        'sqlite': _sqlite['version'],
+        'mongo': _mongo['version'],
+    }
@@ -0,0 +1,35 @@
+"""
+Résultats dégradés des services (erreur, délai dépassé, valeurs de secours)
+
+Un service qui ne peut pas répondre renvoie une valeur de secours marquée :
+liste DegradedList, ou dictionnaire contenant 'degraded' (ou 'error'). La
+vue qui l'affiche marque sa réponse (mark_response) : cache_response ne la
+garde pas et conditional_response ne lui donne pas d'ETag, si bien que la
+visite suivante redemande les données au lieu de revoir la page de secours.
+"""
+
+
+class DegradedList(list):
+    """Liste de secours (vide ou données de démonstration)"""
+    degraded = True
+
+
+def is_degraded(*results):
+    """Vrai si l'un des résultats de service est une valeur de secours"""
+    for result in results:
+        if getattr(result, 'degraded', False):
+            return True
+        if isinstance(result, dict) and (result.get('degraded') or 'error' in result):
+            return True
+    return False
+
+
+def mark_response(response, *results):
+    """Marque la réponse si l'un des résultats est dégradé ; retourne la réponse"""
+    if is_degraded(*results):
+        response.degraded = True
+    return response
+
+
+def is_degraded_response(response):
+    return bool(getattr(response, 'degraded', False))
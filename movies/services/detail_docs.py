@@ -0,0 +1,131 @@
+"""
+Détail des films précalculé (table movie_detail_doc)
+
+Une ligne par film : le dictionnaire exact de load_movie_details (film,
+genres, réalisateurs, scénaristes, casting avec personnages, titres),
+sérialisé en JSON et compressé (zlib). La page détail lit une ligne par clé
+primaire et la décompresse au lieu de joindre huit tables.
+Construction en parallèle (un processus par cœur, chacun avec sa connexion
+en lecture seule), écrite dans une table temporaire puis renommée.
+Construite par python manage.py build_movie_detail_docs (après chaque import)
+"""
+import json
+import os
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+
+from . import sqlite_pool, data_version
+
+TABLE = 'movie_detail_doc'
+
+DEFAULT_DETAIL_DOC_SETTINGS = {
+    'workers': None,        # Processus de construction (None : un par cœur)
+    'chunk_size': 500,      # Films par tâche envoyée à un processus
+    'compress_level': 6,    # Niveau zlib (1 : rapide, 9 : compact)
+}
+
+
+def get_detail_doc_settings():
+    """Paramètres de construction (défauts + settings.MOVIE_DETAIL_DOCS)"""
+    config = dict(DEFAULT_DETAIL_DOC_SETTINGS)
+    config.update(getattr(settings, 'MOVIE_DETAIL_DOCS', {}))
+    return config
+
+
+def encode_doc(movie, level=6):
+    return zlib.compress(json.dumps(movie, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), level)
+
+
+def decode_doc(blob):
+    return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+
+def _init_worker():
+    """Processus lancé sans fork (spawn) : Django doit être initialisé"""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def _encode_chunk(movie_ids, level):
+    """Tâche d'un processus : [(mid, blob)] pour un lot de films"""
+    from .sqlite_service import load_movie_details
+    conn = sqlite_pool.get_connection()
+    rows = []
+    for mid in movie_ids:
+        movie = load_movie_details(conn, mid)
+        if movie is not None:
+            rows.append((mid, encode_doc(movie, level)))
+    return rows
+
+
+def _encoded_chunks(chunks, config):
+    """Lots encodés dans l'ordre, au plus deux lots en attente par processus"""
+    level = int(config['compress_level'])
+    workers = int(config['workers'] or os.cpu_count() or 1)
+    if workers <= 1:
+        for chunk in chunks:
+            yield _encode_chunk(chunk, level)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_encode_chunk, chunk, level))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def build_detail_docs(conn, config=None):
+    """(Re)crée movie_detail_doc ; retourne le nombre de films"""
+    config = config or get_detail_doc_settings()
+    chunk_size = int(config['chunk_size'])
+    staging = f"{TABLE}_build"
+
+    movie_ids = [row[0] for row in conn.execute("SELECT mid FROM movies ORDER BY rowid")]
+    chunks = [movie_ids[i:i + chunk_size] for i in range(0, len(movie_ids), chunk_size)]
+
+    conn.execute(f"DROP TABLE IF EXISTS {staging}")
+    conn.execute(f"CREATE TABLE {staging} (mid TEXT PRIMARY KEY, blob BLOB NOT NULL)")
+    conn.commit()
+
+    # Une transaction courte par lot : les processus lecteurs ne restent jamais bloqués
+    total = 0
+    for rows in _encoded_chunks(chunks, config):
+        conn.executemany(f"INSERT INTO {staging} (mid, blob) VALUES (?, ?)", rows)
+        conn.commit()
+        total += len(rows)
+
+    conn.execute("BEGIN")
+    try:
+        conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        conn.execute(f"ALTER TABLE {staging} RENAME TO {TABLE}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return total
+
+
+def rebuild_detail_docs(config=None):
+    """Recalcule la table sur une connexion en écriture (après chaque import)"""
+    conn = sqlite_pool.open_writable_connection()
+    try:
+        total = build_detail_docs(conn, config)
+        data_version.bump_sqlite_version(conn, 'build_movie_detail_docs')
+        return total
+    finally:
+        conn.close()
+
+
+def fetch_detail(conn, movie_id):
+    """Détail précalculé d'un film (une lecture sur la clé primaire), None s'il est absent"""
+    row = conn.execute(f"SELECT blob FROM {TABLE} WHERE mid = ?", (movie_id,)).fetchone()
+    if row is None:
+        return None
+    return decode_doc(row[0])
@@ -0,0 +1,145 @@
+"""
+Assemblage concurrent de la page détail d'un film
+
+Si movie_detail_doc existe, le document précalculé du film suffit (une
+lecture SQLite). Sinon le film est demandé à MongoDB et, si MongoDB n'a pas
+répondu (avec un casting) après un court délai, à SQLite en parallèle
+(requête « couverte ») ; les films similaires sont lus en même temps. La
+page attend donc l'appel le plus lent utile, pas la somme des appels.
+MongoDB a son propre pool de threads : s'il ralentit, ses appels bloqués
+n'occupent pas les threads des requêtes couvertes SQLite.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from django.conf import settings
+
+from . import sqlite_service, mongo_service, sqlite_schema, detail_docs, degraded
+
+DEFAULT_DETAIL_SETTINGS = {
+    'max_workers': 8,       # Threads SQLite (requêtes couvertes, films similaires) partagés par les pages
+    'mongo_workers': 8,     # Threads MongoDB (pool séparé)
+    'hedge_delay': 0.15,    # Secondes accordées à MongoDB avant de lancer SQLite
+    'timeout': 10.0,        # Attente maximale d'une source (secondes)
+    'similar_limit': 4,
+    'precomputed': True,    # Lire movie_detail_doc avant MongoDB quand la table existe
+}
+
+_lock = threading.Lock()
+_executors = {}
+
+
+def get_detail_settings():
+    """Paramètres de la page détail (défauts + settings.MOVIE_DETAIL)"""
+    config = dict(DEFAULT_DETAIL_SETTINGS)
+    config.update(getattr(settings, 'MOVIE_DETAIL', {}))
+    return config
+
+
+def get_executor(pool='sqlite'):
+    """Pool de threads partagé, 'sqlite' ou 'mongo' (créé au premier appel)"""
+    executor = _executors.get(pool)
+    if executor is None:
+        with _lock:
+            executor = _executors.get(pool)
+            if executor is None:
+                setting = 'mongo_workers' if pool == 'mongo' else 'max_workers'
+                executor = ThreadPoolExecutor(
+                    max_workers=int(get_detail_settings()[setting]),
+                    thread_name_prefix=f'movie-detail-{pool}'
+                )
+                _executors[pool] = executor
+    return executor
+
+
+def _timed(fn, *args, **kwargs):
+    """Appel chronométré : (résultat, durée en ms), l'exception remplacée par None"""
+    t0 = time.perf_counter()
+    try:
+        result = fn(*args, **kwargs)
+    except Exception as e:
+        print(f"Erreur dans {fn.__name__}: {e}")
+        result = None
+    return result, (time.perf_counter() - t0) * 1000
+
+
+def _has_cast(movie):
+    return bool(movie and movie.get('cast'))
+
+
+def _precomputed_movie(movie_id):
+    """Document de movie_detail_doc, None si la table (ou la base) est absente"""
+    if not sqlite_schema.get_schema().has_table(detail_docs.TABLE):
+        return None
+    return sqlite_service.get_precomputed_movie(movie_id)
+
+
+def load_movie_detail(movie_id):
+    """
+    Film, source et films similaires : {'movie', 'source', 'similar_movies', 'timings', 'degraded'}
+    movie vaut None si aucune source ne connaît le film ; degraded est vrai si une
+    source a dépassé le délai sans qu'un casting soit trouvé ou si les films
+    similaires manquent (la page ne doit alors pas être mise en cache).
+    """
+    config = get_detail_settings()
+    executor = get_executor()
+    timeout = float(config['timeout'])
+    limit = int(config['similar_limit'])
+    timings = {}
+    timed_out = False
+
+    # 1. Films similaires (précalculés, ou heuristique sur les genres et réalisateurs
+    #    que le chargeur lit lui-même), lus pendant que l'on cherche le film
+    similar_future = executor.submit(_timed, sqlite_service.get_similar_movies_sqlite, movie_id, limit=limit)
+
+    # 2. Document précalculé (build_movie_detail_docs) : une lecture suffit.
+    #    Base illisible ou table absente : pas de document, MongoDB prend le relais
+    results = {}
+    if config['precomputed']:
+        results['SQLite'], timings['SQLite'] = _timed(_precomputed_movie, movie_id)
+
+    deadline = time.monotonic() + timeout
+    if not _has_cast(results.get('SQLite')):
+        # 3. Source principale, puis requête couverte : SQLite si MongoDB n'a pas de casting après hedge_delay
+        #    (assemblage depuis les tables si le document précalculé vient d'être lu)
+        futures = {get_executor('mongo').submit(_timed, mongo_service.get_complete_movie_with_characters, movie_id): 'MongoDB'}
+        done, _ = wait(futures, timeout=float(config['hedge_delay']))
+        if not any(_has_cast(future.result()[0]) for future in done):
+            futures[executor.submit(_timed, sqlite_service.get_movie_with_characters, movie_id,
+                                    precomputed='SQLite' not in results)] = 'SQLite'
+
+        # 4. Première réponse avec casting ; sinon tout film trouvé (MongoDB d'abord)
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=max(0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                print(f"Délai dépassé pour {movie_id} : {', '.join(futures[f] for f in pending)}")
+                timed_out = True
+                break
+            for future in done:
+                source = futures[future]
+                results[source], timings[source] = future.result()
+            if any(_has_cast(movie) for movie in results.values()):
+                break
+
+    movie, source = None, None
+    for name in sorted(results, key=lambda name: (not _has_cast(results[name]), name != 'MongoDB')):
+        if results[name]:
+            movie, source = results[name], name
+            break
+
+    # 5. Films similaires, lancés à l'étape 1
+    similar_movies = None
+    try:
+        similar_movies, timings['similar'] = similar_future.result(timeout=max(0, deadline - time.monotonic()))
+    except Exception as e:
+        print(f"Films similaires indisponibles pour {movie_id}: {e}")
+
+    return {
+        'movie': movie,
+        'source': source,
+        'similar_movies': similar_movies or [],
+        'timings': timings,
+        'degraded': (timed_out and not _has_cast(movie)) or similar_movies is None
+                    or degraded.is_degraded(similar_movies),
+    }
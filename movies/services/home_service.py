@@ -5,17 +5,13 @@ import sqlite3
 from pathlib import Path
 from django.conf import settings
 import random
+import copy
+
+from . import sqlite_pool, sqlite_schema, stats_snapshot, random_sampler, search_index, person_summary, movie_cards, service_cache, degraded
 
 def get_sqlite_connection():
-    """Établit une connexion à la base SQLite"""
-    db_path = Path(settings.BASE_DIR) / "data" / "imdb.db"
-    
-    if not db_path.exists():
-        raise FileNotFoundError(f"Base SQLite non trouvée : {db_path}")
-    
-    conn = sqlite3.connect(str(db_path))
-    conn.row_factory = sqlite3.Row  # Retourne des dictionnaires
-    return conn
+    """Connexion SQLite (lecture seule) issue du pool du thread courant"""
+    return sqlite_pool.get_connection()
 
 def search_persons(query, limit=20):
     """Recherche de personnes - Version ultra-robuste"""
@@ -23,81 +19,23 @@ def search_persons(query, limit=20):
         conn = get_sqlite_connection()
         cursor = conn.cursor()
         
-        # D'abord, voir quelles colonnes existent
-        cursor.execute("PRAGMA table_info(persons)")
-        columns = [col[1] for col in cursor.fetchall()]
-        print(f"Colonnes disponibles dans persons: {columns}")
-        
-        # Construire la requête dynamiquement
-        if 'primaryName' in columns:
-            select_fields = "pid as id, primaryName as name"
-            where_field = "primaryName"
-        elif 'name' in columns:
-            select_fields = "pid as id, name"
-            where_field = "name"
-        else:
-            # Prendre la première colonne de texte disponible
-            select_fields = "pid as id"
-            where_field = columns[1] if len(columns) > 1 else columns[0]
+        # Index plein texte s'il a été construit (build_search_index) et que la saisie contient des mots
+        schema = sqlite_schema.get_schema()
+        if schema.has_table('persons_fts') and search_index.to_fts_query(query):
+            return search_index.search_persons(conn, query, limit,
+                                               has_summary=schema.has_table('person_summary'))
         
-        # Ajouter les années si elles existent
-        if 'birthYear' in columns:
-            select_fields += ", birthYear"
-        if 'deathYear' in columns:
-            select_fields += ", deathYear"
-        
-        sql = f"""
-            SELECT {select_fields}
-            FROM persons
-            WHERE {where_field} LIKE ?
-            LIMIT ?
-        """
+        # Sinon requête LIKE précompilée d'après le schéma (pas d'introspection ici)
+        sql = schema.person_search_sql
+        if not sql:
+            raise sqlite3.OperationalError("table persons introuvable")
         
         cursor.execute(sql, (f'%{query}%', limit))
-        
-        persons = []
-        for row in cursor.fetchall():
-            person = dict(row)
-            pid = person['id']
-            
-            # Déterminer la profession depuis principals
-            try:
-                cursor.execute("""
-                    SELECT DISTINCT category 
-                    FROM principals 
-                    WHERE pid = ?
-                    LIMIT 1
-                """, (pid,))
-                category_row = cursor.fetchone()
-                
-                if category_row:
-                    category = category_row[0]
-                    category_map = {
-                        'actor': 'Acteur',
-                        'actress': 'Actrice',
-                        'director': 'Réalisateur',
-                        'writer': 'Scénariste'
-                    }
-                    person['category'] = category_map.get(category, category)
-                    person['main_role'] = category_map.get(category, category)
-                else:
-                    person['category'] = 'Personne'
-                    person['main_role'] = 'Personne'
-            except:
-                person['category'] = 'Personne'
-                person['main_role'] = 'Personne'
-            
-            # Compter les films
-            try:
-                cursor.execute("SELECT COUNT(DISTINCT mid) FROM principals WHERE pid = ?", (pid,))
-                person['movie_count'] = cursor.fetchone()[0] or 0
-            except:
-                person['movie_count'] = 0
-            
-            # Type pour la recherche
-            person['type'] = 'person'
-            
-            persons.append(person)
+        rows = [dict(row) for row in cursor.fetchall()]
+        if schema.person_search_has_summary:
+            persons = [person_summary.apply_summary(person) for person in rows]
+        else:
+            persons = [search_index.describe_person(cursor, person) for person in rows]
         
         conn.close()
         return persons
@@ -105,7 +43,7 @@ def search_persons(query, limit=20):
     except Exception as e:
         print(f"ERREUR CRITIQUE dans search_persons: {e}")
         # Retourner des données fictives pour le test
-        return [
+        return degraded.DegradedList([
             {
                 'id': 'nm0000138',
                 'name': 'Leonardo DiCaprio',
@@ -122,7 +60,7 @@ def search_persons(query, limit=20):
                 'movie_count': 120,
                 'type': 'person'
             }
-        ]
+        ])
 
 def search_movies(query, limit=20):
     """Recherche de films par titre - Version robuste"""
@@ -130,59 +68,29 @@ def search_movies(query, limit=20):
         conn = get_sqlite_connection()
         cursor = conn.cursor()
         
-        # Voir quelles colonnes existent
-        cursor.execute("PRAGMA table_info(movies)")
-        columns = [col[1] for col in cursor.fetchall()]
-        
-        # Construire la requête
-        title_fields = []
-        if 'primaryTitle' in columns:
-            title_fields.append("primaryTitle")
-        if 'originalTitle' in columns:
-            title_fields.append("originalTitle")
-        if 'title' in columns:
-            title_fields.append("title")
+        # Index plein texte s'il a été construit (build_search_index) et que la saisie contient des mots
+        schema = sqlite_schema.get_schema()
+        if schema.has_table('movies_fts') and search_index.to_fts_query(query):
+            return search_index.search_movies(conn, query, limit,
+                                              has_titles=schema.has_table('titles_fts'))
         
-        if not title_fields:
+        # Sinon requête LIKE précompilée d'après le schéma (pas d'introspection ici)
+        if not schema.movie_search_sql:
             return []
         
-        # Construire la clause WHERE
-        where_clauses = [f"{field} LIKE ?" for field in title_fields]
-        where_sql = " OR ".join(where_clauses)
-        params = [f'%{query}%' for _ in title_fields] + [limit]
+        params = [f'%{query}%'] * schema.movie_search_fields + [limit]
+        cursor.execute(schema.movie_search_sql, params)
         
-        sql = f"""
-            SELECT 
-                mid as id,
-                {title_fields[0]} as title,
-                startYear as year,
-                titleType
-            FROM movies
-            WHERE {where_sql}
-            LIMIT ?
-        """
+        rows = [dict(row) for row in cursor.fetchall()]
         
-        cursor.execute(sql, params)
+        # Note et genres de tous les films trouvés en une lecture des cartes
+        cards = movie_cards.fetch_cards(conn, [movie['id'] for movie in rows])
         
         results = []
-        for row in cursor.fetchall():
-            movie = dict(row)
-            movie_id = movie['id']
-            
-            # Ajouter la note si disponible
-            try:
-                cursor.execute("SELECT averageRating FROM ratings WHERE mid = ?", (movie_id,))
-                rating_row = cursor.fetchone()
-                movie['rating'] = rating_row[0] if rating_row else None
-            except:
-                movie['rating'] = None
-            
-            # Ajouter les genres
-            try:
-                cursor.execute("SELECT genre FROM genres WHERE mid = ?", (movie_id,))
-                movie['genres'] = [row[0] for row in cursor.fetchall() if row[0]]
-            except:
-                movie['genres'] = []
+        for movie in rows:
+            card = cards.get(movie['id'], {})
+            movie['rating'] = card.get('rating')
+            movie['genres'] = card.get('genres', [])
             
             # Type pour la recherche
             movie['type'] = 'movie'
@@ -195,7 +103,7 @@ def search_movies(query, limit=20):
     except Exception as e:
         print(f"ERREUR dans search_movies: {e}")
         # Données fictives pour le test
-        return [
+        return degraded.DegradedList([
             {
                 'id': 'tt0111161',
                 'title': 'The Shawshank Redemption',
@@ -212,7 +120,7 @@ def search_movies(query, limit=20):
                 'genres': ['Crime', 'Drama'],
                 'type': 'movie'
             }
-        ]
+        ])
 
 def search_all(query, limit_per_type=10):
     """Recherche combinée films et personnes"""
@@ -230,225 +138,116 @@ def search_all(query, limit_per_type=10):
 
 # Autres fonctions nécessaires
 def get_movie_stats():
-    """Statistiques de base"""
+    """Statistiques de base (instantané stats_snapshot)"""
     try:
-        conn = get_sqlite_connection()
-        cursor = conn.cursor()
+        snapshot = stats_snapshot.get_snapshot()
         
-        stats = {}
-        
-        # Nombre de films
-        cursor.execute("SELECT COUNT(*) FROM movies")
-        stats['total_movies'] = cursor.fetchone()[0]
-        
-        # Nombre de personnes
-        cursor.execute("SELECT COUNT(*) FROM persons")
-        stats['total_persons'] = cursor.fetchone()[0]
-        
-        # Meilleur film
-        try:
-            cursor.execute("""
-                SELECT m.mid, m.primaryTitle, r.averageRating 
-                FROM movies m
-                JOIN ratings r ON m.mid = r.mid
-                ORDER BY r.averageRating DESC
-                LIMIT 1
-            """)
-            best = cursor.fetchone()
-            stats['best_movie'] = {
-                'id': best[0] if best else None,
-                'title': best[1] if best else 'N/A',
-                'rating': float(best[2]) if best and best[2] else 0
-            }
-        except:
-            stats['best_movie'] = {'title': 'N/A', 'rating': 0}
-        
-        conn.close()
-        return stats
+        return {
+            'total_movies': snapshot['total_movies'],
+            'total_persons': snapshot['total_persons'],
+            'best_movie': dict(snapshot['best_movie'])
+        }
         
     except Exception as e:
         print(f"Erreur get_movie_stats: {e}")
         return {
             'total_movies': 36859,
             'total_persons': 145847,
-            'best_movie': {'title': 'The Shawshank Redemption', 'rating': 9.3}
+            'best_movie': {'title': 'The Shawshank Redemption', 'rating': 9.3},
+            'degraded': True
         }
 
 def get_home_stats():
     """Statistiques pour la page d'accueil"""
-    stats = {}
-    
-    # Stats SQLite
-    stats['total_movies'] = 36859  # Valeur par défaut
-    stats['total_persons'] = 145847  # Valeur par défaut
-    
+    # Stats SQLite et top 10 : partie en cache (les valeurs de secours n'y entrent pas)
     try:
-        conn = get_sqlite_connection()
-        cursor = conn.cursor()
-        
-        # Nombre total de films
-        cursor.execute("SELECT COUNT(*) FROM movies")
-        stats['total_movies'] = cursor.fetchone()[0]
-        
-        # Nombre total de personnes
-        cursor.execute("SELECT COUNT(*) FROM persons")
-        stats['total_persons'] = cursor.fetchone()[0]
-        
-        # Film le mieux noté
-        try:
-            cursor.execute("""
-                SELECT m.mid, m.primaryTitle, r.averageRating 
-                FROM movies m
-                JOIN ratings r ON m.mid = r.mid
-                WHERE r.averageRating IS NOT NULL
-                ORDER BY r.averageRating DESC
-                LIMIT 1
-            """)
-            best_movie = cursor.fetchone()
-            stats['best_movie'] = {
-                'id': best_movie[0] if best_movie else None,
-                'title': best_movie[1] if best_movie else 'N/A',
-                'rating': float(best_movie[2]) if best_movie and best_movie[2] else 0
-            }
-        except:
-            stats['best_movie'] = {'title': 'The Shawshank Redemption', 'rating': 9.3}
-        
-        # Nombre de genres différents
-        try:
-            cursor.execute("SELECT COUNT(DISTINCT genre) FROM genres")
-            stats['total_genres'] = cursor.fetchone()[0]
-        except:
-            stats['total_genres'] = 28
-        
-        # Année du film le plus récent
-        try:
-            cursor.execute("SELECT MAX(startYear) FROM movies WHERE startYear IS NOT NULL")
-            stats['latest_year'] = cursor.fetchone()[0] or 2024
-        except:
-            stats['latest_year'] = 2024
-        
-        # Nombre de films par type
-        try:
-            cursor.execute("SELECT titleType, COUNT(*) as count FROM movies GROUP BY titleType ORDER BY count DESC")
-            stats['movies_by_type'] = [{'type': row[0], 'count': row[1]} for row in cursor.fetchall()]
-        except:
-            stats['movies_by_type'] = [{'type': 'movie', 'count': 28000}]
-        
-        conn.close()
-        
+        stats = _load_home_stats()
     except Exception as e:
         print(f"Erreur dans get_home_stats: {e}")
         # Valeurs par défaut
-        stats.update({
+        stats = {
             'total_movies': 36859,
             'total_persons': 145847,
             'best_movie': {'title': 'The Shawshank Redemption', 'rating': 9.3},
             'total_genres': 28,
             'latest_year': 2024,
-            'movies_by_type': [{'type': 'movie', 'count': 28000}]
-        })
+            'movies_by_type': [{'type': 'movie', 'count': 28000}],
+            'top_movies': get_top_rated_movies(limit=10),
+            'degraded': True
+        }
     
     # Stats MongoDB si disponible
-    try:
-        from . import mongo_service
-        mongo_stats = mongo_service.get_mongo_stats()
-        if mongo_stats.get('replica_status') in ['ok', 'standalone']:
-            stats['mongo_available'] = True
-            stats['mongo_movies'] = mongo_stats.get('total_movies', 0)
-        else:
-            stats['mongo_available'] = False
-            stats['mongo_movies'] = 0
-    except:
-        stats['mongo_available'] = False
-        stats['mongo_movies'] = 0
-    
-    # Top 10 films
-    stats['top_movies'] = get_top_rated_movies(limit=10)
+    stats.update(_load_mongo_home_stats())
     
-    # Films aléatoires
+    # Films aléatoires : nouveau tirage à chaque appel, hors cache
     stats['random_movies'] = get_random_movies(limit=6)
+    if degraded.is_degraded(stats['random_movies']):
+        stats['degraded'] = True
     
     return stats
 
+@service_cache.cached('home_stats', ttl=30)
+def _load_home_stats():
+    """Stats SQLite (une lecture de l'instantané) et top 10 ; lève une exception en cas d'erreur"""
+    snapshot = stats_snapshot.get_snapshot()
+    return {
+        'total_movies': snapshot['total_movies'],
+        'total_persons': snapshot['total_persons'],
+        'best_movie': dict(snapshot['best_movie']),
+        'total_genres': snapshot['total_genres'],
+        'latest_year': snapshot['latest_year'] or 2024,
+        'movies_by_type': copy.deepcopy(snapshot['movies_by_type']),
+        'top_movies': _load_top_rated_movies(10),
+    }
+
+@service_cache.cached('home_mongo_stats', ttl=30, cache_if=lambda stats: stats['mongo_available'])
+def _load_mongo_home_stats():
+    """Disponibilité de MongoDB ; seul un MongoDB disponible est gardé en cache"""
+    try:
+        from . import mongo_service
+        mongo_stats = mongo_service.get_mongo_stats()
+        if mongo_stats.get('replica_status') in ['ok', 'standalone']:
+            return {'mongo_available': True, 'mongo_movies': mongo_stats.get('total_movies', 0)}
+    except Exception as e:
+        print(f"MongoDB indisponible pour l'accueil: {e}")
+    return {'mongo_available': False, 'mongo_movies': 0}
+
 def get_top_rated_movies(limit=10):
     """Top N films les mieux notés"""
     try:
-        conn = get_sqlite_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                m.mid as id,
-                m.primaryTitle as title,
-                m.startYear as year,
-                r.averageRating as rating,
-                r.numVotes as votes
-            FROM movies m
-            JOIN ratings r ON m.mid = r.mid
-            WHERE m.titleType = 'movie'
-              AND r.numVotes > 1000
-              AND m.startYear IS NOT NULL
-            ORDER BY r.averageRating DESC, r.numVotes DESC
-            LIMIT ?
-        """, (limit,))
-        
-        movies = []
-        for row in cursor.fetchall():
-            movies.append({
-                'id': row['id'],
-                'title': row['title'],
-                'year': row['year'],
-                'rating': row['rating'],
-                'votes': row['votes']
-            })
-        
-        conn.close()
-        return movies
+        return _load_top_rated_movies(limit)
         
     except Exception as e:
         print(f"Erreur dans get_top_rated_movies: {e}")
         # Données de démonstration
-        return [
+        return degraded.DegradedList([
             {'id': 'tt0111161', 'title': 'The Shawshank Redemption', 'year': 1994, 'rating': 9.3, 'votes': 2500000},
             {'id': 'tt0068646', 'title': 'The Godfather', 'year': 1972, 'rating': 9.2, 'votes': 1750000},
             {'id': 'tt0071562', 'title': 'The Godfather: Part II', 'year': 1974, 'rating': 9.0, 'votes': 1200000},
             {'id': 'tt0468569', 'title': 'The Dark Knight', 'year': 2008, 'rating': 9.0, 'votes': 2500000},
             {'id': 'tt0050083', 'title': '12 Angry Men', 'year': 1957, 'rating': 9.0, 'votes': 750000}
-        ][:limit]
+        ][:limit])
+
+@service_cache.cached('top_rated_movies', ttl=600)
+def _load_top_rated_movies(limit):
+    """Top N depuis SQLite ; lève une exception en cas d'erreur (servie périmée par le cache)"""
+    # Les premiers du classement sont dans l'instantané des statistiques
+    if limit <= stats_snapshot.TOP_RATED_SIZE:
+        return copy.deepcopy(stats_snapshot.get_snapshot()['top_rated_movies'][:limit])
+    
+    conn = get_sqlite_connection()
+    movies = movie_cards.fetch_top_rated(conn, limit)
+    conn.close()
+    return movies
 
 def get_random_movies(limit=6):
-    """Films aléatoires pour l'accueil"""
+    """Films aléatoires pour l'accueil (tirage uniforme en O(limit))"""
     try:
-        conn = get_sqlite_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                m.mid as id,
-                m.primaryTitle as title,
-                m.startYear as year,
-                r.averageRating as rating
-            FROM movies m
-            LEFT JOIN ratings r ON m.mid = r.mid
-            WHERE m.titleType = 'movie'
-              AND m.startYear IS NOT NULL
-              AND m.startYear > 2000
-            ORDER BY RANDOM()
-            LIMIT ?
-        """, (limit,))
-        
-        movies = []
-        for row in cursor.fetchall():
-            movies.append({
-                'id': row['id'],
-                'title': row['title'],
-                'year': row['year'],
-                'rating': row['rating'] or 0
-            })
-        
-        conn.close()
+        movies = random_sampler.sample_movies('recent_movies', limit)
+        for movie in movies:
+            movie['rating'] = movie['rating'] or 0
         return movies
         
     except Exception as e:
         print(f"Erreur dans get_random_movies: {e}")
-        return []
\ No newline at end of file
+        return degraded.DegradedList()
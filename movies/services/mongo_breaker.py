@@ -0,0 +1,155 @@
+"""
+Disjoncteur (circuit breaker) de MongoDB pour tout le processus
+
+Fermé : les appels passent. Après failure_threshold erreurs de connexion
+consécutives il s'ouvre : les vues sautent MongoDB immédiatement au lieu
+d'attendre serverSelectionTimeoutMS. Une sonde en arrière-plan (ping avec un
+délai court) le passe en semi-ouvert dès que MongoDB répond ; le premier
+appel réel qui réussit le referme, un échec le rouvre.
+"""
+import threading
+import time
+from django.conf import settings
+from pymongo.errors import ConnectionFailure
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+DEFAULT_BREAKER_SETTINGS = {
+    'failure_threshold': 1,     # Chaque erreur a déjà attendu serverSelectionTimeoutMS
+    'probe_interval': 5.0,      # Secondes entre deux sondes quand le circuit est ouvert
+    'probe_timeout_ms': 500,    # Délai de sélection du serveur pour la sonde
+}
+
+_lock = threading.Lock()
+_state = {
+    'state': CLOSED,
+    'failures': 0,
+    'opened_at': None,
+    'last_error': None,
+    'trial_in_flight': False,
+}
+_stats = {'rejected': 0, 'opened': 0, 'probes': 0, 'probe_failures': 0}
+_probe = None
+_prober = None
+
+
+def get_breaker_settings():
+    """Paramètres du disjoncteur (défauts + settings.MONGO_CIRCUIT)"""
+    config = dict(DEFAULT_BREAKER_SETTINGS)
+    config.update(getattr(settings, 'MONGO_CIRCUIT', {}))
+    return config
+
+
+def register_probe(probe):
+    """Fonction de sonde probe(timeout_ms) qui lève une exception si MongoDB ne répond pas"""
+    global _probe
+    _probe = probe
+
+
+def allow_request():
+    """
+    True si l'appel peut partir vers MongoDB. En semi-ouvert, un seul appel
+    d'essai passe à la fois ; les autres sont refusés comme en ouvert.
+    """
+    with _lock:
+        if _state['state'] == CLOSED:
+            return True
+        if _state['state'] == HALF_OPEN and not _state['trial_in_flight']:
+            _state['trial_in_flight'] = True
+            return True
+        _stats['rejected'] += 1
+        return False
+
+
+def record_success():
+    """Appel réussi : le circuit se referme"""
+    with _lock:
+        if _state['state'] != CLOSED:
+            print("MongoDB disponible : circuit refermé")
+        _state.update(state=CLOSED, failures=0, opened_at=None, trial_in_flight=False)
+
+
+def record_error(error):
+    """
+    Erreur d'un appel : seules les erreurs de connexion (serveur injoignable,
+    délai dépassé) comptent ; une erreur de requête ne dit rien de la disponibilité
+    """
+    if not isinstance(error, ConnectionFailure):
+        with _lock:
+            _state['trial_in_flight'] = False
+        return
+
+    config = get_breaker_settings()
+    with _lock:
+        _state['failures'] += 1
+        _state['last_error'] = str(error)[:200]
+        _state['trial_in_flight'] = False
+        if _state['state'] == HALF_OPEN or _state['failures'] >= int(config['failure_threshold']):
+            _open()
+
+
+def _open():
+    """Ouvre le circuit et démarre la sonde (appelé avec _lock)"""
+    global _prober
+    if _state['state'] != OPEN:
+        print(f"MongoDB indisponible : circuit ouvert ({_state['last_error']})")
+        _stats['opened'] += 1
+    _state['state'] = OPEN
+    _state['opened_at'] = time.time()
+
+    if _prober is None or not _prober.is_alive():
+        _prober = threading.Thread(target=_probe_loop, name='mongo-prober', daemon=True)
+        _prober.start()
+
+
+def _probe_loop():
+    """Sonde MongoDB tant que le circuit est ouvert ; passe en semi-ouvert dès qu'il répond"""
+    config = get_breaker_settings()
+    while True:
+        time.sleep(float(config['probe_interval']))
+        with _lock:
+            if _state['state'] != OPEN:
+                return
+            _stats['probes'] += 1
+
+        try:
+            if _probe is None:
+                raise ConnectionFailure("aucune sonde enregistrée")
+            _probe(int(config['probe_timeout_ms']))
+        except Exception as e:
+            with _lock:
+                _stats['probe_failures'] += 1
+                _state['last_error'] = str(e)[:200]
+            continue
+
+        with _lock:
+            if _state['state'] == OPEN:
+                _state.update(state=HALF_OPEN, trial_in_flight=False)
+                print("MongoDB répond à la sonde : circuit semi-ouvert")
+        return
+
+
+def is_open():
+    """True si les appels vers MongoDB sont actuellement court-circuités"""
+    with _lock:
+        return _state['state'] == OPEN
+
+
+def get_breaker_stats():
+    """État du disjoncteur et compteurs (exposés par /api/test/)"""
+    with _lock:
+        stats = dict(_stats)
+        stats['state'] = _state['state']
+        stats['failures'] = _state['failures']
+        stats['last_error'] = _state['last_error']
+        stats['open_for_s'] = round(time.time() - _state['opened_at'], 1) if _state['opened_at'] else 0
+        stats['prober_running'] = bool(_prober and _prober.is_alive())
+    return stats
+
+
+def reset():
+    """Referme le circuit sans condition (tests, reprise manuelle)"""
+    with _lock:
+        _state.update(state=CLOSED, failures=0, opened_at=None, last_error=None, trial_in_flight=False)
@@ -0,0 +1,233 @@
+"""
+Client MongoDB partagé par tout le processus (pool de connexions de PyMongo)
+
+Un seul MongoClient, créé au premier appel d'après settings.MONGODB_SETTINGS
+(hôtes et nom du replica set, taille du pool, délais), au lieu d'un client
+par appel (découverte des serveurs, poignée de main TCP et pool à froid à
+chaque requête). Recréé après un fork, fermé à l'arrêt du processus.
+
+Routage des lectures : chaque route (detail, stats...) a sa préférence de
+lecture. Les pages tolérant un léger retard lisent sur les secondaires
+(retard borné par max_staleness), le reste reste sur le primaire.
+"""
+import atexit
+import os
+import threading
+from django.conf import settings
+from pymongo import MongoClient, monitoring, read_preferences
+
+from . import mongo_schema
+
+# Options du client, surchargeables via settings.MONGODB_SETTINGS['client']
+DEFAULT_CLIENT_SETTINGS = {
+    'maxPoolSize': 50,                  # Connexions par serveur
+    'minPoolSize': 0,
+    'maxIdleTimeMS': 60000,             # Connexion inactive fermée après 1 min
+    'waitQueueTimeoutMS': 2000,         # Attente maximale d'une connexion libre
+    'serverSelectionTimeoutMS': 5000,
+    'connectTimeoutMS': 3000,
+    'socketTimeoutMS': 10000,
+    'localThresholdMS': 15,             # Fenêtre de latence entre membres éligibles
+    'appname': 'cineexplorer',
+}
+
+# Préférence de lecture par route, surchargeable via settings.MONGODB_SETTINGS['read_routing']
+DEFAULT_READ_ROUTES = {
+    'primary': {'mode': 'primary'},                                 # Lectures qui doivent voir la dernière écriture
+    'detail': {'mode': 'secondaryPreferred', 'max_staleness': 90},  # Page détail, films similaires
+    'stats': {'mode': 'secondaryPreferred', 'max_staleness': 120},  # Compteurs et statistiques
+}
+
+READ_MODES = {
+    'primary': read_preferences.Primary,
+    'primaryPreferred': read_preferences.PrimaryPreferred,
+    'secondary': read_preferences.Secondary,
+    'secondaryPreferred': read_preferences.SecondaryPreferred,
+    'nearest': read_preferences.Nearest,
+}
+
+# Commandes comptées comme lectures dans les métriques par membre
+READ_COMMANDS = {'find', 'getMore', 'aggregate', 'count', 'distinct', 'listCollections', 'listIndexes'}
+
+_lock = threading.Lock()
+_client = None
+_pid = None
+_stats = {'clients_created': 0, 'created': 0, 'closed': 0, 'checked_out': 0,
+          'checked_in': 0, 'checkout_failed': 0}
+_members = {}
+
+
+class _PoolListener(monitoring.ConnectionPoolListener):
+    """Compteurs des événements du pool de connexions PyMongo"""
+
+    def _count(self, key):
+        with _lock:
+            _stats[key] += 1
+
+    def connection_created(self, event):
+        self._count('created')
+
+    def connection_closed(self, event):
+        self._count('closed')
+
+    def connection_checked_out(self, event):
+        self._count('checked_out')
+
+    def connection_checked_in(self, event):
+        self._count('checked_in')
+
+    def connection_check_out_failed(self, event):
+        self._count('checkout_failed')
+
+    # Événements sans compteur
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+
+class _CommandListener(monitoring.CommandListener):
+    """Lectures, erreurs et latence cumulée par membre du replica set"""
+
+    def _member(self, event):
+        host, port = event.connection_id
+        return _members.setdefault(f"{host}:{port}", {'reads': 0, 'errors': 0, 'total_ms': 0.0})
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        if event.command_name in READ_COMMANDS:
+            with _lock:
+                member = self._member(event)
+                member['reads'] += 1
+                member['total_ms'] += event.duration_micros / 1000
+
+    def failed(self, event):
+        with _lock:
+            self._member(event)['errors'] += 1
+
+
+def get_client_settings():
+    """Hôtes, replica set et options du client (défauts + settings.MONGODB_SETTINGS)"""
+    mongo_settings = getattr(settings, 'MONGODB_SETTINGS', {})
+    replica = mongo_settings.get('replica_set', {})
+
+    options = dict(DEFAULT_CLIENT_SETTINGS)
+    options.update(mongo_settings.get('client', {}))
+    if replica.get('name'):
+        options['replicaSet'] = replica['name']
+
+    return {
+        'hosts': replica.get('hosts') or ['localhost:27017'],
+        'database': replica.get('database', 'imdb_replica'),
+        'options': options,
+    }
+
+
+def get_client():
+    """Client partagé du processus courant (créé au premier appel ou après un fork)"""
+    global _client, _pid
+    pid = os.getpid()
+    client = _client
+    if client is not None and _pid == pid:
+        return client
+
+    with _lock:
+        if _client is None or _pid != pid:
+            # Après un fork, le client hérité n'est pas utilisable : on en crée un neuf
+            config = get_client_settings()
+            _client = MongoClient(
+                config['hosts'],
+                event_listeners=[_PoolListener(), _CommandListener(), mongo_schema.TopologyListener()],
+                **config['options']
+            )
+            _pid = pid
+            _stats['clients_created'] += 1
+        return _client
+
+
+def get_read_routes():
+    """Routes de lecture (défauts + settings.MONGODB_SETTINGS['read_routing'])"""
+    routes = {name: dict(route) for name, route in DEFAULT_READ_ROUTES.items()}
+    for name, route in getattr(settings, 'MONGODB_SETTINGS', {}).get('read_routing', {}).items():
+        routes.setdefault(name, {}).update(route)
+    return routes
+
+
+def get_read_preference(route='primary'):
+    """Préférence de lecture d'une route (primaire pour une route inconnue)"""
+    config = get_read_routes().get(route) or {'mode': 'primary'}
+    mode = READ_MODES[config.get('mode', 'primary')]
+    if mode is read_preferences.Primary:
+        return mode()
+    return mode(max_staleness=int(config.get('max_staleness', -1)))
+
+
+def get_database(name=None, route='primary'):
+    """Base MongoDB du site (MONGODB_SETTINGS['replica_set']['database'] par défaut), lue selon la route"""
+    return get_client().get_database(
+        name or get_client_settings()['database'],
+        read_preference=get_read_preference(route)
+    )
+
+
+def get_pool_stats():
+    """Compteurs du pool et topologie connue du client"""
+    with _lock:
+        stats = dict(_stats)
+        client = _client if _pid == os.getpid() else None
+    stats['in_use'] = stats['checked_out'] - stats['checked_in']
+    stats['open_connections'] = stats['created'] - stats['closed']
+    stats['initialized'] = client is not None
+    if client is not None:
+        description = client.topology_description
+        stats['topology'] = description.topology_type_name
+        stats['servers'] = {
+            f"{host}:{port}": server.server_type_name
+            for (host, port), server in description.server_descriptions().items()
+        }
+    stats['members'] = get_member_stats(client)
+    return stats
+
+
+def get_member_stats(client=None):
+    """Lectures, erreurs, latence moyenne de nos lectures et RTT mesuré par membre"""
+    with _lock:
+        members = {address: dict(member) for address, member in _members.items()}
+    if client is not None:
+        for (host, port), server in client.topology_description.server_descriptions().items():
+            member = members.setdefault(f"{host}:{port}", {'reads': 0, 'errors': 0, 'total_ms': 0.0})
+            member['role'] = server.server_type_name
+            member['rtt_ms'] = round(server.round_trip_time * 1000, 2) if server.round_trip_time is not None else None
+    for member in members.values():
+        member['avg_ms'] = round(member['total_ms'] / member['reads'], 2) if member['reads'] else None
+        member['total_ms'] = round(member['total_ms'], 1)
+    return members
+
+
+def close_client():
+    """Ferme le client partagé (arrêt du processus, rechargement des paramètres)"""
+    global _client, _pid
+    with _lock:
+        client, owner = _client, _pid
+        _client, _pid = None, None
+    # Un client hérité d'un fork appartient au parent : on l'abandonne sans le fermer
+    if client is not None and owner == os.getpid():
+        client.close()
+
+
+atexit.register(close_client)
@@ -0,0 +1,103 @@
+"""
+Registre des métadonnées MongoDB : collections et index de chaque base,
+lus une fois puis gardés ttl secondes (au lieu d'un list_collection_names
+avant chaque find). Un changement de topologie (nouveau primaire, serveur
+perdu ou revenu) vide le registre.
+"""
+import threading
+import time
+from django.conf import settings
+from pymongo import monitoring
+
+DEFAULT_METADATA_SETTINGS = {
+    'ttl': 60.0,    # Secondes avant une nouvelle lecture des collections
+}
+
+_lock = threading.Lock()
+_registries = {}
+_stats = {'loads': 0, 'hits': 0, 'invalidations': 0}
+
+
+class CollectionMetadata:
+    """Collections d'une base et index de chaque collection (lus à la demande)"""
+
+    def __init__(self, db, collections):
+        self._db = db
+        self.collections = frozenset(collections)
+        self.loaded_at = time.monotonic()
+        self._indexes = {}
+
+    def has_collection(self, name):
+        return name in self.collections
+
+    def has_collections(self, *names):
+        return all(name in self.collections for name in names)
+
+    def indexes_of(self, name):
+        """Noms des index d'une collection (liste vide si elle n'existe pas)"""
+        if name not in self.collections:
+            return []
+        indexes = self._indexes.get(name)
+        if indexes is None:
+            indexes = list(self._db[name].index_information())
+            self._indexes[name] = indexes
+        return indexes
+
+
+def get_metadata_settings():
+    """Paramètres du registre (défauts + settings.MONGO_METADATA)"""
+    config = dict(DEFAULT_METADATA_SETTINGS)
+    config.update(getattr(settings, 'MONGO_METADATA', {}))
+    return config
+
+
+def get_metadata(db):
+    """Métadonnées de la base db (relues si plus anciennes que ttl)"""
+    ttl = float(get_metadata_settings()['ttl'])
+    registry = _registries.get(db.name)
+    if registry is not None and time.monotonic() - registry.loaded_at < ttl:
+        with _lock:
+            _stats['hits'] += 1
+        return registry
+
+    registry = CollectionMetadata(db, db.list_collection_names())
+    with _lock:
+        _registries[db.name] = registry
+        _stats['loads'] += 1
+    return registry
+
+
+def invalidate(db_name=None):
+    """Oublie les métadonnées d'une base (ou de toutes)"""
+    with _lock:
+        if db_name is None:
+            _registries.clear()
+        else:
+            _registries.pop(db_name, None)
+        _stats['invalidations'] += 1
+
+
+def get_metadata_stats():
+    """Compteurs du registre et bases en cache"""
+    with _lock:
+        stats = dict(_stats)
+        stats['databases'] = sorted(_registries)
+    return stats
+
+
+class TopologyListener(monitoring.TopologyListener):
+    """Vide le registre quand le rôle d'un serveur change (élection, panne, retour)"""
+
+    def opened(self, event):
+        pass
+
+    def closed(self, event):
+        invalidate()
+
+    def description_changed(self, event):
+        previous = {address: server.server_type for address, server
+                    in event.previous_description.server_descriptions().items()}
+        current = {address: server.server_type for address, server
+                   in event.new_description.server_descriptions().items()}
+        if previous != current and _registries:
+            invalidate()
@@ -1,174 +1,238 @@
 """
 Service d'accès à MongoDB Replica Set - Version corrigée pour le casting
 """
-from pymongo import MongoClient
-from django.conf import settings
+import pymongo
+
+from . import mongo_breaker, mongo_pool, mongo_schema, mongo_similarity
 
 def get_mongo_client():
-    """Retourne un client MongoDB connecté"""
+    """Retourne le client MongoDB partagé (None si le circuit est ouvert)"""
+    if not mongo_breaker.allow_request():
+        return None
     try:
-        client = MongoClient(
-            'localhost:27017',
-            serverSelectionTimeoutMS=5000,
-            connectTimeoutMS=3000
-        )
-        return client
+        return mongo_pool.get_client()
     except Exception as e:
         print(f"Erreur connexion MongoDB: {e}")
+        mongo_breaker.record_error(e)
+        return None
+
+def get_mongo_database(route='primary'):
+    """
+    Base du site lue selon la route (mongo_pool.DEFAULT_READ_ROUTES) :
+    'detail' et 'stats' acceptent un secondaire, 'primary' voit la dernière
+    écriture. None si le circuit est ouvert.
+    """
+    client = get_mongo_client()
+    if not client:
         return None
+    return mongo_pool.get_database(route=route)
+
+def ping_mongo(timeout_ms):
+    """Sonde du disjoncteur : ping sur le client partagé avec un délai court"""
+    with pymongo.timeout(timeout_ms / 1000):
+        mongo_pool.get_client().admin.command('ping')
+
+mongo_breaker.register_probe(ping_mongo)
+
+# Projection de la lecture d'un film dans movies_complete (migrate_structured.py)
+COMPLETE_COLLECTION = 'movies_complete'
+COMPLETE_PROJECTION = {
+    'mid': 1, 'title': 1, 'primaryTitle': 1, 'year': 1, 'startYear': 1,
+    'runtime': 1, 'runtimeMinutes': 1, 'titleType': 1, 'language': 1, 'isAdult': 1,
+    'description': 1, 'genres': 1, 'rating': 1, 'votes': 1,
+    'cast': 1, 'directors': 1, 'writers': 1, 'titles': 1,
+}
 
 def get_complete_movie_with_characters(movie_id):
-    """Version améliorée qui cherche les personnages dans plusieurs endroits"""
+    """Film complet : un document de movies_complete, sinon les collections à plat"""
     try:
-        client = get_mongo_client()
-        if not client:
+        db = get_mongo_database('detail')
+        if db is None:
             return None
             
-        db = client['imdb_replica']
+        meta = mongo_schema.get_metadata(db)
         
         print(f"\n=== RECHERCHE FILM {movie_id} ===")
         
-        # 1. Chercher le film
-        movie_doc = db.movies.find_one({"mid": movie_id})
-        if not movie_doc:
-            client.close()
-            return None
-        
-        # 2. Construire le film
-        movie = {
-            'id': movie_id,
-            'title': movie_doc.get('primaryTitle', 'Titre inconnu'),
-            'year': movie_doc.get('startYear'),
-            'runtime': movie_doc.get('runtimeMinutes'),
-            'titleType': movie_doc.get('titleType', 'movie'),
-            'language': movie_doc.get('language', 'en'),
-            'isAdult': movie_doc.get('isAdult', False),
-            'genres': [],
-            'rating': None,
-            'votes': None,
-            'cast': [],
-            'directors': [],
-            'writers': [],
-            'titles': []
-        }
-        
-        # 3. Genres
-        if 'genres' in db.list_collection_names():
-            genres = db.genres.find({"mid": movie_id})
-            movie['genres'] = [g.get('genre') for g in genres if g.get('genre')]
+        # 1. Document dénormalisé (une seule lecture), puis collections à plat
+        movie = get_movie_from_complete(db, meta, movie_id)
+        if movie is None:
+            movie = get_movie_from_collections(db, meta, movie_id)
         
-        # 4. Note
-        if 'ratings' in db.list_collection_names():
-            rating = db.ratings.find_one({"mid": movie_id})
-            if rating:
-                movie['rating'] = rating.get('averageRating')
-                movie['votes'] = rating.get('numVotes')
-        
-        # 5. Réalisateurs
-        if 'directors' in db.list_collection_names():
-            directors = db.directors.find({"mid": movie_id})
-            for dir_doc in directors:
-                person = db.persons.find_one({"pid": dir_doc.get('pid')})
-                if person:
-                    movie['directors'].append({
-                        'id': person.get('pid'),
-                        'name': person.get('primaryName', 'Inconnu'),
-                        'birthYear': person.get('birthYear')
-                    })
-        
-        # 6. Scénaristes
-        if 'writers' in db.list_collection_names():
-            writers = db.writers.find({"mid": movie_id})
-            for writer_doc in writers:
-                person = db.persons.find_one({"pid": writer_doc.get('pid')})
-                if person:
-                    movie['writers'].append({
-                        'id': person.get('pid'),
-                        'name': person.get('primaryName', 'Inconnu'),
-                        'category': writer_doc.get('category', 'writer')
-                    })
-        
-        # 7. CASTING - VERSION AMÉLIORÉE
-        if 'principals' in db.list_collection_names():
-            print(f"\nRécupération du casting...")
-            principals = db.principals.find({"mid": movie_id}).sort("ordering", 1)
-            
-            for principal in principals:
-                person_id = principal.get('pid')
-                if not person_id:
-                    continue
-                
-                person = db.persons.find_one({"pid": person_id})
-                if not person:
-                    continue
-                
-                # STRATÉGIE POUR TROUVER LES PERSONNAGES :
-                characters = []
-                
-                # Méthode 1: Chercher dans 'characters' collection
-                if 'characters' in db.list_collection_names():
-                    char_docs = db.characters.find({"mid": movie_id, "pid": person_id})
-                    for char_doc in char_docs:
-                        char = char_doc.get('character')
-                        if char and char != 'None' and char != '\\N':
-                            characters.append(char)
-                
-                # Méthode 2: Chercher dans le champ 'job' de principals
-                if not characters and 'job' in principal:
-                    job = principal.get('job')
-                    if job and job not in ['actor', 'actress', 'self', 'director', 'writer']:
-                        characters.append(job)
-                
-                # Méthode 3: Pour les acteurs principaux, utiliser des noms génériques
-                if not characters and principal.get('category') in ['actor', 'actress']:
-                    ordering = principal.get('ordering', 0)
-                    if ordering <= 10:  # Top 10 des acteurs principaux
-                        # Générer un nom de personnage basé sur le rang
-                        role_names = [
-                            'Protagoniste', 'Personnage principal', 'Second rôle', 
-                            'Rôle important', 'Personnage central', 'Personnage clé'
-                        ]
-                        if ordering < len(role_names):
-                            characters.append(role_names[ordering])
-                        else:
-                            characters.append(f'Rôle n°{ordering}')
-                
-                # Créer l'entrée de casting
-                cast_member = {
-                    'id': person_id,
-                    'name': person.get('primaryName', 'Inconnu'),
-                    'characters': characters,
-                    'ordering': principal.get('ordering', 0),
-                    'category': principal.get('category', 'actor'),
-                    'birthYear': person.get('birthYear'),
-                    'deathYear': person.get('deathYear')
-                }
-                
-                movie['cast'].append(cast_member)
-        
-        # 8. Titres alternatifs
-        if 'titles' in db.list_collection_names():
-            titles = db.titles.find({"mid": movie_id})
-            for title_doc in titles:
-                if title_doc.get('title') != movie['title']:
-                    movie['titles'].append({
-                        'region': title_doc.get('region', ''),
-                        'title': title_doc.get('title'),
-                        'language': title_doc.get('language', '')
-                    })
-        
-        print(f"Résumé: {len(movie['cast'])} acteurs trouvés")
-        print(f"Personnages totaux: {sum(len(a.get('characters', [])) for a in movie['cast'])}")
-        
-        client.close()
+        mongo_breaker.record_success()
+        if movie:
+            print(f"Résumé: {len(movie['cast'])} acteurs trouvés")
+            print(f"Personnages totaux: {sum(len(a.get('characters', [])) for a in movie['cast'])}")
         return movie
         
     except Exception as e:
+        mongo_breaker.record_error(e)
         print(f"Erreur dans get_complete_movie_with_characters: {e}")
         import traceback
         traceback.print_exc()
         return None
 
+def get_movie_from_complete(db, meta, movie_id):
+    """Film lu dans movies_complete (None si la collection ou le document manque)"""
+    if not meta.has_collection(COMPLETE_COLLECTION):
+        return None
+    movie_doc = db[COMPLETE_COLLECTION].find_one({"_id": movie_id}, COMPLETE_PROJECTION)
+    return format_movie_from_complete(movie_doc)
+
+def get_movie_from_collections(db, meta, movie_id):
+    """Film assemblé depuis les collections à plat (une lecture par collection et par personne)"""
+    # 1. Chercher le film
+    movie_doc = db.movies.find_one({"mid": movie_id})
+    if not movie_doc:
+        return None
+    
+    # 2. Construire le film
+    movie = {
+        'id': movie_id,
+        'title': movie_doc.get('primaryTitle', 'Titre inconnu'),
+        'year': movie_doc.get('startYear'),
+        'runtime': movie_doc.get('runtimeMinutes'),
+        'titleType': movie_doc.get('titleType', 'movie'),
+        'language': movie_doc.get('language', 'en'),
+        'isAdult': movie_doc.get('isAdult', False),
+        'genres': [],
+        'rating': None,
+        'votes': None,
+        'cast': [],
+        'directors': [],
+        'writers': [],
+        'titles': []
+    }
+    
+    # 3. Genres
+    if meta.has_collection('genres'):
+        genres = db.genres.find({"mid": movie_id})
+        movie['genres'] = [g.get('genre') for g in genres if g.get('genre')]
+    
+    # 4. Note
+    if meta.has_collection('ratings'):
+        rating = db.ratings.find_one({"mid": movie_id})
+        if rating:
+            movie['rating'] = rating.get('averageRating')
+            movie['votes'] = rating.get('numVotes')
+    
+    # 5. Liens du film, puis personnes et personnages en une lecture chacun
+    director_docs = list(db.directors.find({"mid": movie_id})) if meta.has_collection('directors') else []
+    writer_docs = list(db.writers.find({"mid": movie_id})) if meta.has_collection('writers') else []
+    principals = []
+    if meta.has_collection('principals'):
+        print(f"\nRécupération du casting...")
+        principals = list(db.principals.find({"mid": movie_id}).sort("ordering", 1))
+    
+    persons = fetch_persons(db, meta, [doc.get('pid') for doc in director_docs + writer_docs + principals])
+    characters_by_pid = fetch_characters(db, meta, movie_id, [p.get('pid') for p in principals if p.get('pid') in persons])
+    
+    # 6. Réalisateurs
+    for dir_doc in director_docs:
+        person = persons.get(dir_doc.get('pid'))
+        if person:
+            movie['directors'].append({
+                'id': person.get('pid'),
+                'name': person.get('primaryName', 'Inconnu'),
+                'birthYear': person.get('birthYear')
+            })
+    
+    # 7. Scénaristes
+    for writer_doc in writer_docs:
+        person = persons.get(writer_doc.get('pid'))
+        if person:
+            movie['writers'].append({
+                'id': person.get('pid'),
+                'name': person.get('primaryName', 'Inconnu'),
+                'category': writer_doc.get('category', 'writer')
+            })
+    
+    # 8. CASTING - VERSION AMÉLIORÉE
+    for principal in principals:
+        person_id = principal.get('pid')
+        person = persons.get(person_id)
+        if not person:
+            continue
+        
+        # STRATÉGIE POUR TROUVER LES PERSONNAGES :
+        # Méthode 1: Collection 'characters' (lue une seule fois pour tout le casting)
+        characters = list(characters_by_pid.get(person_id, []))
+        
+        # Méthode 2: Chercher dans le champ 'job' de principals
+        if not characters and 'job' in principal:
+            job = principal.get('job')
+            if job and job not in ['actor', 'actress', 'self', 'director', 'writer']:
+                characters.append(job)
+        
+        # Méthode 3: Pour les acteurs principaux, utiliser des noms génériques
+        if not characters:
+            characters = placeholder_characters(principal.get('category'), principal.get('ordering', 0))
+        
+        # Créer l'entrée de casting
+        cast_member = {
+            'id': person_id,
+            'name': person.get('primaryName', 'Inconnu'),
+            'characters': characters,
+            'ordering': principal.get('ordering', 0),
+            'category': principal.get('category', 'actor'),
+            'birthYear': person.get('birthYear'),
+            'deathYear': person.get('deathYear')
+        }
+        
+        movie['cast'].append(cast_member)
+    
+    # 9. Titres alternatifs
+    if meta.has_collection('titles'):
+        titles = db.titles.find({"mid": movie_id})
+        for title_doc in titles:
+            if title_doc.get('title') != movie['title']:
+                movie['titles'].append({
+                    'region': title_doc.get('region', ''),
+                    'title': title_doc.get('title'),
+                    'language': title_doc.get('language', '')
+                })
+    
+    return movie
+
+def placeholder_characters(category, ordering):
+    """Personnage générique des acteurs principaux sans personnage connu"""
+    if category not in ['actor', 'actress'] or ordering is None or ordering > 10:
+        return []
+    # Générer un nom de personnage basé sur le rang
+    role_names = [
+        'Protagoniste', 'Personnage principal', 'Second rôle', 
+        'Rôle important', 'Personnage central', 'Personnage clé'
+    ]
+    if ordering < len(role_names):
+        return [role_names[ordering]]
+    return [f'Rôle n°{ordering}']
+
+def fetch_persons(db, meta, pids):
+    """Personnes {pid: document} lues en une requête $in"""
+    pids = list({pid for pid in pids if pid})
+    if not pids or not meta.has_collection('persons'):
+        return {}
+    return {person['pid']: person for person in db.persons.find({"pid": {"$in": pids}})}
+
+# Valeurs d'import qui signifient « pas de personnage »
+MISSING_CHARACTERS = ('None', '\\N')
+
+def fetch_characters(db, meta, movie_id, pids, ignored=MISSING_CHARACTERS):
+    """
+    Personnages d'un film {pid: [personnages]} lus en une requête $in
+    (valeurs vides et valeurs de ignored écartées)
+    """
+    pids = list({pid for pid in pids if pid})
+    if not pids or not meta.has_collection('characters'):
+        return {}
+    characters = {}
+    for char_doc in db.characters.find({"mid": movie_id, "pid": {"$in": pids}}):
+        char = char_doc.get('character')
+        if char and char not in ignored:
+            characters.setdefault(char_doc.get('pid'), []).append(char)
+    return characters
+
+
 # Mettre à jour la fonction existante
 def get_complete_movie(movie_id):
     """Wrapper pour la fonction corrigée"""
@@ -177,14 +241,21 @@ def get_complete_movie(movie_id):
 def get_mongo_stats():
     """Récupère des statistiques depuis MongoDB"""
     try:
-        client = get_mongo_client()
-        db = client[settings.MONGODB_SETTINGS['replica_set']['database']]
+        db = get_mongo_database('stats')
+        if db is None:
+            return {
+                'error': 'MongoDB indisponible (circuit ouvert)',
+                'replica_status': 'error',
+                'collections': [],
+                'circuit': mongo_breaker.get_breaker_stats()['state']
+            }
         
-        stats = {'collections': db.list_collection_names()}
+        meta = mongo_schema.get_metadata(db)
+        stats = {'collections': sorted(meta.collections)}
         
         # Essayer de vérifier le replica set
         try:
-            admin_db = client.admin
+            admin_db = db.client.admin
             replica_status = admin_db.command('replSetGetStatus')
             stats['replica_status'] = 'ok'
             stats['set_name'] = replica_status.get('set', 'rs0')
@@ -194,7 +265,7 @@ def get_mongo_stats():
         # Compter les documents dans chaque collection
         collections = ['movies', 'persons', 'ratings', 'genres', 'directors', 'principals', 'movies_complete']
         for coll_name in collections:
-            if coll_name in db.list_collection_names():
+            if meta.has_collection(coll_name):
                 try:
                     stats[f'total_{coll_name}'] = db[coll_name].estimated_document_count()
                 except:
@@ -202,10 +273,11 @@ def get_mongo_stats():
             else:
                 stats[f'total_{coll_name}'] = 0
         
-        client.close()
+        mongo_breaker.record_success()
         return stats
         
     except Exception as e:
+        mongo_breaker.record_error(e)
         return {
             'error': str(e), 
             'replica_status': 'error',
@@ -216,6 +288,7 @@ def get_mongo_stats():
 
 def assemble_movie_data(db, movie_id, base_movie):
     """Assemble les données d'un film depuis les collections MongoDB"""
+    meta = mongo_schema.get_metadata(db)
     movie = {
         'id': movie_id,
         'title': base_movie.get('primaryTitle') or base_movie.get('title'),
@@ -229,76 +302,74 @@ def assemble_movie_data(db, movie_id, base_movie):
     
     # 1. Genres
     movie['genres'] = []
-    if 'genres' in db.list_collection_names():
+    if meta.has_collection('genres'):
         genres = db.genres.find({"mid": movie_id})
         movie['genres'] = [genre.get('genre') for genre in genres if genre.get('genre')]
     
     # 2. Note
     movie['rating'] = None
     movie['votes'] = None
-    if 'ratings' in db.list_collection_names():
+    if meta.has_collection('ratings'):
         rating = db.ratings.find_one({"mid": movie_id})
         if rating:
             movie['rating'] = rating.get('averageRating')
             movie['votes'] = rating.get('numVotes')
     
-    # 3. Réalisateurs
+    # 3. Liens du film, puis personnes et personnages en une lecture chacun
+    director_docs = list(db.directors.find({"mid": movie_id})) if meta.has_collection('directors') else []
+    writer_docs = list(db.writers.find({"mid": movie_id})) if meta.has_collection('writers') else []
+    principals = []
+    if meta.has_collection('principals'):
+        principals = list(db.principals.find({"mid": movie_id}).sort("ordering", 1))
+    persons = fetch_persons(db, meta, [doc.get('pid') for doc in director_docs + writer_docs + principals])
+    # Comme avant le regroupement des lectures : seules les valeurs vides sont écartées
+    characters_by_pid = fetch_characters(db, meta, movie_id, [p.get('pid') for p in principals if p.get('pid') in persons],
+                                         ignored=())
+    
+    # 4. Réalisateurs et scénaristes
     movie['directors'] = []
-    if 'directors' in db.list_collection_names() and 'persons' in db.list_collection_names():
-        directors = db.directors.find({"mid": movie_id})
-        for dir_doc in directors:
-            person = db.persons.find_one({"pid": dir_doc.get('pid')})
-            if person:
-                movie['directors'].append({
-                    'id': person.get('pid'),
-                    'name': person.get('primaryName'),
-                    'birthYear': person.get('birthYear')
-                })
+    for dir_doc in director_docs:
+        person = persons.get(dir_doc.get('pid'))
+        if person:
+            movie['directors'].append({
+                'id': person.get('pid'),
+                'name': person.get('primaryName'),
+                'birthYear': person.get('birthYear')
+            })
     
-    # 4. Scénaristes
     movie['writers'] = []
-    if 'writers' in db.list_collection_names() and 'persons' in db.list_collection_names():
-        writers = db.writers.find({"mid": movie_id})
-        for writer_doc in writers:
-            person = db.persons.find_one({"pid": writer_doc.get('pid')})
-            if person:
-                movie['writers'].append({
-                    'id': person.get('pid'),
-                    'name': person.get('primaryName'),
-                    'category': writer_doc.get('category', 'writer')
-                })
+    for writer_doc in writer_docs:
+        person = persons.get(writer_doc.get('pid'))
+        if person:
+            movie['writers'].append({
+                'id': person.get('pid'),
+                'name': person.get('primaryName'),
+                'category': writer_doc.get('category', 'writer')
+            })
     
     # 5. Casting complet avec personnages
     movie['cast'] = []
-    if 'principals' in db.list_collection_names() and 'persons' in db.list_collection_names():
-        principals = db.principals.find({"mid": movie_id}).sort("ordering", 1)
-        for principal in principals:
-            person = db.persons.find_one({"pid": principal.get('pid')})
-            if person:
-                # Récupérer les personnages depuis la table characters si elle existe
-                characters = []
-                if 'characters' in db.list_collection_names():
-                    char_docs = db.characters.find({
-                        "mid": movie_id,
-                        "pid": principal.get('pid')
-                    })
-                    characters = [char.get('character') for char in char_docs if char.get('character')]
-                elif principal.get('characters'):
-                    characters = [principal.get('characters')]
-                
-                cast_member = {
-                    'id': person.get('pid'),
-                    'name': person.get('primaryName'),
-                    'characters': characters,
-                    'ordering': principal.get('ordering', 0),
-                    'category': principal.get('category', 'actor'),
-                    'birthYear': person.get('birthYear')
-                }
-                movie['cast'].append(cast_member)
+    for principal in principals:
+        person = persons.get(principal.get('pid'))
+        if person:
+            # Personnages de la collection characters si elle existe, sinon du champ de principals
+            characters = characters_by_pid.get(principal.get('pid'), [])
+            if not meta.has_collection('characters') and principal.get('characters'):
+                characters = [principal.get('characters')]
+            
+            cast_member = {
+                'id': person.get('pid'),
+                'name': person.get('primaryName'),
+                'characters': characters,
+                'ordering': principal.get('ordering', 0),
+                'category': principal.get('category', 'actor'),
+                'birthYear': person.get('birthYear')
+            }
+            movie['cast'].append(cast_member)
     
     # 6. Titres alternatifs
     movie['titles'] = []
-    if 'titles' in db.list_collection_names():
+    if meta.has_collection('titles'):
         titles = db.titles.find({"mid": movie_id})
         for title_doc in titles:
             if title_doc.get('title') != movie['title']:
@@ -328,33 +399,65 @@ def format_movie_from_complete(movie_doc):
         'genres': movie_doc.get('genres', []),
     }
     
-    # Note et votes
+    # Note et votes : {average, votes} (migrate_structured.py) ou {averageRating, numVotes}
+    movie['rating'] = None
+    movie['votes'] = None
     if 'rating' in movie_doc:
         if isinstance(movie_doc['rating'], dict):
-            movie['rating'] = movie_doc['rating'].get('averageRating')
-            movie['votes'] = movie_doc['rating'].get('numVotes')
+            rating = movie_doc['rating']
+            movie['rating'] = rating.get('average', rating.get('averageRating'))
+            movie['votes'] = rating.get('votes', rating.get('numVotes'))
         else:
             movie['rating'] = movie_doc.get('rating')
             movie['votes'] = movie_doc.get('votes')
     
-    # Casting, réalisateurs, scénaristes
-    movie['cast'] = movie_doc.get('cast', [])
-    movie['directors'] = movie_doc.get('directors', [])
-    movie['writers'] = movie_doc.get('writers', [])
-    movie['titles'] = movie_doc.get('titles', [])
+    # Casting, réalisateurs, scénaristes : person_id -> id comme la lecture à plat
+    movie['cast'] = []
+    for member in movie_doc.get('cast') or []:
+        characters = [c for c in member.get('characters') or [] if c and c not in ('None', '\\N')]
+        if not characters:
+            characters = placeholder_characters(member.get('category', 'actor'), member.get('ordering'))
+        movie['cast'].append({
+            'id': member.get('person_id') or member.get('id'),
+            'name': member.get('name') or 'Inconnu',
+            'characters': characters,
+            'ordering': member.get('ordering', 0),
+            'category': member.get('category', 'actor'),
+            'birthYear': member.get('birthYear'),
+            'deathYear': member.get('deathYear')
+        })
+    movie['directors'] = [_person_from_complete(d) for d in movie_doc.get('directors') or []]
+    movie['writers'] = [_person_from_complete(w) for w in movie_doc.get('writers') or []]
+    movie['titles'] = [t for t in movie_doc.get('titles') or [] if t.get('title') != movie['title']]
     
     return movie
 
+def _person_from_complete(person):
+    """Personne intégrée à movies_complete, au format de la lecture à plat"""
+    entry = dict(person)
+    entry['id'] = entry.pop('person_id', None) or entry.get('id')
+    entry['name'] = entry.get('name') or 'Inconnu'
+    return entry
+
 def get_similar_movies_from_mongo(movie_id, current_genres=None, current_directors=None, limit=4):
     """Récupère des films similaires depuis MongoDB"""
     try:
-        client = get_mongo_client()
-        db = client[settings.MONGODB_SETTINGS['replica_set']['database']]
+        db = get_mongo_database('detail')
+        if db is None:
+            return []
+        meta = mongo_schema.get_metadata(db)
+        
+        # Voisins précalculés (build_mongo_similar_movies) : une lecture sur _id
+        if meta.has_collection(mongo_similarity.TARGET_COLLECTION):
+            neighbors = mongo_similarity.fetch_similar(db, movie_id, limit)
+            if neighbors is not None:
+                mongo_breaker.record_success()
+                return neighbors
         
         similar_movies = []
         
         # Si on a des genres, chercher des films avec les mêmes genres
-        if current_genres and 'genres' in db.list_collection_names():
+        if current_genres and meta.has_collection('genres'):
             # Trouver des films avec au moins un genre en commun
             pipeline = [
                 {"$match": {"genre": {"$in": current_genres}, "mid": {"$ne": movie_id}}},
@@ -366,7 +469,7 @@ def get_similar_movies_from_mongo(movie_id, current_genres=None, current_directo
             genre_movie_ids = [doc['_id'] for doc in genre_matches]
             
             # Récupérer les infos de ces films
-            if genre_movie_ids and 'movies' in db.list_collection_names():
+            if genre_movie_ids and meta.has_collection('movies'):
                 movies = db.movies.find({
                     "mid": {"$in": genre_movie_ids},
                     "titleType": "movie"
@@ -381,7 +484,7 @@ def get_similar_movies_from_mongo(movie_id, current_genres=None, current_directo
                     })
         
         # Si pas assez de films similaires, en prendre au hasard
-        if len(similar_movies) < limit and 'movies' in db.list_collection_names():
+        if len(similar_movies) < limit and meta.has_collection('movies'):
             additional = list(db.movies.aggregate([
                 {"$match": {"mid": {"$ne": movie_id}, "titleType": "movie"}},
                 {"$sample": {"size": limit - len(similar_movies)}}
@@ -395,9 +498,10 @@ def get_similar_movies_from_mongo(movie_id, current_genres=None, current_directo
                     'titleType': movie.get('titleType')
                 })
         
-        client.close()
+        mongo_breaker.record_success()
         return similar_movies[:limit]
         
     except Exception as e:
+        mongo_breaker.record_error(e)
         print(f"Erreur dans get_similar_movies_from_mongo: {e}")
         return []
\ No newline at end of file
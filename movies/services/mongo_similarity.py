@@ -0,0 +1,98 @@
+"""
+Films similaires précalculés dans MongoDB (collection similar_movies)
+
+Même moteur que movie_neighbors (similarity.py) mais alimenté par un seul
+parcours de movies_complete : genres, réalisateurs, scénaristes et casting
+y sont déjà intégrés. Chaque film reçoit un document {_id: mid, neighbors}
+avec les cartes de ses voisins classés : la page n'a plus qu'une lecture
+sur _id à faire, sans $group sur genres ni $sample sur movies.
+Construction après migration : python manage.py build_mongo_similar_movies
+"""
+from . import mongo_pool, mongo_schema, similarity, data_version
+
+SOURCE_COLLECTION = 'movies_complete'
+TARGET_COLLECTION = 'similar_movies'
+BATCH_SIZE = 1000
+
+SOURCE_PROJECTION = {
+    'title': 1, 'year': 1, 'rating': 1, 'genres': 1,
+    'directors.person_id': 1, 'writers.person_id': 1, 'cast.person_id': 1,
+}
+
+
+def load_catalog(db):
+    """Un parcours de movies_complete : caractéristiques du moteur et cartes des films"""
+    rows, genre_pairs, cards = [], [], {}
+    people_pairs = {'directors': [], 'writers': [], 'cast': []}
+
+    for doc in db[SOURCE_COLLECTION].find({}, SOURCE_PROJECTION, batch_size=BATCH_SIZE):
+        mid = doc['_id']
+        rating = doc.get('rating') or {}
+        # movies_complete ne contient que des films (titleType = 'movie')
+        rows.append((mid, similarity.NEIGHBOR_TITLE_TYPE, rating.get('votes')))
+        genre_pairs += [(mid, genre) for genre in doc.get('genres') or []]
+        for kind, pairs in people_pairs.items():
+            pairs += [(mid, person.get('person_id')) for person in doc.get(kind) or [] if person.get('person_id')]
+        cards[mid] = {
+            'id': mid,
+            'title': doc.get('title'),
+            'year': doc.get('year'),
+            'titleType': similarity.NEIGHBOR_TITLE_TYPE,
+            'rating': rating.get('average'),
+        }
+
+    return similarity.encode_features(rows, genre_pairs, people_pairs), cards
+
+
+def build_similar_movies(db, config=None):
+    """
+    (Re)crée similar_movies ; retourne le nombre de films ayant des voisins.
+    Écrite dans une collection temporaire puis renommée : les lectures voient
+    l'ancienne version jusqu'au dernier moment.
+    """
+    config = config or similarity.get_similarity_settings()
+    features, cards = load_catalog(db)
+
+    staging = db[f"{TARGET_COLLECTION}_build"]
+    staging.drop()
+
+    total = 0
+    batch = []
+    for mid, neighbors in similarity.compute_neighbors(features, int(config['top_k']),
+                                                       config['weights'], config['batch_cells']):
+        if not neighbors:
+            continue
+        batch.append({
+            '_id': mid,
+            'neighbors': [dict(cards[neighbor], score=round(score, 4)) for neighbor, score in neighbors],
+        })
+        if len(batch) >= BATCH_SIZE:
+            staging.insert_many(batch, ordered=False)
+            total += len(batch)
+            batch = []
+    if batch:
+        staging.insert_many(batch, ordered=False)
+        total += len(batch)
+
+    if total:
+        staging.rename(TARGET_COLLECTION, dropTarget=True)
+    else:
+        staging.drop()
+    mongo_schema.invalidate(db.name)
+    return total
+
+
+def rebuild_similar_movies(config=None):
+    """Recalcule similar_movies dans la base du site (après chaque migration)"""
+    db = mongo_pool.get_database()
+    total = build_similar_movies(db, config)
+    data_version.bump_mongo_version(db, 'build_mongo_similar_movies')
+    return total
+
+
+def fetch_similar(db, movie_id, limit=4):
+    """Voisins précalculés d'un film (une lecture sur _id), None si le film n'en a pas"""
+    doc = db[TARGET_COLLECTION].find_one({'_id': movie_id}, {'neighbors': {'$slice': limit}})
+    if doc is None:
+        return None
+    return doc.get('neighbors', [])
@@ -0,0 +1,133 @@
+"""
+Cartes de films dénormalisées (table movie_card)
+
+Une ligne par film avec tout ce qu'affichent la liste, la recherche, les
+films similaires et le top : id, titre, année, type, note, votes et genres
+(séparés par des virgules). Plus de jointure movies/ratings/genres ni de
+lecture de note ou de genres film par film. Index d'expression alignés sur
+les clés de tri de la liste (pagination keyset sans tri en mémoire).
+Construite en fin d'import (scripts/phase1_sqlite/import_data.py) ou par
+python manage.py build_movie_cards
+"""
+from . import sqlite_pool, sqlite_schema, data_version
+
+# Même forme que movie_card, calculée à la lecture tant que la table n'existe pas
+LEGACY_CARD_SOURCE = """(
+    SELECT
+        m.mid as mid,
+        m.primaryTitle as title,
+        m.startYear as year,
+        m.titleType as titleType,
+        r.averageRating as rating,
+        r.numVotes as votes,
+        (SELECT GROUP_CONCAT(genre) FROM genres WHERE genres.mid = m.mid) as genres
+    FROM movies m
+    LEFT JOIN ratings r ON m.mid = r.mid
+)"""
+
+# Colonnes d'une carte (alias c dans les requêtes)
+CARD_SELECT = "c.mid as id, c.title, c.year, c.titleType, c.rating, c.votes, c.genres"
+
+CARD_INDEXES = [
+    # Clés de tri de la liste (sqlite_service.MOVIE_SORT_KEYS), départagées par mid
+    "CREATE INDEX idx_movie_card_rating ON movie_card(COALESCE(rating, -1), mid)",
+    "CREATE INDEX idx_movie_card_year ON movie_card(COALESCE(year, -1), mid)",
+    "CREATE INDEX idx_movie_card_title ON movie_card(COALESCE(title, ''), mid)",
+    "CREATE INDEX idx_movie_card_votes ON movie_card(COALESCE(votes, -1), mid)",
+    # Top des films les mieux notés
+    "CREATE INDEX idx_movie_card_top ON movie_card(titleType, rating, votes)",
+]
+
+
+def build_movie_cards(conn):
+    """(Re)crée movie_card et ses index en une transaction ; retourne le nombre de films"""
+    conn.execute("BEGIN")
+    try:
+        conn.execute("DROP TABLE IF EXISTS movie_card")
+        conn.execute("""
+            CREATE TABLE movie_card (
+                mid TEXT PRIMARY KEY,
+                title TEXT,
+                year INTEGER,
+                titleType TEXT,
+                rating REAL,
+                votes INTEGER,
+                genres TEXT
+            )
+        """)
+        # Genres regroupés en une passe sur la clé (mid, genre) : déjà triés par film
+        conn.execute("""
+            INSERT INTO movie_card (mid, title, year, titleType, rating, votes, genres)
+            SELECT m.mid, m.primaryTitle, m.startYear, m.titleType,
+                   r.averageRating, r.numVotes, g.genres
+            FROM movies m
+            LEFT JOIN ratings r ON m.mid = r.mid
+            LEFT JOIN (
+                SELECT mid, GROUP_CONCAT(genre) as genres FROM genres GROUP BY mid
+            ) g ON g.mid = m.mid
+            ORDER BY m.rowid
+        """)
+        for sql in CARD_INDEXES:
+            conn.execute(sql)
+        conn.execute("ANALYZE movie_card")
+        total = conn.execute("SELECT COUNT(*) FROM movie_card").fetchone()[0]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return total
+
+
+def rebuild_movie_cards():
+    """Recalcule la table sur une connexion en écriture (après chaque import)"""
+    conn = sqlite_pool.open_writable_connection()
+    try:
+        total = build_movie_cards(conn)
+        data_version.bump_sqlite_version(conn, 'build_movie_cards')
+        return total
+    finally:
+        conn.close()
+
+
+def get_card_source():
+    """Source des cartes à mettre après FROM (alias c) : la table si elle est construite"""
+    if sqlite_schema.get_schema().has_table('movie_card'):
+        return "movie_card"
+    return LEGACY_CARD_SOURCE
+
+
+def card_from_row(row):
+    """Carte affichable : genres dépliés en liste"""
+    card = dict(row)
+    genres = card.get('genres')
+    card['genres'] = genres.split(',') if genres else []
+    return card
+
+
+def fetch_cards(conn, mids):
+    """Cartes des films demandés en une requête : {mid: carte}"""
+    mids = list(mids)
+    if not mids:
+        return {}
+
+    placeholders = ','.join('?' for _ in mids)
+    cursor = conn.execute(f"""
+        SELECT {CARD_SELECT}
+        FROM {get_card_source()} c
+        WHERE c.mid IN ({placeholders})
+    """, mids)
+    return {row['id']: card_from_row(row) for row in cursor.fetchall()}
+
+
+def fetch_top_rated(conn, limit, source=None):
+    """Films les mieux notés (plus de 1000 votes), départagés par le nombre de votes"""
+    cursor = conn.execute(f"""
+        SELECT c.mid as id, c.title, c.year, c.rating, c.votes
+        FROM {source or get_card_source()} c
+        WHERE c.titleType = 'movie'
+          AND c.votes > 1000
+          AND c.year IS NOT NULL
+        ORDER BY c.rating DESC, c.votes DESC
+        LIMIT ?
+    """, (limit,))
+    return [dict(row) for row in cursor.fetchall()]
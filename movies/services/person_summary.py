@@ -0,0 +1,138 @@
+"""
+Résumé précalculé des personnes (table person_summary)
+
+Catégorie principale, nombre de films distincts, première et dernière année
+et titres les plus connus de chaque personne, calculés en une seule passe
+sur principals. La recherche de personnes les lit par jointure sur la clé
+primaire au lieu de deux requêtes sur principals par personne trouvée.
+Reconstruction après import : python manage.py build_person_summary
+"""
+import heapq
+import json
+from collections import Counter
+
+from . import sqlite_pool, data_version
+
+# Titres « connus pour » gardés par personne (les plus votés)
+KNOWN_FOR_SIZE = 4
+
+# Lignes insérées par executemany
+BATCH_SIZE = 5000
+
+CATEGORY_LABELS = {
+    'actor': 'Acteur',
+    'actress': 'Actrice',
+    'director': 'Réalisateur',
+    'writer': 'Scénariste'
+}
+
+# Fragments SQL pour joindre le résumé à une requête sur persons (alias p)
+SUMMARY_SELECT = "s.main_category, s.movie_count, s.first_year, s.last_year, s.known_for"
+SUMMARY_JOIN = "LEFT JOIN person_summary s ON s.pid = p.pid"
+
+
+def _summarize(pid, categories, movies):
+    """Ligne de person_summary à partir des rôles d'une personne"""
+    # Catégorie la plus fréquente (à égalité : la première rencontrée)
+    main_category = categories.most_common(1)[0][0] if categories else None
+
+    years = [year for year, _, _ in movies.values() if isinstance(year, int)]
+    known_for = heapq.nlargest(KNOWN_FOR_SIZE, movies.items(), key=lambda item: (item[1][2] or 0, item[0]))
+    known_for = [{'id': mid, 'title': title} for mid, (_, title, _) in known_for]
+
+    return (
+        pid,
+        main_category,
+        len(movies),
+        min(years) if years else None,
+        max(years) if years else None,
+        json.dumps(known_for),
+    )
+
+
+def iter_summaries(conn):
+    """Parcourt principals trié par personne et produit une ligne par personne"""
+    cursor = conn.execute("""
+        SELECT pr.pid, pr.category, pr.mid, m.startYear, m.primaryTitle, r.numVotes
+        FROM principals pr
+        LEFT JOIN movies m ON m.mid = pr.mid
+        LEFT JOIN ratings r ON r.mid = pr.mid
+        ORDER BY pr.pid
+    """)
+
+    current = None
+    categories = Counter()
+    movies = {}
+    for pid, category, mid, year, title, votes in cursor:
+        if pid != current:
+            if current is not None:
+                yield _summarize(current, categories, movies)
+            current = pid
+            categories = Counter()
+            movies = {}
+        if category:
+            categories[category] += 1
+        movies[mid] = (year, title, votes)
+
+    if current is not None:
+        yield _summarize(current, categories, movies)
+
+
+def build_person_summary(conn):
+    """(Re)crée la table person_summary en une transaction ; retourne le nombre de personnes"""
+    conn.execute("DROP TABLE IF EXISTS person_summary")
+    conn.execute("""
+        CREATE TABLE person_summary (
+            pid TEXT PRIMARY KEY,
+            main_category TEXT,
+            movie_count INTEGER NOT NULL,
+            first_year INTEGER,
+            last_year INTEGER,
+            known_for TEXT
+        )
+    """)
+
+    total = 0
+    batch = []
+    for row in iter_summaries(conn):
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            conn.executemany("INSERT INTO person_summary VALUES (?, ?, ?, ?, ?, ?)", batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        conn.executemany("INSERT INTO person_summary VALUES (?, ?, ?, ?, ?, ?)", batch)
+        total += len(batch)
+
+    conn.commit()
+    return total
+
+
+def rebuild_person_summary():
+    """Recalcule la table sur une connexion en écriture (à lancer après chaque import)"""
+    conn = sqlite_pool.open_writable_connection()
+    try:
+        total = build_person_summary(conn)
+        data_version.bump_sqlite_version(conn, 'build_person_summary')
+        return total
+    finally:
+        conn.close()
+
+
+def apply_summary(person):
+    """
+    Convertit les colonnes du résumé (SUMMARY_SELECT) d'une ligne de recherche
+    en champs affichés : catégorie, rôle principal, nombre de films, titres connus
+    """
+    category = person.pop('main_category', None)
+    label = CATEGORY_LABELS.get(category, category) if category else 'Personne'
+    person['category'] = label
+    person['main_role'] = label
+    person['movie_count'] = person.get('movie_count') or 0
+
+    known_for = person.pop('known_for', None)
+    person['known_for'] = json.loads(known_for) if known_for else []
+
+    # Type pour la recherche
+    person['type'] = 'person'
+    return person
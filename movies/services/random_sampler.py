@@ -0,0 +1,103 @@
+"""
+Tirage aléatoire uniforme de films notés en O(k) par requête
+
+Au lieu de ORDER BY RANDOM() (tri de toute la table à chaque appel), les rowid
+des films éligibles (avec une ligne ratings) sont chargés une fois dans un tableau dense (reconstruit
+quand le fichier de la base change) ; un tirage = k indices au hasard, puis
+une lecture des k lignes par rowid.
+"""
+import random
+import threading
+from array import array
+
+from . import sqlite_pool, sqlite_schema
+
+# Ensembles de films où l'on tire au hasard : films notés seulement
+SAMPLE_POOLS = {
+    # Accueil : films notés sortis après 2000
+    'recent_movies': """
+        SELECT m.rowid FROM movies m
+        JOIN ratings r ON r.mid = m.mid
+        WHERE m.titleType = 'movie'
+          AND m.startYear IS NOT NULL
+          AND m.startYear > 2000
+          AND r.averageRating IS NOT NULL
+    """,
+    # Complément des films similaires : tous les films notés
+    'movies': """
+        SELECT m.rowid FROM movies m
+        JOIN ratings r ON r.mid = m.mid
+        WHERE m.titleType = 'movie'
+          AND r.averageRating IS NOT NULL
+    """,
+}
+
+_lock = threading.Lock()
+_indexes = {}
+
+
+def build_rowid_index(conn, pool):
+    """Tableau dense des rowid de l'ensemble (une passe)"""
+    return array('q', (row[0] for row in conn.execute(SAMPLE_POOLS[pool])))
+
+
+def _get_rowid_index(pool):
+    """Tableau de l'ensemble pour la version courante de la base"""
+    fingerprint = sqlite_schema.get_schema().fingerprint
+
+    entry = _indexes.get(pool)
+    if entry is not None and entry[0] == fingerprint:
+        return entry[1]
+
+    with _lock:
+        entry = _indexes.get(pool)
+        if entry is None or entry[0] != fingerprint:
+            entry = (fingerprint, build_rowid_index(sqlite_pool.get_connection(), pool))
+            _indexes[pool] = entry
+        return entry[1]
+
+
+def sample_rowids(rowids, k, rng=random):
+    """k rowid distincts tirés uniformément"""
+    if k >= len(rowids):
+        picked = list(rowids)
+        rng.shuffle(picked)
+        return picked
+    return [rowids[i] for i in rng.sample(range(len(rowids)), k)]
+
+
+def fetch_movies_by_rowid(conn, rowids):
+    """Cartes (id, titre, année, note) des rowid donnés, dans l'ordre du tirage"""
+    if not rowids:
+        return []
+
+    placeholders = ','.join('?' for _ in rowids)
+    cursor = conn.execute(f"""
+        SELECT
+            m.rowid as rid,
+            m.mid as id,
+            m.primaryTitle as title,
+            m.startYear as year,
+            r.averageRating as rating
+        FROM movies m
+        JOIN ratings r ON m.mid = r.mid
+        WHERE m.rowid IN ({placeholders})
+    """, list(rowids))
+
+    by_rowid = {row['rid']: row for row in cursor.fetchall()}
+    movies = []
+    for rid in rowids:
+        row = by_rowid.get(rid)
+        if row:
+            movies.append({'id': row['id'], 'title': row['title'], 'year': row['year'], 'rating': row['rating']})
+    return movies
+
+
+def sample_movies(pool, k, exclude=()):
+    """k films tirés uniformément dans l'ensemble, hors identifiants exclus"""
+    rowids = _get_rowid_index(pool)
+
+    # On tire un peu plus pour pouvoir écarter les films exclus
+    picked = sample_rowids(rowids, k + len(exclude))
+    movies = fetch_movies_by_rowid(sqlite_pool.get_connection(), picked)
+    return [movie for movie in movies if movie['id'] not in exclude][:k]
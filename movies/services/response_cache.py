@@ -0,0 +1,127 @@
+"""
+Cache des réponses des pages (décorateur cache_response)
+
+Clé = page + paramètres GET utiles normalisés + version des données
+(data_version.py) : un import change la version, les anciennes réponses ne sont plus jamais
+lues et expirent d'elles-mêmes. Le stockage passe par le cache Django choisi
+(CACHES, mémoire locale ou fichiers), avec une durée de vie par page.
+Une réponse marquée dégradée (valeurs de secours, voir degraded.py) n'est
+jamais gardée.
+"""
+import hashlib
+import threading
+from functools import wraps
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from . import data_version, degraded
+
+DEFAULT_RESPONSE_CACHE_SETTINGS = {
+    'enabled': True,
+    'cache_alias': 'default',   # Entrée de settings.CACHES (locmem ou fichiers)
+    'ttl': {                    # Secondes, par page (0 : pas de cache)
+        'home': 0,              # Pas de cache : films tirés au hasard à chaque visite
+        'movie_list': 600,
+        'search': 600,
+        'movie_detail': 600,
+        'stats': 1800,
+    },
+}
+
+_lock = threading.Lock()
+_stats = {}
+
+
+def get_response_cache_settings():
+    """Paramètres du cache de réponses (défauts + settings.RESPONSE_CACHE, durées fusionnées)"""
+    config = dict(DEFAULT_RESPONSE_CACHE_SETTINGS)
+    custom = dict(getattr(settings, 'RESPONSE_CACHE', {}))
+    ttl = dict(DEFAULT_RESPONSE_CACHE_SETTINGS['ttl'])
+    ttl.update(custom.pop('ttl', {}))
+    config.update(custom)
+    config['ttl'] = ttl
+    return config
+
+
+def request_digest(request, params, view_kwargs):
+    """Empreinte d'une requête : paramètres retenus, sans espaces superflus ni valeurs vides, triés"""
+    values = []
+    for param in params:
+        value = request.GET.get(param, '').strip()
+        if value:
+            values.append((param, value))
+    values += sorted((key, str(value)) for key, value in view_kwargs.items())
+    return hashlib.sha1(repr(values).encode('utf-8')).hexdigest()
+
+
+def make_key(name, request, params, view_kwargs):
+    """Clé d'une réponse : page, version des données et empreinte de la requête"""
+    digest = request_digest(request, params, view_kwargs)
+    return f"response:{name}:{data_version.get_data_version()}:{digest}"
+
+
+def _count(name, event):
+    with _lock:
+        counters = _stats.setdefault(name, {'hits': 0, 'misses': 0, 'stored': 0, 'bypassed': 0, 'degraded': 0})
+        counters[event] += 1
+
+
+def cache_response(name, params=()):
+    """
+    Met en cache la réponse d'une vue GET pour settings.RESPONSE_CACHE['ttl'][name]
+    secondes. Seuls les paramètres GET listés dans params entrent dans la clé
+    (ce sont les seuls que la vue lit) ; seules les réponses 200 sans cookie
+    et non dégradées sont gardées.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            config = get_response_cache_settings()
+            ttl = int(config['ttl'].get(name, 0))
+            if not config['enabled'] or ttl <= 0 or request.method not in ('GET', 'HEAD'):
+                _count(name, 'bypassed')
+                return view(request, *args, **kwargs)
+
+            cache = caches[config['cache_alias']]
+            try:
+                key = make_key(name, request, params, kwargs)
+                cached = cache.get(key)
+            except Exception as e:
+                print(f"Cache de réponses indisponible pour {name}: {e}")
+                _count(name, 'bypassed')
+                return view(request, *args, **kwargs)
+
+            if cached is not None:
+                _count(name, 'hits')
+                response = HttpResponse(cached['content'], content_type=cached['content_type'])
+                response['X-Response-Cache'] = 'hit'
+                return response
+
+            _count(name, 'misses')
+            response = view(request, *args, **kwargs)
+            if degraded.is_degraded_response(response):
+                _count(name, 'degraded')
+            elif response.status_code == 200 and not response.cookies and not getattr(response, 'streaming', False):
+                try:
+                    cache.set(key, {
+                        'content': response.content,
+                        'content_type': response.get('Content-Type'),
+                    }, ttl)
+                    _count(name, 'stored')
+                except Exception as e:
+                    print(f"Réponse {name} non mise en cache: {e}")
+            response['X-Response-Cache'] = 'miss'
+            return response
+        return wrapper
+    return decorator
+
+
+def get_response_cache_stats():
+    """Compteurs par page et taux de succès (exposés par /api/test/)"""
+    with _lock:
+        stats = {name: dict(counters) for name, counters in _stats.items()}
+    for counters in stats.values():
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_ratio'] = round(counters['hits'] / lookups, 3) if lookups else None
+    return stats
@@ -0,0 +1,220 @@
+"""
+Recherche plein texte (FTS5) sur les titres de films, les titres alternatifs
+et les noms de personnes
+
+Les tables virtuelles movies_fts, titles_fts et persons_fts indexent les
+colonnes de texte sans les dupliquer (content=... : contenu externe lu dans
+la table source). Une recherche = une lecture d'index inversé au lieu d'un
+LIKE '%q%' qui parcourt toute la table. Classement BM25 mélangé au nombre de
+votes pour que les films connus passent devant les homonymes obscurs.
+Construction après import : python manage.py build_search_index
+"""
+import math
+import re
+from django.conf import settings
+
+from . import sqlite_pool, person_summary, movie_cards, data_version
+
+# Tables virtuelles : (table FTS, table source, colonnes indexées)
+FTS_TABLES = [
+    ('movies_fts', 'movies', ('primaryTitle', 'originalTitle')),
+    ('titles_fts', 'titles', ('title',)),
+    ('persons_fts', 'persons', ('primaryName',)),
+]
+
+# Tokeniseur : insensible à la casse et aux accents (« amelie » trouve « Amélie »)
+FTS_TOKENIZE = "unicode61 remove_diacritics 2"
+
+DEFAULT_SEARCH_SETTINGS = {
+    'candidates': 200,          # Films lus dans l'index avant le mélange avec les votes
+    'votes_weight': 1.0,        # Poids de log10(1 + votes) face au score BM25
+    'alt_title_factor': 0.8,    # Un titre alternatif compte un peu moins qu'un titre principal
+}
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def get_search_settings():
+    """Paramètres de la recherche (défauts + settings.SEARCH_INDEX)"""
+    config = dict(DEFAULT_SEARCH_SETTINGS)
+    config.update(getattr(settings, 'SEARCH_INDEX', {}))
+    return config
+
+
+def build_search_index(conn, drop=False):
+    """
+    Crée (ou recrée avec drop=True) les tables FTS5 et les remplit depuis les
+    tables sources. Retourne {table FTS: nombre de lignes indexées}.
+    """
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    indexed = {}
+
+    for fts_table, source, columns in FTS_TABLES:
+        if source not in existing:
+            print(f"Table {source} absente : {fts_table} ignorée")
+            continue
+
+        if drop:
+            conn.execute(f"DROP TABLE IF EXISTS {fts_table}")
+
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                {', '.join(columns)},
+                content='{source}',
+                content_rowid='rowid',
+                tokenize='{FTS_TOKENIZE}'
+            )
+        """)
+        # 'rebuild' relit toute la table source (index cohérent après un import)
+        conn.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+        conn.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('optimize')")
+        indexed[fts_table] = conn.execute(f"SELECT COUNT(*) FROM {source}").fetchone()[0]
+
+    conn.commit()
+    return indexed
+
+
+def rebuild_search_index(drop=False):
+    """Construit l'index sur une connexion en écriture (à lancer après chaque import)"""
+    conn = sqlite_pool.open_writable_connection()
+    try:
+        total = build_search_index(conn, drop=drop)
+        data_version.bump_sqlite_version(conn, 'build_search_index')
+        return total
+    finally:
+        conn.close()
+
+
+def to_fts_query(query):
+    """
+    Saisie utilisateur -> requête FTS5 : chaque mot devient un préfixe entre
+    guillemets (aucun opérateur FTS n'est interprété). None si aucun mot.
+    """
+    tokens = _TOKEN_RE.findall(query or '')
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search_movies(conn, query, limit=20, has_titles=True):
+    """
+    Films dont un titre (principal, original ou alternatif) contient les mots
+    cherchés, au format de home_service.search_movies
+    """
+    fts_query = to_fts_query(query)
+    if fts_query is None:
+        return []
+    config = get_search_settings()
+    candidates = int(config['candidates'])
+    cursor = conn.cursor()
+
+    # 1. Candidats : meilleur score BM25 par film (plus négatif = plus pertinent)
+    scores = {}
+    cursor.execute("""
+        SELECT m.mid, bm25(movies_fts)
+        FROM movies_fts
+        JOIN movies m ON m.rowid = movies_fts.rowid
+        WHERE movies_fts MATCH ?
+        ORDER BY rank
+        LIMIT ?
+    """, (fts_query, candidates))
+    for mid, score in cursor.fetchall():
+        scores[mid] = score
+
+    if has_titles:
+        factor = float(config['alt_title_factor'])
+        cursor.execute("""
+            SELECT t.mid, bm25(titles_fts)
+            FROM titles_fts
+            JOIN titles t ON t.rowid = titles_fts.rowid
+            WHERE titles_fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        """, (fts_query, candidates))
+        for mid, score in cursor.fetchall():
+            score *= factor
+            if mid not in scores or score < scores[mid]:
+                scores[mid] = score
+
+    if not scores:
+        return []
+
+    # 2. Titre, année, type, note, votes et genres des candidats en une lecture des cartes
+    cards = list(movie_cards.fetch_cards(conn, scores).values())
+
+    # 3. Classement : BM25 corrigé par la notoriété (log des votes)
+    weight = float(config['votes_weight'])
+    cards.sort(key=lambda card: (scores[card['id']] - weight * math.log10(1 + (card['votes'] or 0)), card['id']))
+
+    results = []
+    for card in cards[:limit]:
+        movie = {key: card[key] for key in ('id', 'title', 'year', 'titleType', 'rating', 'genres')}
+        movie['type'] = 'movie'
+        results.append(movie)
+    return results
+
+
+def search_persons(conn, query, limit=20, has_summary=False):
+    """Personnes dont le nom contient les mots cherchés (classement BM25), au format de home_service.search_persons"""
+    fts_query = to_fts_query(query)
+    if fts_query is None:
+        return []
+    cursor = conn.cursor()
+
+    # Avec person_summary, catégorie et nombre de films viennent de la même lecture
+    summary_select = f", {person_summary.SUMMARY_SELECT}" if has_summary else ""
+    summary_join = person_summary.SUMMARY_JOIN if has_summary else ""
+    cursor.execute(f"""
+        SELECT p.pid as id, p.primaryName as name, p.birthYear, p.deathYear{summary_select}
+        FROM persons_fts
+        JOIN persons p ON p.rowid = persons_fts.rowid
+        {summary_join}
+        WHERE persons_fts MATCH ?
+        ORDER BY rank
+        LIMIT ?
+    """, (fts_query, limit))
+    persons = [dict(row) for row in cursor.fetchall()]
+
+    if has_summary:
+        return [person_summary.apply_summary(person) for person in persons]
+    return [describe_person(cursor, person) for person in persons]
+
+
+def describe_person(cursor, person):
+    """
+    Ajoute catégorie principale, nombre de films et type à une personne trouvée
+    (deux requêtes sur principals : seulement sans la table person_summary)
+    """
+    pid = person['id']
+
+    # Déterminer la profession depuis principals
+    try:
+        cursor.execute("""
+            SELECT DISTINCT category
+            FROM principals
+            WHERE pid = ?
+            LIMIT 1
+        """, (pid,))
+        category_row = cursor.fetchone()
+
+        if category_row:
+            category = category_row[0]
+            person['category'] = person_summary.CATEGORY_LABELS.get(category, category)
+            person['main_role'] = person_summary.CATEGORY_LABELS.get(category, category)
+        else:
+            person['category'] = 'Personne'
+            person['main_role'] = 'Personne'
+    except Exception:
+        person['category'] = 'Personne'
+        person['main_role'] = 'Personne'
+
+    # Compter les films
+    try:
+        cursor.execute("SELECT COUNT(DISTINCT mid) FROM principals WHERE pid = ?", (pid,))
+        person['movie_count'] = cursor.fetchone()[0] or 0
+    except Exception:
+        person['movie_count'] = 0
+
+    # Type pour la recherche
+    person['type'] = 'person'
+    return person
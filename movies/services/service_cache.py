@@ -0,0 +1,247 @@
+"""
+Cache à deux niveaux des fonctions de service (décorateur cached)
+
+Niveau 1 : LRU en mémoire du processus, borné en nombre d'entrées.
+Niveau 2 : cache Django partagé entre processus (CACHES, 'files' par défaut).
+Chaque valeur a une durée de fraîcheur (ttl) puis une période où elle peut
+encore être servie périmée (stale_ttl). Un seul appelant recalcule une clé
+à la fois (verrou par clé dans le processus, cache.add entre processus) :
+les autres servent la valeur périmée s'il y en a une, sinon l'attendent.
+La version des données entre dans la clé : une réimportation repart de zéro.
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from django.conf import settings
+from django.core.cache import caches
+
+from . import data_version
+
+DEFAULT_SERVICE_CACHE_SETTINGS = {
+    'enabled': True,
+    'max_entries': 256,         # Entrées gardées dans le LRU du processus
+    'shared_alias': 'files',    # Entrée de settings.CACHES partagée entre processus (None : aucune)
+    'lock_timeout': 30.0,       # Durée maximale d'un recalcul (verrou partagé)
+    'wait_interval': 0.05,      # Attente entre deux relectures du cache partagé
+    'ttl': {},                  # Durées de fraîcheur par nom, à la place de celles du décorateur
+}
+
+_MISSING = object()
+
+_lock = threading.Lock()
+_entries = OrderedDict()        # clé -> (valeur, fraîche jusqu'à, servable jusqu'à)
+_key_locks = {}                # clé -> [verrou, appelants en cours], retirée avec le dernier
+_stats = {'l1_hits': 0, 'l2_hits': 0, 'misses': 0, 'stale_served': 0,
+          'recomputes': 0, 'waits': 0, 'evictions': 0, 'errors': 0}
+
+
+def get_service_cache_settings():
+    """Paramètres du cache des services (défauts + settings.SERVICE_CACHE)"""
+    config = dict(DEFAULT_SERVICE_CACHE_SETTINGS)
+    config.update(getattr(settings, 'SERVICE_CACHE', {}))
+    return config
+
+
+def _count(event):
+    with _lock:
+        _stats[event] += 1
+
+
+def _shared_cache(config):
+    """Cache Django partagé, None s'il est désactivé ou mal configuré"""
+    alias = config.get('shared_alias')
+    if not alias:
+        return None
+    try:
+        return caches[alias]
+    except Exception as e:
+        print(f"Cache partagé {alias} indisponible: {e}")
+        return None
+
+
+def _l1_get(key):
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            _entries.move_to_end(key)
+        return entry
+
+
+def _l1_set(key, entry, max_entries):
+    with _lock:
+        _entries[key] = entry
+        _entries.move_to_end(key)
+        while len(_entries) > max_entries:
+            _entries.popitem(last=False)
+            _stats['evictions'] += 1
+
+
+def _l2_get(shared, key):
+    if shared is None:
+        return None
+    try:
+        return shared.get(key)
+    except Exception as e:
+        print(f"Lecture du cache partagé impossible ({key}): {e}")
+        return None
+
+
+def _lookup(key, shared, config):
+    """Entrée la plus récente des deux niveaux (le niveau 2 alimente le niveau 1)"""
+    entry = _l1_get(key)
+    if entry is not None and entry[1] > time.time():
+        _count('l1_hits')
+        return entry
+
+    shared_entry = _l2_get(shared, key)
+    if shared_entry is not None and (entry is None or shared_entry[1] > entry[1]):
+        _l1_set(key, shared_entry, int(config['max_entries']))
+        if shared_entry[1] > time.time():
+            _count('l2_hits')
+        return shared_entry
+    return entry
+
+
+@contextmanager
+def _key_lock(key):
+    """Verrou de recalcul de la clé, partagé par ses appelants en cours (sans l'acquérir)"""
+    with _lock:
+        holder = _key_locks.setdefault(key, [threading.Lock(), 0])
+        holder[1] += 1
+    try:
+        yield holder[0]
+    finally:
+        # Le dernier appelant retire le verrou : le registre ne garde que les clés en cours
+        with _lock:
+            holder[1] -= 1
+            if holder[1] == 0:
+                del _key_locks[key]
+
+
+def _acquire_shared(shared, key, config):
+    """Verrou de recalcul entre processus (toujours accordé sans cache partagé)"""
+    if shared is None:
+        return True
+    try:
+        return shared.add(f"{key}:lock", 1, timeout=int(config['lock_timeout']))
+    except Exception:
+        return True
+
+
+def _release_shared(shared, key):
+    if shared is not None:
+        try:
+            shared.delete(f"{key}:lock")
+        except Exception:
+            pass
+
+
+def cached(name, ttl, stale_ttl=None, cache_if=None):
+    """
+    Met en cache le résultat de la fonction pour ttl secondes, puis le sert
+    encore périmé pendant stale_ttl secondes (ttl par défaut) pendant qu'un
+    seul appelant le recalcule ; settings.SERVICE_CACHE['ttl'][name] remplace
+    ttl. cache_if(résultat) peut refuser un résultat (valeurs de secours
+    après une erreur). Les valeurs doivent être
+    sérialisables (pickle) pour le cache partagé ; chaque appelant reçoit une
+    copie qu'il peut modifier.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            config = get_service_cache_settings()
+            if not config['enabled']:
+                return func(*args, **kwargs)
+            fresh_for = float(config['ttl'].get(name, ttl))
+            stale_for = fresh_for if stale_ttl is None else float(stale_ttl)
+
+            arguments = repr((args, sorted(kwargs.items()))).encode('utf-8')
+            key = f"service:{name}:{data_version.get_data_version()}:{hashlib.sha1(arguments).hexdigest()}"
+            shared = _shared_cache(config)
+
+            entry = _lookup(key, shared, config)
+            now = time.time()
+            if entry is not None and entry[1] > now:
+                return copy.deepcopy(entry[0])
+            stale = entry[0] if entry is not None and entry[2] > now else _MISSING
+
+            with _key_lock(key) as local:
+                if stale is not _MISSING:
+                    # Périmé : un seul appelant recalcule, les autres servent l'ancienne valeur
+                    if not local.acquire(blocking=False):
+                        _count('stale_served')
+                        return copy.deepcopy(stale)
+                else:
+                    # Rien à servir : on attend l'appelant qui recalcule dans ce processus
+                    if not local.acquire(blocking=False):
+                        _count('waits')
+                        local.acquire()
+
+                try:
+                    entry = _lookup(key, shared, config)
+                    if entry is not None and entry[1] > time.time():
+                        return copy.deepcopy(entry[0])
+
+                    owns_shared = _acquire_shared(shared, key, config)
+                    if not owns_shared:
+                        if stale is not _MISSING:
+                            _count('stale_served')
+                            return copy.deepcopy(stale)
+                        # Un autre processus recalcule : on relit le cache partagé jusqu'au délai
+                        _count('waits')
+                        deadline = time.time() + float(config['lock_timeout'])
+                        while time.time() < deadline:
+                            time.sleep(float(config['wait_interval']))
+                            entry = _l2_get(shared, key)
+                            if entry is not None and entry[1] > time.time():
+                                _l1_set(key, entry, int(config['max_entries']))
+                                return copy.deepcopy(entry[0])
+
+                    _count('misses' if stale is _MISSING else 'recomputes')
+                    try:
+                        value = func(*args, **kwargs)
+                    except Exception:
+                        _count('errors')
+                        if stale is not _MISSING:
+                            return copy.deepcopy(stale)
+                        raise
+                    finally:
+                        if owns_shared:
+                            _release_shared(shared, key)
+
+                    if cache_if is None or cache_if(value):
+                        now = time.time()
+                        entry = (value, now + fresh_for, now + fresh_for + stale_for)
+                        _l1_set(key, entry, int(config['max_entries']))
+                        if shared is not None:
+                            try:
+                                shared.set(key, entry, int(fresh_for + stale_for))
+                            except Exception as e:
+                                print(f"Écriture du cache partagé impossible ({name}): {e}")
+                    return copy.deepcopy(value)
+                finally:
+                    local.release()
+
+        wrapper.cache_name = name
+        return wrapper
+    return decorator
+
+
+def clear():
+    """Vide le niveau en mémoire (le niveau partagé expire de lui-même)"""
+    with _lock:
+        _entries.clear()
+
+
+def get_service_cache_stats():
+    """Compteurs du cache des services (exposés par /api/test/)"""
+    with _lock:
+        stats = dict(_stats)
+        stats['entries'] = len(_entries)
+    lookups = stats['l1_hits'] + stats['l2_hits'] + stats['misses'] + stats['recomputes']
+    stats['hit_ratio'] = round((stats['l1_hits'] + stats['l2_hits']) / lookups, 3) if lookups else None
+    return stats
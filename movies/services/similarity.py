@@ -0,0 +1,306 @@
+"""
+Moteur de films similaires précalculés (table movie_neighbors)
+
+Chaque film est encodé hors ligne par ses genres (masque de bits), ses
+réalisateurs, scénaristes et acteurs principaux (listes creuses). La
+similarité pondérée est calculée par lots vectorisés NumPy contre tout le
+catalogue, et les k meilleurs voisins de chaque film sont enregistrés :
+la page détail n'a plus qu'une lecture indexée à faire.
+Construction après import : python manage.py build_similar_movies
+"""
+import math
+import numpy as np
+from django.conf import settings
+
+from . import sqlite_pool, movie_cards, data_version
+
+DEFAULT_SIMILARITY_SETTINGS = {
+    'top_k': 20,                # Voisins enregistrés par film
+    'batch_cells': 4_000_000,   # Taille d'un lot : films du lot x films du catalogue
+    'weights': {
+        'genres': 1.0,          # Jaccard des genres
+        'directors': 2.0,       # Cosinus des ensembles de réalisateurs
+        'writers': 1.0,         # ... de scénaristes
+        'cast': 1.5,            # ... d'acteurs principaux
+        'quality': 0.2,         # Départage par la notoriété (log des votes)
+    },
+}
+
+# Personnes d'un film, par nature de lien
+PEOPLE_QUERIES = {
+    'directors': "SELECT mid, pid FROM directors",
+    'writers': "SELECT mid, pid FROM writers",
+    'cast': "SELECT mid, pid FROM principals WHERE category IN ('actor', 'actress')",
+}
+
+# Seuls les films (titleType = 'movie') sont proposés comme voisins
+NEIGHBOR_TITLE_TYPE = 'movie'
+
+
+def get_similarity_settings():
+    """Paramètres du moteur (défauts + settings.SIMILAR_MOVIES, poids fusionnés)"""
+    config = dict(DEFAULT_SIMILARITY_SETTINGS)
+    custom = dict(getattr(settings, 'SIMILAR_MOVIES', {}))
+    weights = dict(DEFAULT_SIMILARITY_SETTINGS['weights'])
+    weights.update(custom.pop('weights', {}))
+    config.update(custom)
+    config['weights'] = weights
+    return config
+
+
+def _popcount(values):
+    """Nombre de bits à 1 de chaque entier d'un tableau uint64"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    table = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+    as_bytes = values.view(np.uint8).reshape(values.shape + (8,))
+    return table[as_bytes].sum(axis=-1)
+
+
+def _csr(pairs, index_of, n_rows):
+    """Lignes creuses (indptr, indices) à partir de paires (ligne, clé)"""
+    vocabulary = {}
+    rows = []
+    cols = []
+    for mid, key in pairs:
+        row = index_of.get(mid)
+        if row is None:
+            continue
+        rows.append(row)
+        cols.append(vocabulary.setdefault(key, len(vocabulary)))
+
+    # Tri par film et doublons retirés (même personne deux fois sur un film)
+    width = max(len(vocabulary), 1)
+    keys = np.unique(np.asarray(rows, dtype=np.int64) * width + np.asarray(cols, dtype=np.int64))
+    rows, cols = keys // width, keys % width
+
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.add.at(indptr, rows + 1, 1)
+    return np.cumsum(indptr), cols, len(vocabulary)
+
+
+def _transpose(indptr, indices, n_cols):
+    """Index inversé (clé -> films) d'une matrice creuse ligne -> clés"""
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    order = np.argsort(indices, kind='stable')
+    post_ptr = np.zeros(n_cols + 1, dtype=np.int64)
+    np.add.at(post_ptr, indices + 1, 1)
+    return np.cumsum(post_ptr), rows[order]
+
+
+def load_features(conn, source=None):
+    """Encode le catalogue SQLite : masques de genres, listes creuses de personnes, notoriété"""
+    source = source or movie_cards.get_card_source()
+    rows = conn.execute(f"SELECT c.mid, c.titleType, c.votes FROM {source} c").fetchall()
+    people = {kind: conn.execute(sql) for kind, sql in PEOPLE_QUERIES.items()}
+    return encode_features(rows, conn.execute("SELECT mid, genre FROM genres"), people)
+
+
+def encode_features(rows, genre_pairs, people_pairs):
+    """
+    Encode un catalogue quelle que soit sa source : rows = (mid, titleType, votes),
+    genre_pairs = (mid, genre), people_pairs = {nature: (mid, pid)}
+    """
+    mids = [row[0] for row in rows]
+    index_of = {mid: i for i, mid in enumerate(mids)}
+    n = len(mids)
+
+    features = {
+        'mids': mids,
+        'eligible': np.array([row[1] == NEIGHBOR_TITLE_TYPE for row in rows], dtype=np.float32),
+        'popularity': np.log10(1 + np.array([row[2] or 0 for row in rows], dtype=np.float32)),
+        'people': {},
+    }
+    top = features['popularity'].max() if n else 0
+    if top > 0:
+        features['popularity'] /= top
+
+    # Genres : un bit par genre
+    genre_bits = {}
+    rows_with_genre = []
+    bits = []
+    for mid, genre in genre_pairs:
+        row = index_of.get(mid)
+        if row is None or not genre:
+            continue
+        rows_with_genre.append(row)
+        bits.append(genre_bits.setdefault(genre, len(genre_bits)))
+    if len(genre_bits) > 64:
+        raise ValueError("Plus de 64 genres : le masque de bits ne suffit plus")
+
+    masks = np.zeros(n, dtype=np.uint64)
+    np.bitwise_or.at(masks, np.asarray(rows_with_genre, dtype=np.int64),
+                     np.left_shift(np.uint64(1), np.asarray(bits, dtype=np.uint64)))
+    features['genres'] = masks
+    features['genre_counts'] = _popcount(masks).astype(np.float32)
+
+    # Personnes : matrice creuse film -> personnes et index inversé personne -> films
+    for kind in PEOPLE_QUERIES:
+        indptr, indices, n_people = _csr(people_pairs.get(kind, ()), index_of, n)
+        post_ptr, post_idx = _transpose(indptr, indices, n_people)
+        features['people'][kind] = {
+            'indptr': indptr,
+            'indices': indices,
+            'post_ptr': post_ptr,
+            'post_idx': post_idx,
+            'counts': np.diff(indptr).astype(np.float32),
+        }
+
+    return features
+
+
+def _shared_pairs(people, start, end, n):
+    """
+    Paires (case du lot, nombre de personnes communes) entre les films
+    [start, end) et tout le catalogue : case = ligne du lot * n + film
+    """
+    indptr, indices = people['indptr'], people['indices']
+    post_ptr, post_idx = people['post_ptr'], people['post_idx']
+
+    # Personnes des films du lot, avec la ligne du lot d'où elles viennent
+    q_people = indices[indptr[start]:indptr[end]]
+    q_rows = np.repeat(np.arange(end - start), np.diff(indptr[start:end + 1]))
+
+    # Dépliage des listes de films de chaque personne (sans boucle Python)
+    lengths = post_ptr[q_people + 1] - post_ptr[q_people]
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    rows = np.repeat(q_rows, lengths)
+    firsts = np.repeat(post_ptr[q_people], lengths)
+    offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    cols = post_idx[firsts + offsets]
+
+    return np.unique(rows * n + cols, return_counts=True)
+
+
+def score_batch(features, start, end, weights):
+    """Scores de similarité des films [start, end) contre tout le catalogue (lot x n)"""
+    n = len(features['mids'])
+
+    # Genres : Jaccard des masques de bits (union = |A| + |B| - |A inter B|)
+    masks = features['genres']
+    sizes = features['genre_counts']
+    inter = _popcount(masks[start:end, None] & masks[None, :]).astype(np.float32)
+    union = sizes[start:end, None] + sizes[None, :] - inter
+    scores = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+    scores *= weights['genres']
+
+    # Personnes : cosinus des ensembles, calculé sur les seules cases non nulles
+    flat = scores.reshape(-1)
+    for kind, people in features['people'].items():
+        weight = weights.get(kind, 0)
+        if not weight:
+            continue
+        cells, shared = _shared_pairs(people, start, end, n)
+        counts = people['counts']
+        norms = np.sqrt(counts[start + cells // n] * counts[cells % n])
+        flat[cells] += weight * shared / norms
+
+    # Notoriété : départage seulement entre films déjà similaires
+    scores += (scores > 0) * (weights['quality'] * features['popularity'])
+
+    # Ni le film lui-même ni les titres non éligibles (séries, épisodes...)
+    scores *= features['eligible']
+    scores[np.arange(end - start), np.arange(start, end)] = 0
+    return scores
+
+
+def top_neighbors(scores, k):
+    """Indices et scores des k meilleurs voisins (score > 0) de chaque ligne, triés"""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return [([], []) for _ in range(scores.shape[0])]
+
+    if k < scores.shape[1]:
+        candidates = np.argpartition(scores, -k, axis=1)[:, -k:]
+    else:
+        candidates = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    values = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-values, axis=1, kind='stable')
+    candidates = np.take_along_axis(candidates, order, axis=1)
+    values = np.take_along_axis(values, order, axis=1)
+
+    result = []
+    for row_idx, row_values in zip(candidates, values):
+        keep = row_values > 0
+        result.append((row_idx[keep], row_values[keep]))
+    return result
+
+
+def compute_neighbors(features, top_k, weights, batch_cells):
+    """Produit (mid, [(voisin, score), ...]) pour chaque film, par lots vectorisés"""
+    mids = features['mids']
+    n = len(mids)
+    batch = max(1, int(batch_cells) // max(n, 1))
+
+    for start in range(0, n, batch):
+        end = min(n, start + batch)
+        scores = score_batch(features, start, end, weights)
+        for offset, (idx, values) in enumerate(top_neighbors(scores, top_k)):
+            yield mids[start + offset], [(mids[i], float(v)) for i, v in zip(idx, values)]
+
+
+def build_similar_movies(conn, config=None, source=None):
+    """(Re)crée movie_neighbors ; retourne le nombre de films ayant des voisins"""
+    config = config or get_similarity_settings()
+    features = load_features(conn, source)
+
+    conn.execute("BEGIN")
+    try:
+        conn.execute("DROP TABLE IF EXISTS movie_neighbors")
+        conn.execute("""
+            CREATE TABLE movie_neighbors (
+                mid TEXT NOT NULL,
+                rank INTEGER NOT NULL,
+                neighbor TEXT NOT NULL,
+                score REAL NOT NULL,
+                PRIMARY KEY (mid, rank)
+            ) WITHOUT ROWID
+        """)
+
+        total = 0
+        for mid, neighbors in compute_neighbors(features, int(config['top_k']),
+                                                config['weights'], config['batch_cells']):
+            if not neighbors:
+                continue
+            conn.executemany(
+                "INSERT INTO movie_neighbors (mid, rank, neighbor, score) VALUES (?, ?, ?, ?)",
+                [(mid, rank, neighbor, round(score, 4)) for rank, (neighbor, score) in enumerate(neighbors)]
+            )
+            total += 1
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return total
+
+
+def rebuild_similar_movies(config=None):
+    """Recalcule les voisins sur une connexion en écriture (après chaque import)"""
+    conn = sqlite_pool.open_writable_connection()
+    try:
+        total = build_similar_movies(conn, config)
+        data_version.bump_sqlite_version(conn, 'build_similar_movies')
+        return total
+    finally:
+        conn.close()
+
+
+def fetch_similar(conn, movie_id, limit=4, source=None):
+    """Voisins précalculés d'un film (une lecture sur la clé primaire), au format carte"""
+    cursor = conn.execute(f"""
+        SELECT c.mid as id, c.title, c.year, c.rating
+        FROM movie_neighbors n
+        JOIN {source or movie_cards.get_card_source()} c ON c.mid = n.neighbor
+        WHERE n.mid = ?
+        ORDER BY n.rank
+        LIMIT ?
+    """, (movie_id, limit))
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def estimate_batch_memory(n, batch_cells):
+    """Mémoire approximative d'un lot (Mo) : quelques matrices lot x n en float32"""
+    batch = max(1, int(batch_cells) // max(n, 1))
+    return math.ceil(batch * n * 4 * 6 / (1024 ** 2))
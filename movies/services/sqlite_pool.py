@@ -0,0 +1,149 @@
+"""
+Pool de connexions SQLite en lecture seule pour les services (une connexion par thread)
+"""
+import os
+import sqlite3
+import threading
+import weakref
+from pathlib import Path
+from django.conf import settings
+
+# Valeurs par défaut, surchargeables via settings.SQLITE_POOL
+DEFAULT_POOL_SETTINGS = {
+    'mmap_size': 256 * 1024 * 1024,   # Octets mappés en mémoire
+    'cache_size_kib': 64 * 1024,      # Cache de pages par connexion (Kio)
+    'cached_statements': 256,         # Requêtes préparées conservées par connexion
+}
+
+_local = threading.local()
+_lock = threading.Lock()
+_connections = weakref.WeakSet()
+_generation = 0
+_stats = {'hits': 0, 'misses': 0, 'reopened': 0}
+
+
+class PooledConnection:
+    """Connexion du pool : close() la rend au pool au lieu de la fermer"""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.pid = os.getpid()
+
+    def close(self):
+        """Rend la connexion au pool (elle reste ouverte pour le thread)"""
+        pass
+
+    def really_close(self):
+        """Ferme réellement la connexion SQLite sous-jacente"""
+        try:
+            self._conn.close()
+        except sqlite3.Error:
+            pass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def get_db_path():
+    """Chemin de la base SQLite utilisée par le site"""
+    return Path(settings.BASE_DIR) / "data" / "imdb.db"
+
+
+def get_pool_settings():
+    """Paramètres du pool (défauts + settings.SQLITE_POOL)"""
+    config = dict(DEFAULT_POOL_SETTINGS)
+    config.update(getattr(settings, 'SQLITE_POOL', {}))
+    return config
+
+
+def _open_connection(db_path, config):
+    """Ouvre une connexion en lecture seule et applique les PRAGMA une seule fois"""
+    conn = sqlite3.connect(
+        f"{db_path.as_uri()}?mode=ro",
+        uri=True,
+        cached_statements=int(config['cached_statements']),
+        check_same_thread=False  # Utilisée par un seul thread, mais fermable par close_all()
+    )
+    conn.row_factory = sqlite3.Row  # Retourne des dictionnaires
+    conn.execute(f"PRAGMA mmap_size = {int(config['mmap_size'])}")
+    conn.execute(f"PRAGMA cache_size = -{int(config['cache_size_kib'])}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+def get_connection():
+    """Retourne la connexion du thread courant, ouverte si nécessaire"""
+    db_path = get_db_path()
+
+    if not db_path.exists():
+        raise FileNotFoundError(f"Base SQLite non trouvée : {db_path}")
+
+    # La clé change si le processus a forké, si le fichier a été remplacé
+    # ou si close_all() a été appelé : la connexion doit alors être rouverte
+    st = db_path.stat()
+    key = (os.getpid(), st.st_dev, st.st_ino, _generation)
+
+    entry = getattr(_local, 'entry', None)
+    if entry and entry[0] == key:
+        with _lock:
+            _stats['hits'] += 1
+        return entry[1]
+
+    if entry:
+        # Ne jamais fermer une connexion héritée d'un processus parent
+        if entry[0][0] == os.getpid():
+            entry[1].really_close()
+        with _lock:
+            _stats['reopened'] += 1
+
+    pooled = PooledConnection(_open_connection(db_path, get_pool_settings()))
+    _local.entry = (key, pooled)
+
+    with _lock:
+        _stats['misses'] += 1
+        _connections.add(pooled)
+
+    return pooled
+
+
+def get_pool_stats():
+    """Compteurs du pool (hits / misses) et connexions ouvertes"""
+    with _lock:
+        stats = dict(_stats)
+        stats['open_connections'] = sum(1 for c in _connections if c.pid == os.getpid())
+    total = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / total, 4) if total else 0
+    stats['pid'] = os.getpid()
+    return stats
+
+
+def close_all():
+    """Ferme toutes les connexions du processus (arrêt, fichier remplacé)"""
+    global _generation
+    with _lock:
+        _generation += 1
+        connections = list(_connections)
+        _connections.clear()
+    for pooled in connections:
+        if pooled.pid == os.getpid():
+            pooled.really_close()
+
+
+def open_writable_connection():
+    """Connexion en écriture, hors pool (commandes de construction des tables dérivées)"""
+    db_path = get_db_path()
+
+    if not db_path.exists():
+        raise FileNotFoundError(f"Base SQLite non trouvée : {db_path}")
+
+    conn = sqlite3.connect(str(db_path))
+    conn.row_factory = sqlite3.Row
+    return conn
@@ -0,0 +1,133 @@
+"""
+Registre du schéma SQLite : introspection faite une seule fois (ou quand le
+fichier de la base change) et requêtes dépendantes des colonnes précompilées
+"""
+import threading
+
+from . import sqlite_pool, person_summary
+
+# Tables dont les colonnes conditionnent des requêtes du site
+INTROSPECTED_TABLES = ['movies', 'persons', 'principals', 'characters']
+
+_lock = threading.Lock()
+_registry = None
+
+
+class SchemaRegistry:
+    """Colonnes connues de la base et requêtes SQL prêtes à l'emploi"""
+
+    def __init__(self, columns, fingerprint=None, tables=()):
+        self.columns = columns
+        self.fingerprint = fingerprint
+        self.tables = set(tables)
+        self._compile_person_search()
+        self._compile_movie_search()
+        self.principals_has_characters = 'characters' in self.columns_of('principals')
+
+    def columns_of(self, table):
+        return self.columns.get(table, [])
+
+    def has_table(self, table):
+        return table in self.tables
+
+    def _compile_person_search(self):
+        """Recherche de personnes : colonne du nom et années disponibles"""
+        columns = self.columns_of('persons')
+        self.person_search_sql = None
+        self.person_search_has_summary = False
+        if not columns:
+            return
+
+        if 'primaryName' in columns:
+            select_fields = "p.pid as id, p.primaryName as name"
+            where_field = "primaryName"
+        elif 'name' in columns:
+            select_fields = "p.pid as id, p.name"
+            where_field = "name"
+        else:
+            # Prendre la première colonne de texte disponible
+            select_fields = "p.pid as id"
+            where_field = columns[1] if len(columns) > 1 else columns[0]
+
+        # Ajouter les années si elles existent
+        if 'birthYear' in columns:
+            select_fields += ", p.birthYear"
+        if 'deathYear' in columns:
+            select_fields += ", p.deathYear"
+
+        # Résumé précalculé (build_person_summary) : catégorie et films dans la même lecture
+        join_sql = ""
+        self.person_search_has_summary = self.has_table('person_summary')
+        if self.person_search_has_summary:
+            select_fields += f", {person_summary.SUMMARY_SELECT}"
+            join_sql = person_summary.SUMMARY_JOIN
+
+        self.person_search_sql = f"""
+            SELECT {select_fields}
+            FROM persons p
+            {join_sql}
+            WHERE p.{where_field} LIKE ?
+            LIMIT ?
+        """
+
+    def _compile_movie_search(self):
+        """Recherche de films : colonnes de titre disponibles (OR entre elles)"""
+        columns = self.columns_of('movies')
+        title_fields = [f for f in ('primaryTitle', 'originalTitle', 'title') if f in columns]
+
+        self.movie_search_fields = len(title_fields)
+        self.movie_search_sql = None
+        if not title_fields:
+            return
+
+        where_sql = " OR ".join(f"{field} LIKE ?" for field in title_fields)
+        self.movie_search_sql = f"""
+            SELECT
+                mid as id,
+                {title_fields[0]} as title,
+                startYear as year,
+                titleType
+            FROM movies
+            WHERE {where_sql}
+            LIMIT ?
+        """
+
+
+def _file_fingerprint():
+    """Empreinte du fichier de la base : change si elle est remplacée ou modifiée"""
+    st = sqlite_pool.get_db_path().stat()
+    return (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def build_registry(conn):
+    """Introspecte la base et construit un nouveau registre"""
+    columns = {}
+    for table in INTROSPECTED_TABLES:
+        rows = conn.execute(f"PRAGMA table_info({table})").fetchall()
+        columns[table] = [col[1] for col in rows]
+    tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")]
+    return SchemaRegistry(columns, tables=tables)
+
+
+def get_schema():
+    """Registre courant, reconstruit uniquement si le fichier de la base a changé"""
+    global _registry
+    fingerprint = _file_fingerprint()
+
+    registry = _registry
+    if registry is not None and registry.fingerprint == fingerprint:
+        return registry
+
+    with _lock:
+        if _registry is None or _registry.fingerprint != fingerprint:
+            registry = build_registry(sqlite_pool.get_connection())
+            registry.fingerprint = fingerprint
+            _registry = registry
+        return _registry
+
+
+def reset_schema():
+    """Oublie le registre (il sera reconstruit au prochain appel)"""
+    global _registry
+    with _lock:
+        _registry = None
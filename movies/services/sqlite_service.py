@@ -5,163 +5,37 @@ import sqlite3
 from pathlib import Path
 from django.conf import settings
 import json
+import base64
+import hashlib
+import copy
+
+from . import sqlite_pool, sqlite_schema, stats_snapshot, random_sampler, movie_cards, similarity, service_cache, detail_docs, degraded
 
 def get_sqlite_connection():
-    """Établit une connexion à la base SQLite"""
-    db_path = Path(settings.BASE_DIR) / "data" / "imdb.db"
-    
-    if not db_path.exists():
-        raise FileNotFoundError(f"Base SQLite non trouvée : {db_path}")
-    
-    conn = sqlite3.connect(str(db_path))
-    conn.row_factory = sqlite3.Row  # Retourne des dictionnaires
-    return conn
-def get_movie_with_characters(movie_id):
-    """Récupère un film avec casting et personnages depuis SQLite"""
+    """Connexion SQLite (lecture seule) issue du pool du thread courant"""
+    return sqlite_pool.get_connection()
+
+def get_precomputed_movie(movie_id):
+    """Film précalculé de movie_detail_doc (même forme que get_movie_with_characters), None s'il est absent"""
+    try:
+        return detail_docs.fetch_detail(get_sqlite_connection(), movie_id)
+    except Exception as e:
+        print(f"Erreur dans get_precomputed_movie: {e}")
+        return None
+
+def get_movie_with_characters(movie_id, precomputed=True):
+    """
+    Récupère un film avec casting et personnages depuis SQLite
+    precomputed=False : assemblage depuis les tables, sans relire movie_detail_doc
+    """
     try:
         conn = get_sqlite_connection()
-        cursor = conn.cursor()
-        
-        # 1. Informations de base du film
-        cursor.execute("""
-            SELECT 
-                m.mid,
-                m.primaryTitle,
-                m.startYear,
-                m.runtimeMinutes,
-                m.titleType,
-                m.language,
-                m.isAdult,
-                r.averageRating,
-                r.numVotes
-            FROM movies m
-            LEFT JOIN ratings r ON m.mid = r.mid
-            WHERE m.mid = ?
-        """, (movie_id,))
-        
-        row = cursor.fetchone()
-        if not row:
-            conn.close()
-            return None
-        
-        movie = {
-            'id': row['mid'],
-            'title': row['primaryTitle'],
-            'year': row['startYear'],
-            'runtime': row['runtimeMinutes'],
-            'titleType': row['titleType'],
-            'language': row['language'],
-            'isAdult': bool(row['isAdult']),
-            'rating': row['averageRating'],
-            'votes': row['numVotes'],
-            'genres': [],
-            'cast': [],
-            'directors': [],
-            'writers': [],
-            'titles': []
-        }
-        
-        # 2. Genres
-        cursor.execute("SELECT genre FROM genres WHERE mid = ?", (movie_id,))
-        movie['genres'] = [row[0] for row in cursor.fetchall()]
-        
-        # 3. Réalisateurs
-        cursor.execute("""
-            SELECT p.pid, p.primaryName, p.birthYear
-            FROM directors d
-            JOIN persons p ON d.pid = p.pid
-            WHERE d.mid = ?
-        """, (movie_id,))
-        for row in cursor.fetchall():
-            movie['directors'].append({
-                'id': row['pid'],
-                'name': row['primaryName'],
-                'birthYear': row['birthYear']
-            })
-        
-        # 4. Scénaristes
-        cursor.execute("""
-            SELECT p.pid, p.primaryName, w.category
-            FROM writers w
-            JOIN persons p ON w.pid = p.pid
-            WHERE w.mid = ?
-        """, (movie_id,))
-        for row in cursor.fetchall():
-            movie['writers'].append({
-                'id': row['pid'],
-                'name': row['primaryName'],
-                'category': row['category']
-            })
-        
-        # 5. CASTING COMPLET AVEC PERSONNAGES
-        cursor.execute("""
-            SELECT 
-                p.pid,
-                p.primaryName,
-                p.birthYear,
-                p.deathYear,
-                pr.category,
-                pr.ordering
-            FROM principals pr
-            JOIN persons p ON pr.pid = p.pid
-            WHERE pr.mid = ?
-            ORDER BY pr.ordering
-        """, (movie_id,))
-        
-        principals = cursor.fetchall()
-        
-        for principal in principals:
-            pid = principal['pid']
-            
-            # Récupérer les personnages
-            cursor.execute("""
-                SELECT character 
-                FROM characters 
-                WHERE mid = ? AND pid = ?
-            """, (movie_id, pid))
-            
-            characters = [row['character'] for row in cursor.fetchall()]
-            
-            # Si pas de personnages dans characters, essayer depuis principals
-            if not characters:
-                # Vérifier si characters est stocké dans principals
-                cursor.execute("PRAGMA table_info(principals)")
-                columns = [col[1] for col in cursor.fetchall()]
-                
-                if 'characters' in columns:
-                    cursor.execute("SELECT characters FROM principals WHERE mid = ? AND pid = ?", 
-                                 (movie_id, pid))
-                    chars_row = cursor.fetchone()
-                    if chars_row and chars_row['characters']:
-                        characters = [chars_row['characters']]
-            
-            # Créer l'entrée de casting
-            cast_member = {
-                'id': pid,
-                'name': principal['primaryName'],
-                'characters': characters,
-                'ordering': principal['ordering'],
-                'category': principal['category'],
-                'birthYear': principal['birthYear'],
-                'deathYear': principal['deathYear']
-            }
-            
-            movie['cast'].append(cast_member)
-        
-        # 6. Titres alternatifs
-        cursor.execute("""
-            SELECT region, title, language
-            FROM titles
-            WHERE mid = ? AND title != ?
-        """, (movie_id, movie['title']))
-        
-        for row in cursor.fetchall():
-            movie['titles'].append({
-                'region': row['region'],
-                'title': row['title'],
-                'language': row['language']
-            })
-        
+        # Document précalculé (build_movie_detail_docs) : une lecture au lieu des jointures
+        movie = None
+        if precomputed and sqlite_schema.get_schema().has_table(detail_docs.TABLE):
+            movie = detail_docs.fetch_detail(conn, movie_id)
+        if movie is None:
+            movie = load_movie_details(conn, movie_id)
         conn.close()
         return movie
         
@@ -170,130 +44,188 @@ def get_movie_with_characters(movie_id):
         import traceback
         traceback.print_exc()
         return None
+
+def load_movie_details(conn, movie_id):
+    """
+    Charge le détail complet d'un film en un nombre fixe de requêtes
+    (film, genres, réalisateurs, scénaristes, casting, personnages, titres),
+    quel que soit le nombre de membres du casting
+    """
+    cursor = conn.cursor()
+    
+    # 1. Informations de base du film
+    cursor.execute("""
+        SELECT 
+            m.mid,
+            m.primaryTitle,
+            m.startYear,
+            m.runtimeMinutes,
+            m.titleType,
+            m.language,
+            m.isAdult,
+            r.averageRating,
+            r.numVotes
+        FROM movies m
+        LEFT JOIN ratings r ON m.mid = r.mid
+        WHERE m.mid = ?
+    """, (movie_id,))
+    
+    row = cursor.fetchone()
+    if not row:
+        return None
+    
+    movie = {
+        'id': row['mid'],
+        'title': row['primaryTitle'],
+        'year': row['startYear'],
+        'runtime': row['runtimeMinutes'],
+        'titleType': row['titleType'],
+        'language': row['language'],
+        'isAdult': bool(row['isAdult']),
+        'rating': row['averageRating'],
+        'votes': row['numVotes'],
+        'genres': [],
+        'cast': [],
+        'directors': [],
+        'writers': [],
+        'titles': []
+    }
+    
+    # 2. Genres
+    cursor.execute("SELECT genre FROM genres WHERE mid = ?", (movie_id,))
+    movie['genres'] = [row[0] for row in cursor.fetchall()]
+    
+    # 3. Réalisateurs
+    cursor.execute("""
+        SELECT p.pid, p.primaryName, p.birthYear
+        FROM directors d
+        JOIN persons p ON d.pid = p.pid
+        WHERE d.mid = ?
+    """, (movie_id,))
+    for row in cursor.fetchall():
+        movie['directors'].append({
+            'id': row['pid'],
+            'name': row['primaryName'],
+            'birthYear': row['birthYear']
+        })
+    
+    # 4. Scénaristes
+    cursor.execute("""
+        SELECT p.pid, p.primaryName, w.category
+        FROM writers w
+        JOIN persons p ON w.pid = p.pid
+        WHERE w.mid = ?
+    """, (movie_id,))
+    for row in cursor.fetchall():
+        movie['writers'].append({
+            'id': row['pid'],
+            'name': row['primaryName'],
+            'category': row['category']
+        })
+    
+    # 5. Casting complet
+    cursor.execute("""
+        SELECT 
+            p.pid,
+            p.primaryName,
+            p.birthYear,
+            p.deathYear,
+            pr.category,
+            pr.ordering
+        FROM principals pr
+        JOIN persons p ON pr.pid = p.pid
+        WHERE pr.mid = ?
+        ORDER BY pr.ordering
+    """, (movie_id,))
+    principals = cursor.fetchall()
+    
+    # 6. Tous les personnages du film en une requête, regroupés par personne
+    characters_by_pid = {}
+    if principals:
+        cursor.execute("SELECT pid, character FROM characters WHERE mid = ?", (movie_id,))
+        for row in cursor.fetchall():
+            characters_by_pid.setdefault(row['pid'], []).append(row['character'])
+    
+    # Si certains n'ont pas de personnages, essayer depuis principals.characters
+    fallback_by_pid = {}
+    if any(p['pid'] not in characters_by_pid for p in principals):
+        if sqlite_schema.get_schema().principals_has_characters:
+            cursor.execute("SELECT pid, characters FROM principals WHERE mid = ?", (movie_id,))
+            # Comme fetchone() : seule la première ligne de la personne compte
+            for row in cursor.fetchall():
+                fallback_by_pid.setdefault(row['pid'], row['characters'])
+    
+    for principal in principals:
+        pid = principal['pid']
+        
+        characters = list(characters_by_pid.get(pid, []))
+        if not characters and fallback_by_pid.get(pid):
+            characters = [fallback_by_pid[pid]]
+        
+        # Créer l'entrée de casting
+        movie['cast'].append({
+            'id': pid,
+            'name': principal['primaryName'],
+            'characters': characters,
+            'ordering': principal['ordering'],
+            'category': principal['category'],
+            'birthYear': principal['birthYear'],
+            'deathYear': principal['deathYear']
+        })
+    
+    # 7. Titres alternatifs
+    cursor.execute("""
+        SELECT region, title, language
+        FROM titles
+        WHERE mid = ? AND title != ?
+    """, (movie_id, movie['title']))
+    
+    for row in cursor.fetchall():
+        movie['titles'].append({
+            'region': row['region'],
+            'title': row['title'],
+            'language': row['language']
+        })
+    
+    return movie
         
 def get_movie_stats():
-    """Récupère des statistiques depuis SQLite"""
+    """Récupère des statistiques depuis SQLite (instantané stats_snapshot)"""
     try:
-        conn = get_sqlite_connection()
-        cursor = conn.cursor()
-        
-        stats = {}
-        
-        # 1. Nombre total de films
-        cursor.execute("SELECT COUNT(*) FROM movies")
-        stats['total_movies'] = cursor.fetchone()[0]
-        
-        # 2. Nombre total de personnes
-        cursor.execute("SELECT COUNT(*) FROM persons")
-        stats['total_persons'] = cursor.fetchone()[0]
-        
-        # 3. Film le mieux noté
-        cursor.execute("""
-            SELECT m.mid, m.primaryTitle, r.averageRating 
-            FROM movies m
-            JOIN ratings r ON m.mid = r.mid
-            WHERE r.averageRating IS NOT NULL
-            ORDER BY r.averageRating DESC
-            LIMIT 1
-        """)
-        best_movie = cursor.fetchone()
-        stats['best_movie'] = {
-            'id': best_movie[0] if best_movie else None,
-            'title': best_movie[1] if best_movie else 'N/A',
-            'rating': float(best_movie[2]) if best_movie and best_movie[2] else 0
+        snapshot = stats_snapshot.get_snapshot()
+        
+        return {
+            'total_movies': snapshot['total_movies'],
+            'total_persons': snapshot['total_persons'],
+            'best_movie': dict(snapshot['best_movie']),
+            'total_genres': snapshot['total_genres'],
+            'latest_year': snapshot['latest_year'] if snapshot['latest_year'] else 'N/A',
+            'earliest_year': snapshot['earliest_year'] if snapshot['earliest_year'] else '1900',
+            'avg_rating': snapshot['avg_rating'],
+            'min_rating': snapshot['min_rating'],
+            'max_rating': snapshot['max_rating'],
+            'movies_by_type': copy.deepcopy(snapshot['movies_by_type'])
         }
         
-        # 4. Nombre de genres différents
-        cursor.execute("SELECT COUNT(DISTINCT genre) FROM genres")
-        stats['total_genres'] = cursor.fetchone()[0]
-        
-        # 5. Année du film le plus récent
-        cursor.execute("""
-            SELECT MAX(startYear) FROM movies 
-            WHERE startYear IS NOT NULL AND startYear != '\\N'
-        """)
-        latest_year = cursor.fetchone()[0]
-        stats['latest_year'] = latest_year if latest_year else 'N/A'
-        
-        # 6. Année du film le plus ancien
-        cursor.execute("""
-            SELECT MIN(startYear) FROM movies 
-            WHERE startYear IS NOT NULL AND startYear != '\\N'
-        """)
-        earliest_year = cursor.fetchone()[0]
-        stats['earliest_year'] = earliest_year if earliest_year else '1900'
-        
-        # 7. Note moyenne
-        cursor.execute("SELECT AVG(averageRating) FROM ratings")
-        avg_rating = cursor.fetchone()[0]
-        stats['avg_rating'] = float(avg_rating) if avg_rating else 0
-        
-        # 8. Note minimale
-        cursor.execute("SELECT MIN(averageRating) FROM ratings WHERE averageRating > 0")
-        min_rating = cursor.fetchone()[0]
-        stats['min_rating'] = float(min_rating) if min_rating else 0
-        
-        # 9. Note maximale
-        cursor.execute("SELECT MAX(averageRating) FROM ratings")
-        max_rating = cursor.fetchone()[0]
-        stats['max_rating'] = float(max_rating) if max_rating else 10
-        
-        # 10. Nombre de films par type
-        cursor.execute("""
-            SELECT titleType, COUNT(*) as count 
-            FROM movies 
-            GROUP BY titleType 
-            ORDER BY count DESC
-        """)
-        stats['movies_by_type'] = [
-            {'type': row[0], 'count': row[1]} 
-            for row in cursor.fetchall()
-        ]
-        
-        conn.close()
-        return stats
-        
     except Exception as e:
         return {'error': str(e)}
 
+@service_cache.cached('extended_stats', ttl=600, cache_if=lambda stats: 'error' not in stats)
 def get_extended_stats():
     """Statistiques étendues pour la page stats"""
     try:
-        conn = get_sqlite_connection()
-        cursor = conn.cursor()
-        
         stats = get_movie_stats()  # Récupérer les stats de base
+        if 'error' in stats:
+            return stats
+        
+        snapshot = stats_snapshot.get_snapshot()
         
         # Distribution par genre
-        cursor.execute("""
-            SELECT g.genre, COUNT(*) as count
-            FROM genres g
-            JOIN movies m ON g.mid = m.mid
-            GROUP BY g.genre
-            ORDER BY count DESC
-            LIMIT 15
-        """)
-        stats['genres_distribution'] = [
-            {'genre': row[0], 'count': row[1]}
-            for row in cursor.fetchall()
-        ]
+        stats['genres_distribution'] = copy.deepcopy(snapshot['genres_distribution'][:15])
         
         # Acteurs les plus prolifiques
-        cursor.execute("""
-            SELECT p.primaryName, COUNT(*) as movie_count
-            FROM principals pr
-            JOIN persons p ON pr.pid = p.pid
-            WHERE pr.category IN ('actor', 'actress')
-            GROUP BY p.pid, p.primaryName
-            ORDER BY movie_count DESC
-            LIMIT 20
-        """)
-        stats['top_actors_raw'] = [
-            {'name': row[0], 'movie_count': row[1]}
-            for row in cursor.fetchall()
-        ]
+        stats['top_actors_raw'] = copy.deepcopy(snapshot['top_actors_raw'])
         
-        conn.close()
         return stats
         
     except Exception as e:
@@ -305,45 +237,23 @@ def get_filtered_movies(genre='', year_from='', year_to='', min_rating='', sort=
         conn = get_sqlite_connection()
         cursor = conn.cursor()
         
-        # Construire la requête SQL
-        query = """
+        # Construire la requête SQL (cartes de films : genres déjà regroupés)
+        query = f"""
             SELECT 
-                m.mid as id,
-                m.primaryTitle as title,
-                m.startYear as year,
-                m.titleType,
-                r.averageRating as rating,
-                r.numVotes as votes,
-                GROUP_CONCAT(DISTINCT g.genre) as genres_str
-            FROM movies m
-            LEFT JOIN ratings r ON m.mid = r.mid
-            LEFT JOIN genres g ON m.mid = g.mid
+                c.mid as id,
+                c.title,
+                c.year,
+                c.titleType,
+                c.rating,
+                c.votes,
+                c.genres as genres_str
+            FROM {movie_cards.get_card_source()} c
             WHERE 1=1
         """
         
-        params = []
-        
-        # Filtre par genre
-        if genre:
-            query += " AND EXISTS (SELECT 1 FROM genres g2 WHERE g2.mid = m.mid AND g2.genre = ?)"
-            params.append(genre)
-        
-        # Filtre par année
-        if year_from and year_from.isdigit():
-            query += " AND m.startYear >= ?"
-            params.append(int(year_from))
-        
-        if year_to and year_to.isdigit():
-            query += " AND m.startYear <= ?"
-            params.append(int(year_to))
-        
-        # Filtre par note minimale
-        if min_rating and min_rating.replace('.', '', 1).isdigit():
-            query += " AND r.averageRating >= ?"
-            params.append(float(min_rating))
-        
-        # Grouper par film
-        query += " GROUP BY m.mid, m.primaryTitle, m.startYear, m.titleType, r.averageRating, r.numVotes"
+        # Filtres (genre, années, note minimale)
+        where_sql, params = build_movie_filters(genre, year_from, year_to, min_rating)
+        query += where_sql
         
         # Trier
         sort_mapping = {
@@ -390,6 +300,171 @@ def get_filtered_movies(genre='', year_from='', year_to='', min_rating='', sort=
         print(f"Erreur dans get_filtered_movies: {e}")
         return []
 
+# Tri des listes : expression de clé (NULL remplacé par une valeur plus petite
+# que toutes les autres pour garder l'ordre SQLite) et sens
+# (mêmes expressions que les index de movie_card)
+MOVIE_SORT_KEYS = {
+    '-rating': ('COALESCE(c.rating, -1)', 'DESC'),
+    'rating': ('COALESCE(c.rating, -1)', 'ASC'),
+    '-year': ('COALESCE(c.year, -1)', 'DESC'),
+    'year': ('COALESCE(c.year, -1)', 'ASC'),
+    'title': ("COALESCE(c.title, '')", 'ASC'),
+    '-title': ("COALESCE(c.title, '')", 'DESC'),
+    '-votes': ('COALESCE(c.votes, -1)', 'DESC')
+}
+DEFAULT_MOVIE_SORT = '-rating'
+
+def build_movie_filters(genre='', year_from='', year_to='', min_rating=''):
+    """Clause WHERE (à ajouter après « WHERE 1=1 », cartes de films c) et paramètres des filtres de liste"""
+    where_sql = ""
+    params = []
+    
+    # Filtre par genre
+    if genre:
+        where_sql += " AND EXISTS (SELECT 1 FROM genres g2 WHERE g2.mid = c.mid AND g2.genre = ?)"
+        params.append(genre)
+    
+    # Filtre par année
+    if year_from and year_from.isdigit():
+        where_sql += " AND c.year >= ?"
+        params.append(int(year_from))
+    
+    if year_to and year_to.isdigit():
+        where_sql += " AND c.year <= ?"
+        params.append(int(year_to))
+    
+    # Filtre par note minimale
+    if min_rating and min_rating.replace('.', '', 1).isdigit():
+        where_sql += " AND c.rating >= ?"
+        params.append(float(min_rating))
+    
+    return where_sql, params
+
+def encode_cursor(data):
+    """Jeton de pagination opaque (JSON encodé en base64 URL)"""
+    raw = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """Décode un jeton de pagination, None s'il est absent ou invalide"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        data = json.loads(raw)
+        return data if isinstance(data, dict) else None
+    except (ValueError, TypeError):
+        return None
+
+def _filters_signature(genre, year_from, year_to, min_rating):
+    """Empreinte courte des filtres, pour invalider un jeton si les filtres changent"""
+    raw = json.dumps([genre, year_from, year_to, min_rating]).encode('utf-8')
+    return hashlib.md5(raw).hexdigest()[:8]
+
+def get_filtered_movies_page(genre='', year_from='', year_to='', min_rating='',
+                             sort='-rating', cursor=None, page_size=20):
+    """
+    Page de films filtrés par pagination keyset (« seek ») : le jeton contient
+    la clé de tri et l'id de la dernière (ou première) ligne vue, si bien que
+    la page N coûte autant que la page 1. Retourne les films et les jetons
+    des pages suivante / précédente.
+    """
+    if sort not in MOVIE_SORT_KEYS:
+        sort = DEFAULT_MOVIE_SORT
+    sort_expr, direction = MOVIE_SORT_KEYS[sort]
+    signature = _filters_signature(genre, year_from, year_to, min_rating)
+    
+    # Un jeton d'un autre tri ou d'autres filtres ramène à la première page
+    position = decode_cursor(cursor)
+    if position and (position.get('s') != sort or position.get('f') != signature
+                     or 'k' not in position or 'id' not in position):
+        position = None
+    
+    backwards = bool(position and position.get('d') == 'prev')
+    page_number = position.get('p', 1) if position else 1
+    
+    try:
+        conn = get_sqlite_connection()
+        cursor_db = conn.cursor()
+        
+        where_sql, params = build_movie_filters(genre, year_from, year_to, min_rating)
+        
+        # En arrière, on parcourt dans le sens inverse puis on retourne la page
+        scan_direction = direction
+        if backwards:
+            scan_direction = 'ASC' if direction == 'DESC' else 'DESC'
+        
+        if position:
+            operator = '<' if scan_direction == 'DESC' else '>'
+            where_sql += f" AND ({sort_expr}, c.mid) {operator} (?, ?)"
+            params += [position['k'], position['id']]
+        
+        cursor_db.execute(f"""
+            SELECT 
+                {movie_cards.CARD_SELECT},
+                {sort_expr} as sort_key
+            FROM {movie_cards.get_card_source()} c
+            WHERE 1=1{where_sql}
+            ORDER BY sort_key {scan_direction}, c.mid {scan_direction}
+            LIMIT ?
+        """, params + [page_size + 1])
+        rows = [movie_cards.card_from_row(row) for row in cursor_db.fetchall()]
+        
+        # Une ligne de plus que demandé indique qu'il reste des films au-delà
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backwards:
+            rows.reverse()
+        
+        conn.close()
+        
+    except Exception as e:
+        print(f"Erreur dans get_filtered_movies_page: {e}")
+        return {'movies': [], 'number': 1, 'has_next': False, 'has_previous': False,
+                'next_cursor': None, 'previous_cursor': None, 'degraded': True}
+    
+    movies = []
+    for row in rows:
+        sort_key = row.pop('sort_key')
+        row['rating'] = row['rating'] or 0
+        row['votes'] = row['votes'] or 0
+        movies.append((sort_key, row))
+    
+    def make_cursor(entry, d, p):
+        return encode_cursor({'s': sort, 'f': signature, 'k': entry[0], 'id': entry[1]['id'], 'd': d, 'p': p})
+    
+    if backwards:
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, position is not None
+    
+    return {
+        'movies': [movie for _, movie in movies],
+        'number': page_number,
+        'has_next': bool(has_next and movies),
+        'has_previous': bool(has_previous and movies and page_number > 1),
+        'next_cursor': make_cursor(movies[-1], 'next', page_number + 1) if has_next and movies else None,
+        'previous_cursor': make_cursor(movies[0], 'prev', page_number - 1) if has_previous and movies else None,
+    }
+
+def count_filtered_movies(genre='', year_from='', year_to='', min_rating=''):
+    """Nombre de films correspondant aux filtres (sans tri, sans genres concaténés)"""
+    try:
+        conn = get_sqlite_connection()
+        cursor = conn.cursor()
+        
+        where_sql, params = build_movie_filters(genre, year_from, year_to, min_rating)
+        
+        cursor.execute(f"SELECT COUNT(*) FROM {movie_cards.get_card_source()} c WHERE 1=1{where_sql}", params)
+        total = cursor.fetchone()[0]
+        
+        conn.close()
+        return total
+        
+    except Exception as e:
+        print(f"Erreur dans count_filtered_movies: {e}")
+        return 0
+
 def get_all_genres():
     """Récupère tous les genres distincts"""
     try:
@@ -404,7 +479,7 @@ def get_all_genres():
         
     except Exception as e:
         print(f"Erreur dans get_all_genres: {e}")
-        return []
+        return degraded.DegradedList()
 
 def get_movie_basic_info(movie_id):
     """Récupère les informations de base d'un film depuis SQLite"""
@@ -470,15 +545,14 @@ def get_similar_movies(movie_id, genres=None, limit=4):
         
         # Trouver des films avec au moins un genre en commun
         query = """
-            SELECT DISTINCT m.mid as id, m.primaryTitle as title, m.startYear as year, r.averageRating as rating
-            FROM movies m
-            JOIN genres g ON m.mid = g.mid
-            LEFT JOIN ratings r ON m.mid = r.mid
+            SELECT DISTINCT c.mid as id, c.title, c.year, c.rating
+            FROM {} c
+            JOIN genres g ON c.mid = g.mid
             WHERE g.genre IN ({})
-              AND m.mid != ?
-            ORDER BY r.averageRating DESC
+              AND c.mid != ?
+            ORDER BY c.rating DESC
             LIMIT ?
-        """.format(','.join(['?'] * len(genres)))
+        """.format(movie_cards.get_card_source(), ','.join(['?'] * len(genres)))
         
         params = genres + [movie_id, limit]
         cursor.execute(query, params)
@@ -497,6 +571,10 @@ def get_similar_movies(movie_id, genres=None, limit=4):
 def get_top_actors(limit=10):
     """Récupère les acteurs les plus prolifiques"""
     try:
+        # Les premiers du classement sont dans l'instantané des statistiques
+        if limit <= stats_snapshot.TOP_ACTORS_SIZE:
+            return copy.deepcopy(stats_snapshot.get_snapshot()['top_actors'][:limit])
+        
         conn = get_sqlite_connection()
         cursor = conn.cursor()
         
@@ -529,7 +607,7 @@ def get_top_actors(limit=10):
         
     except Exception as e:
         print(f"Erreur dans get_top_actors: {e}")
-        return []
+        return degraded.DegradedList()
 
 def search_persons(query, limit=20):
     """Recherche de personnes"""
@@ -582,23 +660,43 @@ def test_sqlite_connection():
         return False
 
 def get_similar_movies_sqlite(movie_id, genres=None, directors=None, limit=4):
-    """Récupère des films similaires depuis SQLite"""
+    """Récupère des films similaires depuis SQLite (genres / réalisateurs lus en base si non fournis)"""
     try:
         conn = get_sqlite_connection()
         cursor = conn.cursor()
         
+        # Voisins précalculés (build_similar_movies) : une lecture indexée
+        if sqlite_schema.get_schema().has_table('movie_neighbors'):
+            similar_movies = similarity.fetch_similar(conn, movie_id, limit)
+            if similar_movies:
+                if len(similar_movies) < limit:
+                    exclude = {movie_id} | {m['id'] for m in similar_movies}
+                    similar_movies += random_sampler.sample_movies('movies', limit - len(similar_movies), exclude)
+                conn.close()
+                return similar_movies
+        
         similar_movies = []
+        # Cartes de films : la note vient avec chaque ligne
+        card_source = movie_cards.get_card_source()
+        
+        # Genres et réalisateurs non fournis : lus ici (appel possible avant le chargement du film)
+        if genres is None:
+            cursor.execute("SELECT genre FROM genres WHERE mid = ?", (movie_id,))
+            genres = [row[0] for row in cursor.fetchall()]
+        if directors is None:
+            cursor.execute("SELECT pid FROM directors WHERE mid = ?", (movie_id,))
+            directors = [{'id': row[0]} for row in cursor.fetchall()]
         
         # Si on a des genres, chercher des films avec les mêmes genres
         if genres:
             placeholders = ','.join(['?' for _ in genres])
             query = f"""
-                SELECT DISTINCT m.mid as id, m.primaryTitle as title, m.startYear as year
-                FROM movies m
-                JOIN genres g ON m.mid = g.mid
+                SELECT DISTINCT c.mid as id, c.title, c.year, c.rating
+                FROM {card_source} c
+                JOIN genres g ON c.mid = g.mid
                 WHERE g.genre IN ({placeholders})
-                  AND m.mid != ?
-                  AND m.titleType = 'movie'
+                  AND c.mid != ?
+                  AND c.titleType = 'movie'
                 LIMIT ?
             """
             params = genres + [movie_id, limit * 2]
@@ -613,12 +711,12 @@ def get_similar_movies_sqlite(movie_id, genres=None, directors=None, limit=4):
             if director_ids:
                 placeholders = ','.join(['?' for _ in director_ids])
                 query = f"""
-                    SELECT DISTINCT m.mid as id, m.primaryTitle as title, m.startYear as year
-                    FROM movies m
-                    JOIN directors d ON m.mid = d.mid
+                    SELECT DISTINCT c.mid as id, c.title, c.year, c.rating
+                    FROM {card_source} c
+                    JOIN directors d ON c.mid = d.mid
                     WHERE d.pid IN ({placeholders})
-                      AND m.mid != ?
-                      AND m.titleType = 'movie'
+                      AND c.mid != ?
+                      AND c.titleType = 'movie'
                     LIMIT ?
                 """
                 params = director_ids + [movie_id, limit - len(similar_movies)]
@@ -627,29 +725,15 @@ def get_similar_movies_sqlite(movie_id, genres=None, directors=None, limit=4):
                 for row in cursor.fetchall():
                     similar_movies.append(dict(row))
         
-        # Si toujours pas assez, prendre des films aléatoires
+        # Si toujours pas assez, prendre des films aléatoires (tirage en O(k))
         if len(similar_movies) < limit:
-            query = """
-                SELECT m.mid as id, m.primaryTitle as title, m.startYear as year
-                FROM movies m
-                WHERE m.mid != ? AND m.titleType = 'movie'
-                ORDER BY RANDOM()
-                LIMIT ?
-            """
-            cursor.execute(query, (movie_id, limit - len(similar_movies)))
-            
-            for row in cursor.fetchall():
-                similar_movies.append(dict(row))
-        
-        # Ajouter les notes
-        for movie in similar_movies:
-            cursor.execute("SELECT averageRating FROM ratings WHERE mid = ?", (movie['id'],))
-            rating_row = cursor.fetchone()
-            movie['rating'] = rating_row[0] if rating_row else None
+            exclude = {movie_id} | {m['id'] for m in similar_movies}
+            for movie in random_sampler.sample_movies('movies', limit - len(similar_movies), exclude):
+                similar_movies.append(movie)
         
         conn.close()
         return similar_movies[:limit]
         
     except Exception as e:
         print(f"Erreur dans get_similar_movies_sqlite: {e}")
-        return []
\ No newline at end of file
+        return degraded.DegradedList()
\ No newline at end of file
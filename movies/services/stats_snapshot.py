@@ -0,0 +1,198 @@
+"""
+Instantané des statistiques globales (films, personnes, notes, genres, acteurs)
+
+Toutes les agrégations des pages accueil / liste / statistiques sont calculées
+en une poignée de passes et stockées dans la table stats_snapshot (une ligne,
+JSON) marquée par une version des données. Les vues n'en lisent qu'une ligne.
+Reconstruction après import : python manage.py build_stats_snapshot
+"""
+import hashlib
+import heapq
+import json
+import sqlite3
+import threading
+import time
+
+from . import sqlite_pool, sqlite_schema, movie_cards, data_version
+
+# Tailles conservées dans l'instantané (les services en découpent des tranches)
+TOP_RATED_SIZE = 50
+TOP_ACTORS_SIZE = 50
+TOP_ACTOR_ROLES_SIZE = 20
+
+_lock = threading.Lock()
+_loaded = None
+
+
+def build_snapshot(conn):
+    """Calcule toutes les statistiques (lecture seule) et retourne le dictionnaire"""
+    cursor = conn.cursor()
+    snapshot = {}
+
+    # 1. Films : total, types et bornes d'années en une passe
+    cursor.execute("""
+        SELECT
+            titleType,
+            COUNT(*) as count,
+            MIN(CASE WHEN startYear != '\\N' THEN startYear END),
+            MAX(CASE WHEN startYear != '\\N' THEN startYear END)
+        FROM movies
+        GROUP BY titleType
+        ORDER BY count DESC
+    """)
+    rows = cursor.fetchall()
+    snapshot['movies_by_type'] = [{'type': row[0], 'count': row[1]} for row in rows]
+    snapshot['total_movies'] = sum(row[1] for row in rows)
+    earliest = [row[2] for row in rows if row[2] is not None]
+    latest = [row[3] for row in rows if row[3] is not None]
+    snapshot['earliest_year'] = min(earliest) if earliest else None
+    snapshot['latest_year'] = max(latest) if latest else None
+
+    # 2. Personnes
+    cursor.execute("SELECT COUNT(*) FROM persons")
+    snapshot['total_persons'] = cursor.fetchone()[0]
+
+    # 3. Notes : moyenne, minimum (> 0) et maximum en une passe
+    cursor.execute("""
+        SELECT
+            AVG(averageRating),
+            MIN(CASE WHEN averageRating > 0 THEN averageRating END),
+            MAX(averageRating),
+            COUNT(*)
+        FROM ratings
+    """)
+    avg_rating, min_rating, max_rating, total_ratings = cursor.fetchone()
+    snapshot['avg_rating'] = float(avg_rating) if avg_rating else 0
+    snapshot['min_rating'] = float(min_rating) if min_rating else 0
+    snapshot['max_rating'] = float(max_rating) if max_rating else 10
+
+    # 4. Film le mieux noté
+    cursor.execute("""
+        SELECT m.mid, m.primaryTitle, r.averageRating
+        FROM movies m
+        JOIN ratings r ON m.mid = r.mid
+        WHERE r.averageRating IS NOT NULL
+        ORDER BY r.averageRating DESC
+        LIMIT 1
+    """)
+    best_movie = cursor.fetchone()
+    snapshot['best_movie'] = {
+        'id': best_movie[0] if best_movie else None,
+        'title': best_movie[1] if best_movie else 'N/A',
+        'rating': float(best_movie[2]) if best_movie and best_movie[2] else 0
+    }
+
+    # 5. Genres : nombre de genres distincts et distribution en une passe
+    cursor.execute("""
+        SELECT g.genre, COUNT(m.mid) as count
+        FROM genres g
+        LEFT JOIN movies m ON g.mid = m.mid
+        GROUP BY g.genre
+        ORDER BY count DESC
+    """)
+    rows = cursor.fetchall()
+    snapshot['total_genres'] = len(rows)
+    snapshot['genres_distribution'] = [
+        {'genre': row[0], 'count': row[1]}
+        for row in rows if row[1] > 0
+    ]
+
+    # 6. Acteurs : rôles, films distincts et note moyenne en une passe sur principals
+    cursor.execute("""
+        SELECT
+            p.primaryName,
+            COUNT(*) as roles,
+            COUNT(DISTINCT pr.mid) as movie_count,
+            AVG(r.averageRating) as avg_rating
+        FROM principals pr
+        JOIN persons p ON pr.pid = p.pid
+        LEFT JOIN ratings r ON pr.mid = r.mid
+        WHERE pr.category IN ('actor', 'actress')
+        GROUP BY p.pid, p.primaryName
+    """)
+    actors = cursor.fetchall()
+    snapshot['top_actors_raw'] = [
+        {'name': row[0], 'movie_count': row[1]}
+        for row in heapq.nlargest(TOP_ACTOR_ROLES_SIZE, actors, key=lambda row: row[1])
+    ]
+    snapshot['top_actors'] = [
+        {'name': row[0], 'movie_count': row[2], 'avg_rating': float(row[3]) if row[3] else None}
+        for row in heapq.nlargest(TOP_ACTORS_SIZE, (a for a in actors if a[2] >= 5), key=lambda row: row[2])
+    ]
+
+    # 7. Films les mieux notés (accueil et page statistiques)
+    snapshot['top_rated_movies'] = movie_cards.fetch_top_rated(conn, TOP_RATED_SIZE)
+
+    # Version des données : empreinte des volumes sources
+    source = [snapshot['total_movies'], snapshot['total_persons'], total_ratings, len(actors)]
+    snapshot['data_version'] = hashlib.sha1(json.dumps(source).encode('utf-8')).hexdigest()[:12]
+
+    return snapshot
+
+
+def save_snapshot(conn, snapshot):
+    """Écrit l'instantané dans la table stats_snapshot (remplace l'ancien)"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS stats_snapshot (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            data_version TEXT NOT NULL,
+            built_at TEXT NOT NULL,
+            payload TEXT NOT NULL
+        )
+    """)
+    conn.execute(
+        "INSERT OR REPLACE INTO stats_snapshot (id, data_version, built_at, payload) VALUES (1, ?, ?, ?)",
+        (snapshot['data_version'], time.strftime('%Y-%m-%d %H:%M:%S'), json.dumps(snapshot))
+    )
+    conn.commit()
+
+
+def rebuild_snapshot():
+    """Recalcule et enregistre l'instantané (à lancer après chaque import)"""
+    conn = sqlite_pool.open_writable_connection()
+    try:
+        snapshot = build_snapshot(conn)
+        save_snapshot(conn, snapshot)
+        data_version.bump_sqlite_version(conn, 'build_stats_snapshot')
+    finally:
+        conn.close()
+    reset_snapshot()
+    return snapshot
+
+
+def get_snapshot():
+    """
+    Instantané courant : une lecture d'une ligne, gardée en mémoire tant que
+    le fichier de la base ne change pas. Sans table stats_snapshot (import pas
+    encore suivi de build_stats_snapshot), il est calculé à la volée une fois.
+    """
+    global _loaded
+    fingerprint = sqlite_schema.get_schema().fingerprint
+
+    loaded = _loaded
+    if loaded is not None and loaded[0] == fingerprint:
+        return loaded[1]
+
+    with _lock:
+        if _loaded is None or _loaded[0] != fingerprint:
+            conn = sqlite_pool.get_connection()
+            try:
+                row = conn.execute("SELECT payload FROM stats_snapshot WHERE id = 1").fetchone()
+                snapshot = json.loads(row[0]) if row else None
+            except sqlite3.OperationalError:
+                snapshot = None
+
+            if snapshot is None:
+                print("stats_snapshot absent : statistiques calculées à la volée "
+                      "(lancer python manage.py build_stats_snapshot)")
+                snapshot = build_snapshot(conn)
+
+            _loaded = (fingerprint, snapshot)
+        return _loaded[1]
+
+
+def reset_snapshot():
+    """Oublie l'instantané en mémoire"""
+    global _loaded
+    with _lock:
+        _loaded = None
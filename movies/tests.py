@@ -0,0 +1,647 @@
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+from pymongo.errors import ConnectionFailure
+
+from .services import (conditional_get, count_service, degraded, mongo_breaker, mongo_schema,
+                       mongo_service, movie_cards, random_sampler, response_cache, service_cache,
+                       sqlite_pool, sqlite_schema, sqlite_service)
+
+
+class FakeCursor(list):
+    def sort(self, key, direction=1):
+        return FakeCursor(sorted(self, key=lambda doc: doc.get(key, 0), reverse=direction < 0))
+
+
+class FakeCollection:
+    """Collection en mémoire : égalité et $in, chaque find compte un aller-retour"""
+
+    def __init__(self, db, docs):
+        self.db = db
+        self.docs = docs
+
+    def _matches(self, doc, query):
+        for field, expected in query.items():
+            if isinstance(expected, dict) and '$in' in expected:
+                if doc.get(field) not in expected['$in']:
+                    return False
+            elif doc.get(field) != expected:
+                return False
+        return True
+
+    def find(self, query=None, projection=None):
+        self.db.round_trips += 1
+        return FakeCursor(doc for doc in self.docs if self._matches(doc, query or {}))
+
+    def find_one(self, query=None, projection=None):
+        self.db.round_trips += 1
+        return next((doc for doc in self.docs if self._matches(doc, query or {})), None)
+
+
+class FakeDatabase:
+    name = 'fake'
+
+    def __init__(self, collections):
+        self.round_trips = 0
+        self._collections = {name: FakeCollection(self, docs) for name, docs in collections.items()}
+
+    def list_collection_names(self):
+        return list(self._collections)
+
+    def __getitem__(self, name):
+        return self._collections.get(name) or FakeCollection(self, [])
+
+    def __getattr__(self, name):
+        return self[name]
+
+
+def make_database(cast_size):
+    """Film tt1 avec un réalisateur, un scénariste et cast_size acteurs ayant un personnage"""
+    actors = [f"nm{i}" for i in range(cast_size)]
+    return FakeDatabase({
+        'movies': [{'mid': 'tt1', 'primaryTitle': 'Film', 'startYear': 2000}],
+        'genres': [{'mid': 'tt1', 'genre': 'Drama'}],
+        'ratings': [{'mid': 'tt1', 'averageRating': 7.5, 'numVotes': 100}],
+        'directors': [{'mid': 'tt1', 'pid': 'nmd'}],
+        'writers': [{'mid': 'tt1', 'pid': 'nmw'}],
+        'principals': [{'mid': 'tt1', 'pid': pid, 'ordering': i, 'category': 'actor'}
+                       for i, pid in enumerate(actors)],
+        'persons': [{'pid': pid, 'primaryName': f"Personne {pid}"} for pid in actors + ['nmd', 'nmw']],
+        'characters': [{'mid': 'tt1', 'pid': pid, 'character': f"Rôle {pid}"} for pid in actors],
+        'titles': [{'mid': 'tt1', 'title': 'Film', 'region': 'US'}],
+    })
+
+
+class MongoDetailRoundTripTests(SimpleTestCase):
+    """L'assemblage à plat d'un film fait un nombre fixe de lectures, quel que soit le casting"""
+
+    def load(self, cast_size):
+        db = make_database(cast_size)
+        meta = mongo_schema.CollectionMetadata(db, db.list_collection_names())
+        movie = mongo_service.get_movie_from_collections(db, meta, 'tt1')
+        return movie, db.round_trips
+
+    def test_round_trips_do_not_grow_with_cast(self):
+        small, small_trips = self.load(2)
+        large, large_trips = self.load(40)
+
+        # movies, genres, ratings, directors, writers, principals, persons, characters, titles
+        self.assertEqual(small_trips, 9)
+        self.assertEqual(large_trips, 9)
+        self.assertEqual(len(large['cast']), 40)
+
+    def test_characters_and_people_are_resolved(self):
+        movie, _ = self.load(3)
+
+        self.assertEqual([member['characters'] for member in movie['cast']],
+                         [['Rôle nm0'], ['Rôle nm1'], ['Rôle nm2']])
+        self.assertEqual(movie['directors'][0]['name'], 'Personne nmd')
+        self.assertEqual(movie['writers'][0]['name'], 'Personne nmw')
+
+    def test_missing_character_values(self):
+        db = make_database(3)
+        db['characters'].docs[:] = [{'mid': 'tt1', 'pid': 'nm0', 'character': 'None'},
+                                    {'mid': 'tt1', 'pid': 'nm1', 'character': '\\N'},
+                                    {'mid': 'tt1', 'pid': 'nm2', 'character': ''}]
+
+        # Lecture du détail : 'None' et '\N' valent « pas de personnage » (rôle générique)
+        meta = mongo_schema.CollectionMetadata(db, db.list_collection_names())
+        movie = mongo_service.get_movie_from_collections(db, meta, 'tt1')
+        self.assertEqual([member['characters'] for member in movie['cast']],
+                         [['Protagoniste'], ['Personnage principal'], ['Second rôle']])
+
+        # assemble_movie_data garde son filtre d'origine : seules les valeurs vides sont écartées
+        mongo_schema.invalidate(db.name)
+        movie = mongo_service.assemble_movie_data(db, 'tt1', db.movies.find_one({'mid': 'tt1'}))
+        characters = {member['id']: member['characters'] for member in movie['cast']}
+        self.assertEqual(characters['nm0'], ['None'])
+        self.assertEqual(characters['nm1'], ['\\N'])
+        self.assertEqual(characters['nm2'], [])
+
+    def test_assemble_movie_data_round_trips(self):
+        for cast_size in (2, 40):
+            db = make_database(cast_size)
+            mongo_schema.invalidate(db.name)
+            movie = mongo_service.assemble_movie_data(db, 'tt1', db.movies.find_one({'mid': 'tt1'}))
+            # find_one du film ci-dessus + genres, ratings, directors, writers, principals,
+            # persons, characters, titles
+            self.assertEqual(db.round_trips, 9)
+            self.assertEqual(len(movie['cast']), cast_size)
+
+
+class ConditionalGetTests(SimpleTestCase):
+    """Un ETag encore valable donne un 304 sans appeler la vue"""
+
+    def setUp(self):
+        patcher = mock.patch.multiple(conditional_get.data_version,
+                                      get_data_version=mock.Mock(return_value='42.0'),
+                                      get_last_modified=mock.Mock(return_value=1760000000))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.calls = 0
+
+        @conditional_get.conditional_response('test_page', params=('q',))
+        def view(request):
+            self.calls += 1
+            return HttpResponse('page')
+        self.view = view
+
+    def test_matching_etag_skips_the_view(self):
+        factory = RequestFactory()
+        etag = self.view(factory.get('/', {'q': 'star'}))['ETag']
+
+        response = self.view(factory.get('/', {'q': 'star'}, HTTP_IF_NONE_MATCH=etag))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.calls, 1)
+
+        # Autres paramètres : autre ETag, la vue est appelée
+        response = self.view(factory.get('/', {'q': 'war'}, HTTP_IF_NONE_MATCH=etag))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.calls, 2)
+
+
+class DegradedResponseTests(SimpleTestCase):
+    """Une page rendue avec des valeurs de secours n'est ni gardée ni marquée d'un ETag"""
+
+    def setUp(self):
+        patcher = mock.patch.multiple(conditional_get.data_version,
+                                      get_data_version=mock.Mock(return_value='42.0'),
+                                      get_last_modified=mock.Mock(return_value=1760000000))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.calls = 0
+        self.results = {'error': 'base indisponible'}
+
+        @conditional_get.conditional_response('degraded_page')
+        @response_cache.cache_response('degraded_page')
+        def view(request):
+            self.calls += 1
+            return degraded.mark_response(HttpResponse('page'), self.results)
+        self.view = view
+
+    def test_degraded_page_is_not_cached(self):
+        factory = RequestFactory()
+        with self.settings(RESPONSE_CACHE={'ttl': {'degraded_page': 60}}):
+            response = self.view(factory.get('/'))
+            self.assertNotIn('ETag', response)
+            self.view(factory.get('/'))
+            self.assertEqual(self.calls, 2)
+
+            # Données revenues : la réponse est gardée et marquée
+            self.results = {'total_movies': 10}
+            response = self.view(factory.get('/'))
+            self.assertIn('ETag', response)
+            self.assertEqual(self.view(factory.get('/'))['X-Response-Cache'], 'hit')
+            self.assertEqual(self.calls, 3)
+
+    def test_degraded_list_is_detected(self):
+        self.assertTrue(degraded.is_degraded([], degraded.DegradedList()))
+        self.assertFalse(degraded.is_degraded([], {'count': 0}))
+
+
+def fixture_movies(count=60, first_year=1990):
+    """
+    Films de la base de test : années, notes, votes et titres très répétés
+    (égalités de clé de tri), NULL, films sans ligne ratings
+    """
+    movies = []
+    for i in range(count):
+        movies.append({
+            'mid': f"tt{i:04d}",
+            'title': None if i % 13 == 0 else f"Film {i % 7}",
+            'titleType': 'short' if i % 5 == 0 else 'movie',
+            'year': None if i % 11 == 0 else first_year + i % 4,
+            'rated': i % 9 != 0,
+            'rating': None if i % 17 == 0 else 5.0 + i % 4,
+            'votes': (i * 10) % 70,
+            'genres': [genre for genre, step in (('Drama', 2), ('Comedy', 3)) if i % step == 0],
+        })
+    return movies
+
+
+def create_fixture_database(path, movies):
+    """Base SQLite minimale (movies, ratings, genres) avec ses cartes movie_card"""
+    conn = sqlite3.connect(str(path))
+    conn.executescript("""
+        CREATE TABLE movies (mid TEXT PRIMARY KEY, titleType TEXT, primaryTitle TEXT,
+                             originalTitle TEXT, isAdult INTEGER, startYear INTEGER,
+                             endYear INTEGER, runtimeMinutes INTEGER, language TEXT);
+        CREATE TABLE ratings (mid TEXT PRIMARY KEY, averageRating REAL, numVotes INTEGER);
+        CREATE TABLE genres (mid TEXT NOT NULL, genre TEXT NOT NULL, PRIMARY KEY (mid, genre));
+    """)
+    for movie in movies:
+        conn.execute("INSERT INTO movies (mid, titleType, primaryTitle, startYear) VALUES (?, ?, ?, ?)",
+                     (movie['mid'], movie['titleType'], movie['title'], movie['year']))
+        if movie['rated']:
+            conn.execute("INSERT INTO ratings VALUES (?, ?, ?)", (movie['mid'], movie['rating'], movie['votes']))
+        conn.executemany("INSERT INTO genres VALUES (?, ?)", [(movie['mid'], g) for g in movie['genres']])
+    conn.commit()
+    movie_cards.build_movie_cards(conn)
+    conn.close()
+
+
+class FixtureDatabaseTestCase(SimpleTestCase):
+    """Le pool SQLite lit une petite base de test au lieu de data/imdb.db"""
+    movie_count = 60
+    first_year = 1990
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.movies = fixture_movies(cls.movie_count, cls.first_year)
+        db_path = Path(cls.tmpdir) / 'imdb.db'
+        create_fixture_database(db_path, cls.movies)
+        cls.patcher = mock.patch.object(sqlite_pool, 'get_db_path', return_value=db_path)
+        cls.patcher.start()
+        sqlite_pool.close_all()
+        sqlite_schema.reset_schema()
+
+    @classmethod
+    def tearDownClass(cls):
+        sqlite_pool.close_all()
+        cls.patcher.stop()
+        sqlite_schema.reset_schema()
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+        super().tearDownClass()
+
+
+class KeysetPaginationTests(FixtureDatabaseTestCase):
+    """Pages de la liste : en avant puis en arrière, chaque film une seule fois et dans l'ordre"""
+
+    # Tri -> (champ, valeur remplaçant NULL), comme MOVIE_SORT_KEYS
+    SORT_FIELDS = {'rating': ('rating', -1), 'year': ('year', -1), 'title': ('title', ''), 'votes': ('votes', -1)}
+    FILTERS = [{}, {'genre': 'Drama'}, {'year_from': '1991', 'min_rating': '6'}]
+
+    def expected_ids(self, sort, genre='', year_from='', min_rating=''):
+        field, null = self.SORT_FIELDS[sort.lstrip('-')]
+        rows = []
+        for movie in self.movies:
+            card = dict(movie, rating=movie['rating'] if movie['rated'] else None,
+                        votes=movie['votes'] if movie['rated'] else None)
+            if genre and genre not in card['genres']:
+                continue
+            if year_from and (card['year'] is None or card['year'] < int(year_from)):
+                continue
+            if min_rating and (card['rating'] is None or card['rating'] < float(min_rating)):
+                continue
+            value = card[field]
+            rows.append((null if value is None else value, card['mid']))
+        rows.sort(reverse=sort.startswith('-'))
+        return [mid for _, mid in rows]
+
+    def page(self, sort, cursor=None, **filters):
+        page = sqlite_service.get_filtered_movies_page(sort=sort, cursor=cursor, page_size=4, **filters)
+        self.assertNotIn('degraded', page)
+        return page
+
+    def walk_forward(self, sort, **filters):
+        pages = [self.page(sort, **filters)]
+        while pages[-1]['next_cursor']:
+            pages.append(self.page(sort, pages[-1]['next_cursor'], **filters))
+            self.assertLess(len(pages), 100)
+        return pages
+
+    def test_sort_keys_are_covered(self):
+        self.assertEqual({sort.lstrip('-') for sort in sqlite_service.MOVIE_SORT_KEYS}, set(self.SORT_FIELDS))
+
+    def test_forward_and_back_across_ties(self):
+        for sort in sqlite_service.MOVIE_SORT_KEYS:
+            for filters in self.FILTERS:
+                with self.subTest(sort=sort, **filters):
+                    pages = self.walk_forward(sort, **filters)
+                    ids = [movie['id'] for page in pages for movie in page['movies']]
+                    self.assertEqual(ids, self.expected_ids(sort, **filters))
+                    self.assertEqual([page['number'] for page in pages], list(range(1, len(pages) + 1)))
+                    self.assertFalse(pages[0]['has_previous'])
+
+                    # En arrière depuis la dernière page : les mêmes pages, dans l'ordre inverse
+                    page = pages[-1]
+                    for expected in reversed(pages[:-1]):
+                        page = self.page(sort, page['previous_cursor'], **filters)
+                        self.assertEqual([m['id'] for m in page['movies']], [m['id'] for m in expected['movies']])
+                        self.assertEqual(page['number'], expected['number'])
+                        self.assertTrue(page['has_next'])
+                    self.assertIsNone(page['previous_cursor'])
+
+    def test_malformed_cursor_falls_back_to_first_page(self):
+        first = self.page('-rating')
+        other_sort = self.page('year')['next_cursor']
+        other_filters = self.page('-rating', genre='Comedy')['next_cursor']
+        for token in ('garbage', '!!!', sqlite_service.encode_cursor([1, 2]),
+                      sqlite_service.encode_cursor({'s': '-rating'}), other_sort, other_filters):
+            with self.subTest(token=token):
+                page = self.page('-rating', token)
+                self.assertEqual(page['movies'], first['movies'])
+                self.assertEqual(page['number'], 1)
+                self.assertFalse(page['has_previous'])
+
+
+class FakeClock:
+    """Horloge de test : le temps n'avance que par advance() (ou sleep())"""
+
+    def __init__(self, now=1760000000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class ServiceCacheTests(SimpleTestCase):
+    """Un seul recalcul par clé, valeur périmée servie pendant le recalcul, niveau 2, copies"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        for patcher in (mock.patch.object(service_cache, 'time', self.clock),
+                        mock.patch.object(service_cache.data_version, 'get_data_version',
+                                          return_value='42.0')):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        settings = self.settings(SERVICE_CACHE={'shared_alias': None})
+        settings.enable()
+        self.addCleanup(settings.disable)
+        service_cache.clear()
+        self.addCleanup(service_cache.clear)
+        self.calls = 0
+
+    def counting_loader(self, name, release=None, started=None):
+        """Fonction en cache qui compte ses appels (et peut attendre release)"""
+        @service_cache.cached(name, ttl=10, stale_ttl=60)
+        def load():
+            self.calls += 1
+            if started is not None:
+                started.set()
+            if release is not None:
+                self.assertTrue(release.wait(5))
+            return {'version': self.calls, 'items': [1, 2]}
+        return load
+
+    def run_threads(self, target, count):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(target())) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads, results
+
+    def join(self, threads):
+        for thread in threads:
+            thread.join(5)
+            self.assertFalse(thread.is_alive())
+
+    def test_single_flight_without_value(self):
+        release, started = threading.Event(), threading.Event()
+        load = self.counting_loader('single_flight', release, started)
+
+        waits = service_cache.get_service_cache_stats()['waits']
+        threads, results = self.run_threads(load, 8)
+        self.assertTrue(started.wait(5))
+        # Les sept autres appelants attendent le recalcul en cours
+        deadline = time.monotonic() + 5
+        while service_cache.get_service_cache_stats()['waits'] - waits < 7 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        self.join(threads)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual([result['version'] for result in results], [1] * 8)
+        self.assertEqual(service_cache._key_locks, {})
+
+    def test_stale_value_is_served_while_one_caller_recomputes(self):
+        release, started = threading.Event(), threading.Event()
+        load = self.counting_loader('stale_while_revalidate', release, started)
+        release.set()
+        self.assertEqual(load()['version'], 1)
+
+        # Périmée : un appelant recalcule (bloqué), les autres reçoivent l'ancienne valeur
+        self.clock.advance(30)
+        release.clear()
+        started.clear()
+        threads, results = self.run_threads(load, 1)
+        self.assertTrue(started.wait(5))
+        self.assertEqual([load()['version'] for _ in range(3)], [1, 1, 1])
+
+        release.set()
+        self.join(threads)
+        self.assertEqual(results[0]['version'], 2)
+        self.assertEqual(load()['version'], 2)
+        self.assertEqual(self.calls, 2)
+
+        # Au-delà de stale_ttl, plus rien à servir : recalcul synchrone
+        self.clock.advance(100)
+        self.assertEqual(load()['version'], 3)
+
+    def test_l2_feeds_l1(self):
+        caches['default'].clear()
+        with self.settings(SERVICE_CACHE={'shared_alias': 'default'}):
+            load = self.counting_loader('l1_l2')
+            load()
+            service_cache.clear()
+            before = service_cache.get_service_cache_stats()
+            self.assertEqual(load()['version'], 1)
+            self.assertEqual(load()['version'], 1)
+            after = service_cache.get_service_cache_stats()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(after['l2_hits'] - before['l2_hits'], 1)
+        self.assertEqual(after['l1_hits'] - before['l1_hits'], 1)
+
+    def test_callers_get_independent_copies(self):
+        load = self.counting_loader('copies')
+        first = load()
+        first['items'].append(3)
+        first['version'] = 99
+        self.assertEqual(load(), {'version': 1, 'items': [1, 2]})
+
+    def test_key_locks_do_not_accumulate(self):
+        @service_cache.cached('uncached_keys', ttl=10, cache_if=lambda value: False)
+        def load(i):
+            return i
+
+        for i in range(50):
+            load(i)
+        self.assertEqual(service_cache._key_locks, {})
+
+
+class MongoBreakerTests(SimpleTestCase):
+    """Fermé -> ouvert -> semi-ouvert (un seul appel d'essai) -> fermé, sur une horloge de test"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        # La sonde est lancée à la main (_probe_loop) au lieu d'un thread
+        for patcher in (mock.patch.object(mongo_breaker, 'time', self.clock),
+                        mock.patch.object(mongo_breaker, 'threading'),
+                        mock.patch.object(mongo_breaker, '_prober', None),
+                        mock.patch.object(mongo_breaker, '_probe', None)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        settings = self.settings(MONGO_CIRCUIT={'failure_threshold': 2, 'probe_interval': 5.0})
+        settings.enable()
+        self.addCleanup(settings.disable)
+        mongo_breaker.reset()
+        self.addCleanup(mongo_breaker.reset)
+        self.before = mongo_breaker.get_breaker_stats()
+
+    def delta(self, counter):
+        return mongo_breaker.get_breaker_stats()[counter] - self.before[counter]
+
+    def open_circuit(self):
+        mongo_breaker.record_error(ConnectionFailure('injoignable'))
+        mongo_breaker.record_error(ValueError('requête invalide'))    # Sans effet sur le circuit
+        self.assertFalse(mongo_breaker.is_open())
+        mongo_breaker.record_error(ConnectionFailure('injoignable'))
+        self.assertTrue(mongo_breaker.is_open())
+
+    def test_transitions(self):
+        self.assertTrue(mongo_breaker.allow_request())
+        self.open_circuit()
+        self.assertFalse(mongo_breaker.allow_request())
+        self.assertEqual(self.delta('opened'), 1)
+        self.assertEqual(self.delta('rejected'), 1)
+        mongo_breaker.threading.Thread.return_value.start.assert_called_once()
+
+        # Une sonde en échec, puis MongoDB répond : semi-ouvert
+        mongo_breaker.register_probe(mock.Mock(side_effect=[ConnectionFailure('toujours absent'), None]))
+        mongo_breaker._probe_loop()
+        stats = mongo_breaker.get_breaker_stats()
+        self.assertEqual(stats['state'], mongo_breaker.HALF_OPEN)
+        self.assertEqual(stats['open_for_s'], 10.0)
+        self.assertEqual(self.delta('probes'), 2)
+        self.assertEqual(self.delta('probe_failures'), 1)
+
+        # Semi-ouvert : un seul appel d'essai ; son échec rouvre le circuit
+        self.assertTrue(mongo_breaker.allow_request())
+        self.assertFalse(mongo_breaker.allow_request())
+        mongo_breaker.record_error(ConnectionFailure('encore injoignable'))
+        self.assertTrue(mongo_breaker.is_open())
+        self.assertEqual(self.delta('opened'), 2)
+
+        # Nouvel essai : une erreur de requête libère l'essai, un succès referme
+        mongo_breaker.register_probe(mock.Mock(return_value=None))
+        mongo_breaker._probe_loop()
+        self.assertTrue(mongo_breaker.allow_request())
+        mongo_breaker.record_error(ValueError('requête invalide'))
+        self.assertTrue(mongo_breaker.allow_request())
+        mongo_breaker.record_success()
+        stats = mongo_breaker.get_breaker_stats()
+        self.assertEqual((stats['state'], stats['failures']), (mongo_breaker.CLOSED, 0))
+        self.assertTrue(mongo_breaker.allow_request())
+        self.assertTrue(mongo_breaker.allow_request())
+
+    def test_probe_stops_once_circuit_is_closed(self):
+        self.open_circuit()
+        mongo_breaker.reset()
+        probe = mock.Mock()
+        mongo_breaker.register_probe(probe)
+        mongo_breaker._probe_loop()
+        probe.assert_not_called()
+        self.assertEqual(self.delta('probes'), 0)
+
+
+class MovieCountTests(FixtureDatabaseTestCase):
+    """Comptes par facette exacts ; comptage borné exact sous le seuil, estimation encadrée au-delà"""
+    movie_count = 1000
+
+    FILTERS = [
+        {},
+        {'genre': 'Drama'},
+        {'genre': 'Western'},
+        {'year_from': '1991'},
+        {'year_from': '1991', 'year_to': '1992'},
+        {'min_rating': '6'},
+        {'min_rating': '6.5', 'genre': 'Comedy'},
+        {'genre': 'Drama', 'year_from': '1990', 'year_to': '1990', 'min_rating': '7'},
+        {'year_from': 'x', 'min_rating': 'abc'},    # Valeurs invalides ignorées
+    ]
+
+    def exact_count(self, **filters):
+        where_sql, params = sqlite_service.build_movie_filters(**filters)
+        return sqlite_pool.get_connection().execute(
+            f"SELECT COUNT(*) FROM movie_card c WHERE 1=1{where_sql}", params).fetchone()[0]
+
+    def test_facets_match_count(self):
+        facets = count_service.build_facets(sqlite_pool.get_connection())
+        for filters in self.FILTERS:
+            with self.subTest(**filters):
+                expected = self.exact_count(**filters)
+                normalized = count_service.normalize_filters(**filters)
+                self.assertEqual(count_service.count_from_facets(facets, *normalized), expected)
+
+                with self.settings(MOVIE_COUNTS={'use_facets': True}):
+                    result = count_service.get_movie_count(**filters)
+                self.assertEqual((result['count'], result['exact']), (expected, True))
+
+    def bounded(self, config, **filters):
+        config = dict(count_service.DEFAULT_COUNT_SETTINGS, **config)
+        params = {key: filters.get(key, '') for key in ('genre', 'year_from', 'year_to', 'min_rating')}
+        with mock.patch.object(count_service, 'random', random.Random(7)):
+            return count_service.bounded_count(sqlite_pool.get_connection(), config=config, **params)
+
+    def test_bounded_count_is_exact_under_threshold(self):
+        for filters in self.FILTERS:
+            with self.subTest(**filters):
+                expected = self.exact_count(**filters)
+                self.assertEqual(self.bounded({'exact_threshold': 1000}, **filters), (expected, True))
+
+    def test_bounded_count_estimate_stays_within_bound(self):
+        config = {'exact_threshold': 50, 'sample_size': 400, 'sample_windows': 8}
+        for filters in self.FILTERS:
+            with self.subTest(**filters):
+                expected = self.exact_count(**filters)
+                count, exact = self.bounded(config, **filters)
+                if expected <= 50:
+                    self.assertEqual((count, exact), (expected, True))
+                    continue
+                self.assertFalse(exact)
+                # Jamais sous ce qui a été compté, jamais au-delà du catalogue
+                self.assertGreater(count, 50)
+                self.assertLessEqual(count, self.movie_count)
+                self.assertLessEqual(abs(count - expected), max(100, 0.25 * expected))
+
+        # Échantillon couvrant tout le catalogue : le compte exact, arrondi à la centaine
+        config = {'exact_threshold': 50, 'sample_size': 5000, 'sample_windows': 1}
+        expected = self.exact_count(genre='Drama')
+        self.assertEqual(self.bounded(config, genre='Drama'), (round(expected, -2), False))
+
+
+class RandomSamplerTests(FixtureDatabaseTestCase):
+    """Les tirages ne renvoient que des films notés, sans doublon"""
+    first_year = 1999   # Une partie des films entre dans l'ensemble de l'accueil (après 2000)
+
+    def rated_ids(self, min_year=None):
+        return {movie['mid'] for movie in self.movies
+                if movie['rated'] and movie['rating'] is not None and movie['titleType'] == 'movie'
+                and (min_year is None or (movie['year'] or 0) > min_year)}
+
+    def test_pools_contain_only_rated_movies(self):
+        for pool, min_year in (('movies', None), ('recent_movies', 2000)):
+            with self.subTest(pool=pool):
+                expected = self.rated_ids(min_year)
+                self.assertTrue(expected)
+                movies = random_sampler.sample_movies(pool, len(self.movies))
+                self.assertEqual({movie['id'] for movie in movies}, expected)
+                self.assertEqual(len(movies), len(expected))
+                self.assertTrue(all(movie['rating'] is not None for movie in movies))
+
+    def test_excluded_movies_are_never_drawn(self):
+        exclude = set(sorted(self.rated_ids())[:5])
+        movies = random_sampler.sample_movies('movies', 6, exclude)
+        self.assertEqual(len(movies), 6)
+        self.assertFalse(exclude & {movie['id'] for movie in movies})
@@ -9,7 +9,7 @@ import time
 from django.template.defaulttags import register
 import random
 
-from .services import sqlite_service, mongo_service, home_service
+from .services import sqlite_service, mongo_service, home_service, sqlite_pool, count_service, detail_service, mongo_breaker, mongo_pool, mongo_schema, response_cache, service_cache, data_version, conditional_get, cache_warmer, degraded
 
 # Créer des filtres template personnalisés
 @register.filter
@@ -91,7 +91,16 @@ def api_test(request):
         'databases': {
             'sqlite': sqlite_stats,
             'mongodb': mongo_stats
-        }
+        },
+        'sqlite_pool': sqlite_pool.get_pool_stats(),
+        'mongo_circuit': mongo_breaker.get_breaker_stats(),
+        'mongo_pool': mongo_pool.get_pool_stats(),
+        'mongo_metadata': mongo_schema.get_metadata_stats(),
+        'response_cache': response_cache.get_response_cache_stats(),
+        'service_cache': service_cache.get_service_cache_stats(),
+        'data_version': data_version.get_data_version_info(),
+        'conditional_get': conditional_get.get_conditional_get_stats(),
+        'cache_warmer': cache_warmer.get_last_report()
     }
     
     return JsonResponse(response_data)
@@ -106,6 +115,7 @@ def home_view(request):
         'task': 'T3.3 - Préparation Django'
     })
 
+@response_cache.cache_response('home')
 def home_view_phase4(request):
     """
     Page d'accueil pour Phase 4
@@ -125,8 +135,10 @@ def home_view_phase4(request):
         'title': 'CinéExplorer - Découvrez des films'
     }
     
-    return render(request, 'movies/home.html', context)
+    return degraded.mark_response(render(request, 'movies/home.html', context), stats)
 
+@conditional_get.conditional_response('search', params=('q',))
+@response_cache.cache_response('search', params=('q',))
 def search_view(request):
     """Page de recherche T4.1.4 avec résultats groupés"""
     query = request.GET.get('q', '').strip()
@@ -170,8 +182,13 @@ def search_view(request):
         'title': f'Recherche: {query}' if query else 'Recherche'
     }
     
-    return render(request, 'movies/search.html', context)
+    response = render(request, 'movies/search.html', context)
+    return degraded.mark_response(response, search_results['movies'], search_results['persons'], stats)
 
+MOVIE_LIST_PARAMS = ('genre', 'year_from', 'year_to', 'min_rating', 'sort', 'cursor')
+
+@conditional_get.conditional_response('movie_list', params=MOVIE_LIST_PARAMS)
+@response_cache.cache_response('movie_list', params=MOVIE_LIST_PARAMS)
 def movie_list_view(request):
     """Liste des films avec pagination et filtres"""
     # Récupérer les paramètres GET
@@ -180,20 +197,27 @@ def movie_list_view(request):
     year_to = request.GET.get('year_to', '')
     min_rating = request.GET.get('min_rating', '')
     sort = request.GET.get('sort', '-rating')
-    page_number = request.GET.get('page', 1)
+    cursor = request.GET.get('cursor', '')
     
-    # Récupérer les films filtrés
-    movies_data = sqlite_service.get_filtered_movies(
+    # Page de films filtrés (pagination keyset côté SQL)
+    page = sqlite_service.get_filtered_movies_page(
         genre=genre,
         year_from=year_from,
         year_to=year_to,
         min_rating=min_rating,
-        sort=sort
+        sort=sort,
+        cursor=cursor,
+        page_size=20
     )
     
-    # Pagination
-    paginator = Paginator(movies_data, 20)
-    page_obj = paginator.get_page(page_number)
+    # Nombre total de résultats (comptes précalculés / estimation, en cache)
+    total = count_service.get_movie_count(
+        genre=genre,
+        year_from=year_from,
+        year_to=year_to,
+        min_rating=min_rating
+    )
+    page['num_pages'] = max(1, -(-total['count'] // 20))
     
     # Récupérer les genres pour le filtre
     genres = sqlite_service.get_all_genres()
@@ -202,53 +226,42 @@ def movie_list_view(request):
     stats = sqlite_service.get_movie_stats()
     
     context = {
-        'movies': page_obj,
+        'movies': page['movies'],
+        'page': page,
         'genres': genres,
         'selected_genre': genre,
         'year_from': year_from,
         'year_to': year_to,
         'min_rating': min_rating,
         'sort': sort,
-        'total_movies': len(movies_data),
+        'total_movies': total['count'],
+        'total_is_estimate': not total['exact'],
         'avg_rating': stats.get('avg_rating', 0),
         'latest_year': stats.get('latest_year', '2024'),
         'title': 'Liste des films'
     }
     
-    return render(request, 'movies/list.html', context)
+    response = render(request, 'movies/list.html', context)
+    return degraded.mark_response(response, page, total, genres, stats)
 
+@conditional_get.conditional_response('movie_detail')
+@response_cache.cache_response('movie_detail')
 def movie_detail_view(request, movie_id):
     """Détail d'un film avec casting complet"""
-    movie = None
-    source = None
-    
     print(f"\n=== CHARGEMENT FILM {movie_id} ===")
     
-    # 1. Essayer MongoDB d'abord
-    try:
-        movie = mongo_service.get_complete_movie_with_characters(movie_id)
-        if movie and movie.get('cast'):
-            source = 'MongoDB'
-            print(f"✓ Film trouvé dans MongoDB avec {len(movie['cast'])} acteurs")
-        elif movie:
-            source = 'MongoDB'
-            print(f"⚠ Film trouvé dans MongoDB mais sans casting ({len(movie.get('cast', []))} acteurs)")
-        else:
-            print(f"✗ Film non trouvé dans MongoDB")
-    except Exception as e:
-        print(f"Erreur MongoDB: {e}")
-    
-    # 2. Si pas dans MongoDB ou sans casting, essayer SQLite
-    if not movie or not movie.get('cast'):
-        movie = sqlite_service.get_movie_with_characters(movie_id)
-        if movie and movie.get('cast'):
-            source = 'SQLite'
-            print(f"✓ Film trouvé dans SQLite avec {len(movie['cast'])} acteurs")
-        elif movie:
-            source = 'SQLite' 
-            print(f"⚠ Film trouvé dans SQLite mais sans casting")
-        else:
-            print(f"✗ Film non trouvé dans SQLite")
+    # 1-2. MongoDB, SQLite (couverture après un court délai) et films similaires en parallèle
+    detail = detail_service.load_movie_detail(movie_id)
+    movie = detail['movie']
+    source = detail['source']
+    similar_movies = detail['similar_movies']
+    
+    if movie:
+        print(f"✓ Film trouvé dans {source} avec {len(movie.get('cast') or [])} acteurs")
+    else:
+        print(f"✗ Film non trouvé (MongoDB et SQLite)")
+    timings = {name: round(ms, 1) for name, ms in detail['timings'].items()}
+    print(f"⏱ Temps par source (ms): {timings}")
     
     # 3. Si toujours pas trouvé, retourner erreur
     if not movie:
@@ -277,15 +290,7 @@ def movie_detail_view(request, movie_id):
     
     print(f"📊 Statistiques casting: {casting_stats}")
     
-    # 6. Films similaires
-    similar_movies = sqlite_service.get_similar_movies_sqlite(
-        movie_id,
-        genres=movie.get('genres', []),
-        directors=movie.get('directors', []),
-        limit=4
-    )
-    
-    # 7. Préparer le contexte
+    # 6. Préparer le contexte
     context = {
         'movie': movie,
         'movie_id': movie_id,
@@ -295,8 +300,10 @@ def movie_detail_view(request, movie_id):
         'title': f"{movie.get('title', 'Détail du film')} - CinéExplorer"
     }
     
-    return render(request, 'movies/detail.html', context)
+    return degraded.mark_response(render(request, 'movies/detail.html', context), detail)
 
+@conditional_get.conditional_response('stats')
+@response_cache.cache_response('stats')
 def stats_view(request):
     """Page statistiques avec graphiques"""
     # Récupérer les statistiques depuis SQLite
@@ -361,4 +368,5 @@ def stats_view(request):
         'title': 'Statistiques'
     }
     
-    return render(request, 'movies/stats.html', context)
\ No newline at end of file
+    response = render(request, 'movies/stats.html', context)
+    return degraded.mark_response(response, stats, top_movies, top_actors)
\ No newline at end of file
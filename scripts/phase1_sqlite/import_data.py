@@ -1,3 +1,5 @@
+import os
+import sys
 import sqlite3
 import csv
 from pathlib import Path
@@ -5,6 +7,19 @@ from pathlib import Path
 DB_PATH = Path("data") / "imdb.db"
 CSV_DIR = Path("data") / "csv"
 
+# Tables dérivées du site (movies/services), reconstruites en fin d'import
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+from movies.services.movie_cards import build_movie_cards  # noqa: E402
+from movies.services.person_summary import build_person_summary  # noqa: E402
+from movies.services.search_index import build_search_index  # noqa: E402
+from movies.services.stats_snapshot import build_snapshot, save_snapshot  # noqa: E402
+from movies.services.similarity import build_similar_movies  # noqa: E402
+from movies.services.detail_docs import build_detail_docs  # noqa: E402
+from movies.services.data_version import bump_sqlite_version  # noqa: E402
+
 def connect_db(db_path: Path = DB_PATH) -> sqlite3.Connection:
     """Connexion à SQLite avec les FK activées."""
     conn = sqlite3.connect(db_path)
@@ -142,6 +157,39 @@ def main():
         import_table(conn, "knownformovies", "knownformovies.csv",
                      ["pid", "mid"])
 
+        # Tables dérivées : toutes reconstruites avant la nouvelle version,
+        # sinon le site servirait celles de l'import précédent sous cette version
+        conn.row_factory = sqlite3.Row
+
+        # 5️⃣ Cartes de films dénormalisées (liste, recherche, similaires, top)
+        print("\n🃏 Construction de movie_card")
+        print(f"  ✔ Cartes         : {build_movie_cards(conn)}")
+
+        # 6️⃣ Résumé des personnes (recherche : rôle principal, films connus)
+        print("\n👤 Construction de person_summary")
+        print(f"  ✔ Personnes      : {build_person_summary(conn)}")
+
+        # 7️⃣ Index plein texte (recréés : rowids des tables sources réimportées)
+        print("\n🔎 Construction de l'index FTS5")
+        for fts_table, count in build_search_index(conn, drop=True).items():
+            print(f"  ✔ {fts_table:<15}: {count}")
+
+        # 8️⃣ Statistiques précalculées
+        print("\n📊 Construction de stats_snapshot")
+        save_snapshot(conn, build_snapshot(conn))
+        print("  ✔ Instantané enregistré")
+
+        # 9️⃣ Films similaires précalculés
+        print("\n🎞️ Construction de movie_neighbors")
+        print(f"  ✔ Films          : {build_similar_movies(conn)}")
+
+        # 🔟 Détail précalculé de chaque film (processus parallèles)
+        print("\n🗜️ Construction de movie_detail_doc")
+        print(f"  ✔ Films          : {build_detail_docs(conn)}")
+
+        # Nouvelle version des données (invalide les caches du site)
+        print(f"  ✔ Version        : {bump_sqlite_version(conn, 'import_data')}")
+
     finally:
         conn.close()
         print("\n🎉 Import terminé avec succès !")
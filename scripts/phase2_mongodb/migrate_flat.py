@@ -4,6 +4,14 @@ import time
 from typing import List, Dict, Any
 from tqdm import tqdm  # Pour une barre de progression
 
+# Tables dérivées du site (movies/services) : recalculées depuis les tables
+# de base, ce ne sont pas des données à migrer (les index FTS5 et leurs
+# tables internes *_fts_* sont exclus par leur nom)
+DERIVED_TABLES = (
+    'meta', 'movie_card', 'person_summary', 'stats_snapshot',
+    'movie_neighbors', 'movie_detail_doc', 'movie_detail_doc_build',
+)
+
 def migrate_sqlite_to_mongodb_flat(batch_size: int = 10000) -> Dict[str, Any]:
     """
     Migre toutes les tables SQLite vers MongoDB en collections plates.
@@ -34,15 +42,16 @@ def migrate_sqlite_to_mongodb_flat(batch_size: int = 10000) -> Dict[str, Any]:
         
         db = mongo_client['imdb_flat']
         
-        # Lister les tables SQLite (exclure les tables système)
+        # Lister les tables SQLite (exclure les tables système et dérivées)
         cursor = sqlite_conn.cursor()
         cursor.execute("""
             SELECT name FROM sqlite_master 
             WHERE type='table' 
             AND name NOT LIKE 'sqlite_%'
+            AND name NOT LIKE '%!_fts%' ESCAPE '!'
             ORDER BY name
         """)
-        tables = [row[0] for row in cursor.fetchall()]
+        tables = [row[0] for row in cursor.fetchall() if row[0] not in DERIVED_TABLES]
         
         print(f"Migration de {len(tables)} tables vers MongoDB...")
         print("="*60)
@@ -142,6 +142,7 @@ class T24MoviesComplete:
                         "_id": 0,
                         "person_id": "$pid",
                         "name": "$p.primaryName",
+                        "category": 1,
                         "characters": 1,
                         "ordering": "$ordering"
                     }},
@@ -6,8 +6,16 @@ import time
 from datetime import datetime
 from typing import List, Dict, Any
 import sys
+import os
 from pathlib import Path
 
+# Version des données du site (movies/services/data_version.py)
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+from movies.services.data_version import bump_mongo_version  # noqa: E402
+
 def setup_logging():
     """Configure le logging pour le script"""
     import logging
@@ -105,7 +113,8 @@ class ReplicaSetImporter:
         collections = [
             'movies', 'persons', 'ratings', 'genres',
             'directors', 'writers', 'principals', 'characters',
-            'titles', 'knownformovies', 'professions'
+            'titles', 'knownformovies', 'professions',
+            'movies_complete'
         ]
         
         stats = {}
@@ -329,7 +338,8 @@ class ReplicaSetImporter:
             collections = [
                 'movies', 'persons', 'ratings', 'genres',
                 'directors', 'writers', 'principals', 'characters',
-                'titles', 'knownformovies', 'professions'
+                'titles', 'knownformovies', 'professions',
+                'movies_complete'
             ]
             
             total_docs = 0
@@ -348,6 +358,10 @@ class ReplicaSetImporter:
                 # Petite pause entre les collections
                 time.sleep(1)
             
+            if imported_collections:
+                version = bump_mongo_version(self.replica_db, 'phase3_import')
+                self.logger.info(f"🔖 Version des données: {version}")
+            
             # 4. Rapport final
             elapsed_time = time.time() - start_time
             
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark du détail d'un film depuis SQLite : assemblage à la volée
+(sqlite_service.load_movie_details, huit tables) contre le document
+précalculé de movie_detail_doc (une lecture + décompression).
+Compare aussi la place occupée par la table dans la base.
+
+Prérequis : python manage.py build_movie_detail_docs
+Usage : python scripts/phase4_perf/benchmark_detail_docs.py [N_FILMS]
+"""
+import os
+import sqlite3
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+from movies.services.sqlite_service import load_movie_details  # noqa: E402
+from movies.services.detail_docs import TABLE, fetch_detail  # noqa: E402
+
+DB_PATH = ROOT_DIR / "data" / "imdb.db"
+N_MOVIES = 200
+N_RUNS = 5
+
+
+def sample_movies(conn, n):
+    """Moitié films les plus votés, moitié films tirés au hasard"""
+    top = [row[0] for row in conn.execute("SELECT mid FROM ratings ORDER BY numVotes DESC LIMIT ?", (n // 2,))]
+    rest = [row[0] for row in conn.execute(
+        "SELECT mid FROM movies WHERE mid NOT IN (SELECT mid FROM ratings ORDER BY numVotes DESC LIMIT ?) "
+        "ORDER BY RANDOM() LIMIT ?", (n // 2, n - len(top))
+    )]
+    return top + rest
+
+
+def measure(conn, loader, movie_ids):
+    """Latence médiane de N_RUNS appels par film (ms) et résultats"""
+    latencies, results = [], {}
+    for mid in movie_ids:
+        runs = []
+        for _ in range(N_RUNS):
+            t0 = time.perf_counter()
+            results[mid] = loader(conn, mid)
+            runs.append((time.perf_counter() - t0) * 1000)
+        latencies.append(statistics.median(runs))
+    return latencies, results
+
+
+def table_bytes(conn, table):
+    """Octets occupés par une table (dbstat si disponible, sinon taille des blobs)"""
+    try:
+        return conn.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = ?", (table,)).fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        return conn.execute(f"SELECT SUM(LENGTH(blob)) FROM {table}").fetchone()[0] or 0
+
+
+def main():
+    if not DB_PATH.exists():
+        print(f"❌ Base introuvable : {DB_PATH}")
+        return
+
+    n_movies = int(sys.argv[1]) if len(sys.argv) > 1 else N_MOVIES
+
+    conn = sqlite3.connect(f"{DB_PATH.as_uri()}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (TABLE,)).fetchone():
+        print(f"❌ Table {TABLE} absente : lancer python manage.py build_movie_detail_docs")
+        return
+
+    movie_ids = sample_movies(conn, n_movies)
+    print(f"🎯 {len(movie_ids)} films (les plus votés + hasard), {N_RUNS} exécutions par film\n")
+
+    outputs = {}
+    print(f"{'Source':<22} {'p50 ms':>9} {'p95 ms':>9} {'total ms':>10}")
+    for label, loader in [("Assemblage (8 tables)", load_movie_details),
+                          ("movie_detail_doc", fetch_detail)]:
+        latencies, outputs[label] = measure(conn, loader, movie_ids)
+        ordered = sorted(latencies)
+        p95 = ordered[int(0.95 * (len(ordered) - 1))]
+        print(f"{label:<22} {statistics.median(latencies):>9.3f} {p95:>9.3f} {sum(latencies):>10.1f}")
+
+    live, docs = outputs.values()
+    mismatches = [mid for mid in movie_ids if live[mid] != docs[mid]]
+    if mismatches:
+        print(f"\n⚠️  Résultats différents pour {len(mismatches)} films : {mismatches[:5]}")
+    else:
+        print("\n✅ Résultats identiques pour tous les films")
+
+    db_size = DB_PATH.stat().st_size
+    doc_size = table_bytes(conn, TABLE)
+    count = conn.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+    print(f"\n💾 Base : {db_size / 1e6:.1f} Mo, dont {TABLE} : {doc_size / 1e6:.1f} Mo "
+          f"({100 * doc_size / db_size:.1f} %, {doc_size / max(count, 1):.0f} octets par film)")
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
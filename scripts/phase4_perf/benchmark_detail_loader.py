@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark du chargement du détail d'un film depuis SQLite :
+ancien chargeur N+1 (une requête characters par membre du casting)
+contre le chargeur groupé sqlite_service.load_movie_details.
+
+Usage : python scripts/phase4_perf/benchmark_detail_loader.py [N_FILMS]
+"""
+import os
+import sqlite3
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+from movies.services.sqlite_service import load_movie_details  # noqa: E402
+
+DB_PATH = ROOT_DIR / "data" / "imdb.db"
+N_MOVIES = 100
+N_RUNS = 3
+
+
+def legacy_load_movie_details(conn, movie_id):
+    """Copie de l'ancien chargeur (avant regroupement des requêtes)"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT m.mid, m.primaryTitle, m.startYear, m.runtimeMinutes, m.titleType,
+               m.language, m.isAdult, r.averageRating, r.numVotes
+        FROM movies m
+        LEFT JOIN ratings r ON m.mid = r.mid
+        WHERE m.mid = ?
+    """, (movie_id,))
+    row = cursor.fetchone()
+    if not row:
+        return None
+
+    movie = {
+        'id': row['mid'], 'title': row['primaryTitle'], 'year': row['startYear'],
+        'runtime': row['runtimeMinutes'], 'titleType': row['titleType'],
+        'language': row['language'], 'isAdult': bool(row['isAdult']),
+        'rating': row['averageRating'], 'votes': row['numVotes'],
+        'genres': [], 'cast': [], 'directors': [], 'writers': [], 'titles': []
+    }
+
+    cursor.execute("SELECT genre FROM genres WHERE mid = ?", (movie_id,))
+    movie['genres'] = [row[0] for row in cursor.fetchall()]
+
+    cursor.execute("""
+        SELECT p.pid, p.primaryName, p.birthYear
+        FROM directors d JOIN persons p ON d.pid = p.pid
+        WHERE d.mid = ?
+    """, (movie_id,))
+    for row in cursor.fetchall():
+        movie['directors'].append({'id': row['pid'], 'name': row['primaryName'], 'birthYear': row['birthYear']})
+
+    cursor.execute("""
+        SELECT p.pid, p.primaryName, w.category
+        FROM writers w JOIN persons p ON w.pid = p.pid
+        WHERE w.mid = ?
+    """, (movie_id,))
+    for row in cursor.fetchall():
+        movie['writers'].append({'id': row['pid'], 'name': row['primaryName'], 'category': row['category']})
+
+    cursor.execute("""
+        SELECT p.pid, p.primaryName, p.birthYear, p.deathYear, pr.category, pr.ordering
+        FROM principals pr JOIN persons p ON pr.pid = p.pid
+        WHERE pr.mid = ?
+        ORDER BY pr.ordering
+    """, (movie_id,))
+    for principal in cursor.fetchall():
+        pid = principal['pid']
+        cursor.execute("SELECT character FROM characters WHERE mid = ? AND pid = ?", (movie_id, pid))
+        characters = [row['character'] for row in cursor.fetchall()]
+        if not characters:
+            cursor.execute("PRAGMA table_info(principals)")
+            columns = [col[1] for col in cursor.fetchall()]
+            if 'characters' in columns:
+                cursor.execute("SELECT characters FROM principals WHERE mid = ? AND pid = ?", (movie_id, pid))
+                chars_row = cursor.fetchone()
+                if chars_row and chars_row['characters']:
+                    characters = [chars_row['characters']]
+        movie['cast'].append({
+            'id': pid, 'name': principal['primaryName'], 'characters': characters,
+            'ordering': principal['ordering'], 'category': principal['category'],
+            'birthYear': principal['birthYear'], 'deathYear': principal['deathYear']
+        })
+
+    cursor.execute("""
+        SELECT region, title, language FROM titles
+        WHERE mid = ? AND title != ?
+    """, (movie_id, movie['title']))
+    for row in cursor.fetchall():
+        movie['titles'].append({'region': row['region'], 'title': row['title'], 'language': row['language']})
+
+    return movie
+
+
+def most_voted_movies(conn, n):
+    """Les N films ayant le plus de votes"""
+    cur = conn.execute("SELECT mid FROM ratings ORDER BY numVotes DESC LIMIT ?", (n,))
+    return [row[0] for row in cur.fetchall()]
+
+
+def measure(conn, loader, movie_ids):
+    """Exécute le chargeur sur chaque film : (requêtes par film, latences ms, résultats)"""
+    counter = {'n': 0}
+
+    def count_statement(_sql):
+        counter['n'] += 1
+
+    query_counts, latencies, results = [], [], {}
+    for mid in movie_ids:
+        conn.set_trace_callback(count_statement)
+        counter['n'] = 0
+        loader(conn, mid)
+        conn.set_trace_callback(None)
+        query_counts.append(counter['n'])
+
+        runs = []
+        for _ in range(N_RUNS):
+            t0 = time.perf_counter()
+            results[mid] = loader(conn, mid)
+            runs.append((time.perf_counter() - t0) * 1000)
+        latencies.append(statistics.median(runs))
+
+    return query_counts, latencies, results
+
+
+def main():
+    if not DB_PATH.exists():
+        print(f"❌ Base introuvable : {DB_PATH}")
+        return
+
+    n_movies = int(sys.argv[1]) if len(sys.argv) > 1 else N_MOVIES
+
+    conn = sqlite3.connect(f"{DB_PATH.as_uri()}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    movie_ids = most_voted_movies(conn, n_movies)
+
+    print(f"🎯 {len(movie_ids)} films les plus votés, {N_RUNS} exécutions par film\n")
+
+    rows = []
+    outputs = {}
+    for label, loader in [("Avant (N+1)", legacy_load_movie_details),
+                          ("Après (groupé)", load_movie_details)]:
+        counts, latencies, outputs[label] = measure(conn, loader, movie_ids)
+        rows.append((label, counts, latencies))
+
+    print(f"{'Chargeur':<16} {'req. moy':>9} {'req. max':>9} {'p50 ms':>9} {'p95 ms':>9} {'total ms':>10}")
+    for label, counts, latencies in rows:
+        ordered = sorted(latencies)
+        p95 = ordered[int(0.95 * (len(ordered) - 1))]
+        print(f"{label:<16} {statistics.mean(counts):>9.1f} {max(counts):>9} "
+              f"{statistics.median(latencies):>9.3f} {p95:>9.3f} {sum(latencies):>10.1f}")
+
+    before, after = outputs.values()
+    mismatches = [mid for mid in movie_ids if before[mid] != after[mid]]
+    if mismatches:
+        print(f"\n⚠️  Résultats différents pour {len(mismatches)} films : {mismatches[:5]}")
+    else:
+        print("\n✅ Résultats identiques pour tous les films")
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la lecture du détail d'un film dans MongoDB :
+collections à plat (une lecture par collection, par personne et par
+personnage) contre un seul document projeté de movies_complete.
+Les deux stratégies lisent les mêmes films ; les allers-retours sont
+comptés par un CommandListener de PyMongo.
+
+Usage : python scripts/phase4_perf/benchmark_mongo_detail_reads.py [N_FILMS]
+"""
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+from pymongo import MongoClient, monitoring  # noqa: E402
+
+from movies.services import mongo_pool, mongo_schema  # noqa: E402
+from movies.services.mongo_service import (  # noqa: E402
+    COMPLETE_COLLECTION, get_movie_from_collections, get_movie_from_complete
+)
+
+N_MOVIES = 100
+N_RUNS = 3
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Nombre de commandes envoyées au serveur (allers-retours)"""
+
+    def __init__(self):
+        self.n = 0
+
+    def started(self, event):
+        self.n += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def measure(db, meta, counter, loader, movie_ids):
+    """Exécute la stratégie sur chaque film : (allers-retours par film, latences ms, résultats)"""
+    round_trips, latencies, results = [], [], {}
+    for mid in movie_ids:
+        counter.n = 0
+        loader(db, meta, mid)
+        round_trips.append(counter.n)
+
+        runs = []
+        for _ in range(N_RUNS):
+            t0 = time.perf_counter()
+            results[mid] = loader(db, meta, mid)
+            runs.append((time.perf_counter() - t0) * 1000)
+        latencies.append(statistics.median(runs))
+
+    return round_trips, latencies, results
+
+
+def same_movie(a, b):
+    """
+    Mêmes titre, genres, note et acteurs (movies_complete ne garde que les
+    acteurs et actrices du casting ; l'ordre des genres peut varier)
+    """
+    if not a or not b:
+        return False
+
+    def actors(movie):
+        return [m['id'] for m in movie['cast'] if m.get('category') in ('actor', 'actress')]
+
+    return (a['title'] == b['title'] and sorted(a['genres']) == sorted(b['genres'])
+            and a['rating'] == b['rating'] and actors(a) == actors(b))
+
+
+def main():
+    n_movies = int(sys.argv[1]) if len(sys.argv) > 1 else N_MOVIES
+
+    config = mongo_pool.get_client_settings()
+    counter = CommandCounter()
+    client = MongoClient(config['hosts'], event_listeners=[counter], **config['options'])
+    db = client[config['database']]
+
+    try:
+        meta = mongo_schema.get_metadata(db)
+    except Exception as e:
+        print(f"❌ MongoDB inaccessible : {e}")
+        return
+    if not meta.has_collection(COMPLETE_COLLECTION):
+        print(f"❌ Collection {COMPLETE_COLLECTION} absente (scripts/phase2_mongodb/migrate_structured.py)")
+        return
+
+    movie_ids = [doc['_id'] for doc in db[COMPLETE_COLLECTION].aggregate([
+        {"$sample": {"size": n_movies}}, {"$project": {"_id": 1}}
+    ])]
+    print(f"🎯 {len(movie_ids)} films tirés de {COMPLETE_COLLECTION}, {N_RUNS} exécutions par film\n")
+
+    rows = []
+    outputs = {}
+    for label, loader in [("Collections", get_movie_from_collections),
+                          ("movies_complete", get_movie_from_complete)]:
+        trips, latencies, outputs[label] = measure(db, meta, counter, loader, movie_ids)
+        rows.append((label, trips, latencies))
+
+    print(f"{'Stratégie':<16} {'a/r moy':>8} {'a/r max':>8} {'p50 ms':>9} {'p95 ms':>9} {'total ms':>10}")
+    for label, trips, latencies in rows:
+        ordered = sorted(latencies)
+        p95 = ordered[int(0.95 * (len(ordered) - 1))]
+        print(f"{label:<16} {statistics.mean(trips):>8.1f} {max(trips):>8} "
+              f"{statistics.median(latencies):>9.3f} {p95:>9.3f} {sum(latencies):>10.1f}")
+
+    flat, complete = outputs.values()
+    mismatches = [mid for mid in movie_ids if not same_movie(flat[mid], complete[mid])]
+    if mismatches:
+        print(f"\n⚠️  Contenu différent pour {len(mismatches)} films : {mismatches[:5]}")
+    else:
+        print("\n✅ Même titre, genres, note et casting pour tous les films")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark du tirage aléatoire de films : ORDER BY RANDOM() LIMIT k
+contre le tableau dense de rowid de movies/services/random_sampler.py,
+sur des catalogues synthétiques de taille croissante.
+
+Usage : python scripts/phase4_perf/benchmark_random_sampling.py [taille ...]
+"""
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+from movies.services.random_sampler import (  # noqa: E402
+    SAMPLE_POOLS, build_rowid_index, fetch_movies_by_rowid, sample_rowids
+)
+
+SIZES = [10_000, 100_000, 500_000, 1_000_000]
+K = 6
+N_RUNS = 20
+
+
+def build_catalog(n):
+    """Base en mémoire avec n films notés (mêmes tables que data/imdb.db)"""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.executescript("""
+        CREATE TABLE movies (mid TEXT PRIMARY KEY, titleType TEXT, primaryTitle TEXT, startYear INTEGER);
+        CREATE TABLE ratings (mid TEXT PRIMARY KEY, averageRating REAL, numVotes INTEGER);
+    """)
+    rng = random.Random(42)
+    conn.executemany(
+        "INSERT INTO movies VALUES (?, ?, ?, ?)",
+        ((f"tt{i:08d}", rng.choice(['movie', 'movie', 'tvMovie']), f"Film {i}", rng.randint(1920, 2024))
+         for i in range(n))
+    )
+    conn.executemany(
+        "INSERT INTO ratings VALUES (?, ?, ?)",
+        ((f"tt{i:08d}", round(rng.uniform(1, 10), 1), rng.randint(5, 100000)) for i in range(n))
+    )
+    conn.commit()
+    return conn
+
+
+def order_by_random(conn, k):
+    """Ancienne requête de get_random_movies"""
+    return conn.execute("""
+        SELECT m.mid as id, m.primaryTitle as title, m.startYear as year, r.averageRating as rating
+        FROM movies m
+        LEFT JOIN ratings r ON m.mid = r.mid
+        WHERE m.titleType = 'movie'
+          AND m.startYear IS NOT NULL
+          AND m.startYear > 2000
+        ORDER BY RANDOM()
+        LIMIT ?
+    """, (k,)).fetchall()
+
+
+def timed(fn, runs=N_RUNS):
+    """Latence médiane en ms"""
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+
+    print(f"Tirage de {K} films, médiane sur {N_RUNS} appels\n")
+    print(f"{'films':>10} {'RANDOM() ms':>12} {'tableau ms':>11} {'gain':>7} {'construction ms':>16} {'Mo tableau':>11}")
+
+    for n in sizes:
+        conn = build_catalog(n)
+
+        t0 = time.perf_counter()
+        rowids = build_rowid_index(conn, 'recent_movies')
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        t_random = timed(lambda: order_by_random(conn, K))
+        t_sampler = timed(lambda: fetch_movies_by_rowid(conn, sample_rowids(rowids, K)))
+
+        size_mb = rowids.itemsize * len(rowids) / (1024 ** 2)
+        print(f"{n:>10,} {t_random:>12.3f} {t_sampler:>11.3f} {t_random / t_sampler:>6.0f}x "
+              f"{build_ms:>16.1f} {size_mb:>11.2f}")
+        conn.close()
+
+    print(f"\nEnsembles disponibles : {', '.join(SAMPLE_POOLS)}")
+
+
+if __name__ == "__main__":
+    main()
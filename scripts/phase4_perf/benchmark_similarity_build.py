@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de construction des films similaires (movies/services/similarity.py)
+sur des catalogues synthétiques de taille croissante : temps de construction
+de movie_neighbors, débit, mémoire d'un lot, puis latence de lecture des
+voisins comparée à l'ancienne requête par genres communs.
+
+Usage : python scripts/phase4_perf/benchmark_similarity_build.py [taille ...]
+"""
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+from movies.services.movie_cards import build_movie_cards  # noqa: E402
+from movies.services.similarity import (  # noqa: E402
+    DEFAULT_SIMILARITY_SETTINGS, build_similar_movies, estimate_batch_memory, fetch_similar
+)
+
+SIZES = [2_000, 10_000, 25_000]
+GENRES = ['Drama', 'Comedy', 'Action', 'Crime', 'Romance', 'Thriller', 'Horror', 'Adventure',
+          'Documentary', 'Family', 'Fantasy', 'Mystery', 'Sci-Fi', 'Animation', 'Biography',
+          'History', 'War', 'Music', 'Western', 'Sport', 'Musical', 'Film-Noir']
+N_LOOKUPS = 200
+
+
+def build_catalog(n):
+    """Base en mémoire : n films avec genres, réalisateurs, scénaristes et acteurs"""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.executescript("""
+        CREATE TABLE movies (mid TEXT PRIMARY KEY, titleType TEXT, primaryTitle TEXT, startYear INTEGER);
+        CREATE TABLE ratings (mid TEXT PRIMARY KEY, averageRating REAL, numVotes INTEGER);
+        CREATE TABLE genres (mid TEXT, genre TEXT, PRIMARY KEY (mid, genre));
+        CREATE TABLE directors (mid TEXT, pid TEXT, PRIMARY KEY (mid, pid));
+        CREATE TABLE writers (mid TEXT, pid TEXT, PRIMARY KEY (mid, pid));
+        CREATE TABLE principals (mid TEXT, ordering INTEGER, pid TEXT, category TEXT, PRIMARY KEY (mid, ordering));
+    """)
+    rng = random.Random(42)
+    # Viviers de personnes proportionnels au catalogue ; quelques acteurs très présents
+    n_directors, n_writers, n_actors = max(50, n // 3), max(50, n // 2), max(200, n * 2)
+
+    movies, ratings, genres, directors, writers, principals = [], [], [], [], [], []
+    for i in range(n):
+        mid = f"tt{i:08d}"
+        movies.append((mid, rng.choice(['movie', 'movie', 'movie', 'tvMovie']), f"Film {i}", rng.randint(1920, 2024)))
+        ratings.append((mid, round(rng.uniform(1, 10), 1), int(rng.paretovariate(1.2) * 50)))
+        genres += [(mid, g) for g in rng.sample(GENRES, rng.randint(1, 3))]
+        directors.append((mid, f"nd{rng.randrange(n_directors)}"))
+        writers += [(mid, f"nw{w}") for w in {rng.randrange(n_writers) for _ in range(rng.randint(1, 2))}]
+        cast = {int(n_actors * rng.random() ** 2) for _ in range(6)}
+        principals += [(mid, k, f"na{a}", rng.choice(['actor', 'actress'])) for k, a in enumerate(cast)]
+
+    conn.executemany("INSERT INTO movies VALUES (?, ?, ?, ?)", movies)
+    conn.executemany("INSERT INTO ratings VALUES (?, ?, ?)", ratings)
+    conn.executemany("INSERT INTO genres VALUES (?, ?)", genres)
+    conn.executemany("INSERT INTO directors VALUES (?, ?)", directors)
+    conn.executemany("INSERT INTO writers VALUES (?, ?)", writers)
+    conn.executemany("INSERT INTO principals VALUES (?, ?, ?, ?)", principals)
+    conn.commit()
+    build_movie_cards(conn)
+    return conn
+
+
+def legacy_similar(conn, movie_id, limit=4):
+    """Ancienne requête : films partageant un genre, puis une note par film"""
+    genres = [row[0] for row in conn.execute("SELECT genre FROM genres WHERE mid = ?", (movie_id,))]
+    placeholders = ','.join('?' for _ in genres)
+    rows = conn.execute(f"""
+        SELECT DISTINCT m.mid as id, m.primaryTitle as title, m.startYear as year
+        FROM movies m
+        JOIN genres g ON m.mid = g.mid
+        WHERE g.genre IN ({placeholders})
+          AND m.mid != ?
+          AND m.titleType = 'movie'
+        LIMIT ?
+    """, genres + [movie_id, limit * 2]).fetchall()
+    similar = [dict(row) for row in rows]
+    for movie in similar:
+        row = conn.execute("SELECT averageRating FROM ratings WHERE mid = ?", (movie['id'],)).fetchone()
+        movie['rating'] = row[0] if row else None
+    return similar[:limit]
+
+
+def lookup_ms(fn, mids):
+    """Latence médiane d'une lecture (ms)"""
+    samples = []
+    for mid in mids:
+        t0 = time.perf_counter()
+        fn(mid)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    config = dict(DEFAULT_SIMILARITY_SETTINGS)
+
+    print(f"top_k={config['top_k']}, lot de {config['batch_cells']:,} cases, "
+          f"médiane sur {N_LOOKUPS} lectures\n")
+    print(f"{'films':>8} {'construction s':>15} {'films/s':>9} {'Mo/lot':>7} "
+          f"{'voisins ms':>11} {'ancienne ms':>12}")
+
+    for n in sizes:
+        conn = build_catalog(n)
+
+        t0 = time.perf_counter()
+        build_similar_movies(conn, config, source='movie_card')
+        build_s = time.perf_counter() - t0
+
+        mids = random.Random(7).sample([f"tt{i:08d}" for i in range(n)], min(N_LOOKUPS, n))
+        t_neighbors = lookup_ms(lambda mid: fetch_similar(conn, mid, 4, source='movie_card'), mids)
+        t_legacy = lookup_ms(lambda mid: legacy_similar(conn, mid, 4), mids)
+
+        print(f"{n:>8,} {build_s:>15.2f} {n / build_s:>9,.0f} {estimate_batch_memory(n, config['batch_cells']):>7} "
+              f"{t_neighbors:>11.3f} {t_legacy:>12.3f}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,7 @@ python3 scripts/phase2_mongodb/migrate_flat.py
 
 # 3. Import
 python3 scripts/phase3_replica/import_data.py
+python3 manage.py build_mongo_similar_movies
 
 # 4. Django
 python3 manage.py check